@@ -0,0 +1,134 @@
+"""
+This module provides a persistent cache of module build fingerprints,
+so that module images whose build inputs did not change are not rebuilt
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+import docker
+
+BUILD_CACHE_FILE = "build-cache.json"
+BUILD_CACHE_VERSION = 1
+
+
+def read_dockerignore(context_path):
+    """Read the exclusion patterns of .dockerignore in the build context, the same way the Docker SDK does"""
+    dockerignore = os.path.join(context_path, ".dockerignore")
+    if not os.path.exists(dockerignore):
+        return []
+
+    with open(dockerignore) as f:
+        return [line.strip() for line in f.read().splitlines() if line.strip() and not line.strip().startswith("#")]
+
+
+def get_context_files(context_path, dockerfiles):
+    """Get the relative paths of the files sent to the Docker daemon as build context, respecting .dockerignore"""
+    patterns = read_dockerignore(context_path)
+    # The Dockerfiles are always part of the context, even when .dockerignore excludes them
+    for dockerfile in dockerfiles[1:]:
+        patterns.append("!" + dockerfile)
+    paths = docker.utils.build.exclude_paths(context_path, patterns, dockerfile=dockerfiles[0] if dockerfiles else None)
+
+    return sorted(path for path in paths if os.path.isfile(os.path.join(context_path, path)))
+
+
+class BuildCache:
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.cache_file = os.path.join(cache_dir, BUILD_CACHE_FILE)
+        self._lock = threading.Lock()
+        self._load()
+
+    def get_fingerprint(self, tag, build_profile, sdk_options, base_image_ids=None):
+        """Compute a fingerprint over the build context, the Dockerfile, the parsed build options and the image tag.
+        base_image_ids are the IDs of the module images the Dockerfile is built FROM, so that rebuilding them rebuilds the image."""
+        context_path = build_profile.context_path
+        dockerfile_relative = os.path.relpath(build_profile.dockerfile, context_path)
+
+        fingerprint = hashlib.sha256()
+        fingerprint.update(tag.encode("utf-8"))
+        fingerprint.update(json.dumps(sdk_options, sort_keys=True).encode("utf-8"))
+        fingerprint.update(dockerfile_relative.replace("\\", "/").encode("utf-8"))
+        fingerprint.update(self.get_file_hash(build_profile.dockerfile).encode("utf-8"))
+        fingerprint.update(json.dumps(sorted(base_image_ids or [])).encode("utf-8"))
+
+        for path in get_context_files(context_path, [dockerfile_relative]):
+            full_path = os.path.join(context_path, path)
+            # The cache lives in the solution folder, which is a common build context for modules sharing code
+            if os.path.abspath(full_path).startswith(os.path.abspath(self.cache_dir) + os.sep):
+                continue
+            fingerprint.update(path.replace("\\", "/").encode("utf-8"))
+            fingerprint.update(self.get_file_hash(full_path).encode("utf-8"))
+
+        return fingerprint.hexdigest()
+
+    def get_file_hash(self, path):
+        """Get the SHA256 hash of a file. Files are only rehashed when their mtime or size changed."""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._files.get(path)
+        if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            return entry[2]
+
+        file_hash = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                file_hash.update(chunk)
+
+        with self._lock:
+            self._files[path] = [stat.st_mtime_ns, stat.st_size, file_hash.hexdigest()]
+        return file_hash.hexdigest()
+
+    def is_up_to_date(self, tag, fingerprint, docker_client):
+        """Check whether the image of tag was built from the same fingerprint and still exists locally"""
+        with self._lock:
+            entry = self._images.get(tag)
+        if entry is None or entry["fingerprint"] != fingerprint:
+            return False
+
+        try:
+            if docker_client.images.get(tag).id != entry["image_id"]:
+                return False
+        except docker.errors.ImageNotFound:
+            return False
+
+        with self._lock:
+            entry["last_used"] = time.time()
+        return True
+
+    def get_last_used(self, tag):
+        """Get the time the image of tag was last built or found up to date, or None if it is not in the cache"""
+        with self._lock:
+            entry = self._images.get(tag)
+        return entry.get("last_used") if entry is not None else None
+
+    def update(self, tag, fingerprint, image_id):
+        with self._lock:
+            self._images[tag] = {"fingerprint": fingerprint, "image_id": image_id, "last_used": time.time()}
+
+    def save(self):
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+        with self._lock:
+            content = {"version": BUILD_CACHE_VERSION, "files": self._files, "images": self._images}
+            with open(self.cache_file, "w") as f:
+                json.dump(content, f)
+
+    def _load(self):
+        self._files = {}
+        self._images = {}
+        try:
+            with open(self.cache_file, "r") as f:
+                content = json.load(f)
+            if content.get("version") == BUILD_CACHE_VERSION:
+                self._files = content.get("files", {})
+                self._images = content.get("images", {})
+        except (OSError, ValueError):
+            # A missing or corrupted cache only means that every module will be built
+            pass
@@ -0,0 +1,59 @@
+"""
+This module provides build context archives shared by the images built from the same context,
+so that a context folder is archived once per build run instead of once per image
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+import docker
+
+from .buildcache import read_dockerignore
+
+
+class BuildContextCache:
+    def __init__(self, output):
+        self.output = output
+        self.archive_dir = None
+        self._lock = threading.Lock()
+        # map archive key to the lock guarding its creation
+        self._archive_locks = {}
+
+    def open(self, build_profile):
+        """Open the build context archive of the build profile, creating it on first use.
+        Return None if the Dockerfile is outside of the build context, as the Docker SDK then adds it to the archive under a random name."""
+        context_path = os.path.abspath(build_profile.context_path)
+        dockerfile_relative = os.path.relpath(os.path.abspath(build_profile.dockerfile), context_path)
+        if dockerfile_relative.startswith(os.pardir):
+            return None
+
+        patterns = read_dockerignore(context_path)
+        # The Dockerfile is only part of the archive key when .dockerignore excludes it,
+        # since the Docker SDK adds it back to the archive of its own build only
+        forced_dockerfile = dockerfile_relative if docker.utils.build.PatternMatcher(patterns).matches(dockerfile_relative) else ""
+        key = hashlib.sha256("\n".join([context_path, forced_dockerfile] + patterns).encode("utf-8")).hexdigest()
+
+        with self._lock:
+            if self.archive_dir is None:
+                self.archive_dir = tempfile.mkdtemp(prefix="iotedgedev-context-")
+            archive_lock = self._archive_locks.setdefault(key, threading.Lock())
+        archive_path = os.path.join(self.archive_dir, key + ".tar")
+
+        with archive_lock:
+            if not os.path.exists(archive_path):
+                self.output.info("Archiving build context: {0}".format(context_path))
+                with open(archive_path + ".tmp", "wb") as f:
+                    docker.utils.build.tar(context_path, exclude=patterns, dockerfile=(dockerfile_relative, None), fileobj=f)
+                os.replace(archive_path + ".tmp", archive_path)
+
+        return open(archive_path, "rb")
+
+    def cleanup(self):
+        with self._lock:
+            if self.archive_dir is not None:
+                shutil.rmtree(self.archive_dir, ignore_errors=True)
+                self.archive_dir = None
+                self._archive_locks = {}
@@ -139,6 +139,20 @@ class BuildOptionsParser(object):
 
         return filtered_build_options
 
+    def get_cli_build_options(self):
+        """Get the build options which are not ignored as (cli_key, cli_val) pairs"""
+        return self._filter_build_options() or []
+
+    def get_build_args(self):
+        """Get the values of the --build-arg options as a dict"""
+        build_args = {}
+        for build_option in self.build_options or []:
+            cli_key, cli_val = split_build_option(build_option.strip())
+            if cli_key == "--build-arg" and cli_val:
+                k, v = split_arg(cli_val)
+                build_args[k] = v
+        return build_args
+
     def parse_build_options(self):
         """Parse build options to python SDK"""
         filtered_build_options = self._filter_build_options()
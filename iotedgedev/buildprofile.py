@@ -1,5 +1,7 @@
 class BuildProfile:
-    def __init__(self, dockerfile, context_path, extra_options):
+    def __init__(self, dockerfile, context_path, extra_options, build_backend="", platform=""):
         self.dockerfile = dockerfile
         self.context_path = context_path
         self.extra_options = extra_options
+        self.build_backend = build_backend
+        self.platform = platform
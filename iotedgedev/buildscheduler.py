@@ -0,0 +1,232 @@
+"""
+This module provides a bounded worker pool to build and push module images concurrently
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .output import PrefixedOutput
+from .progress import format_size
+
+
+class BuildResult:
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+    # Returned by a build task when the image is up to date and was not rebuilt
+    CACHED = "cached"
+
+    def __init__(self, tag):
+        self.tag = tag
+        self.status = BuildResult.SKIPPED
+        # Stages which were skipped because their outcome was already up to date
+        self.cached_stages = []
+        self.build_duration = 0.0
+        self.push_duration = 0.0
+        self.pushed_bytes = 0
+        self.error = None
+
+    @property
+    def duration(self):
+        return self.build_duration + self.push_duration
+
+    @property
+    def succeeded(self):
+        return self.status == BuildResult.SUCCEEDED
+
+    @property
+    def failed(self):
+        return self.status == BuildResult.FAILED
+
+
+class BuildScheduler:
+    def __init__(self, output, jobs=1, keep_going=False, push_jobs=None):
+        if jobs < 1:
+            raise ValueError("The number of parallel jobs must be at least 1. Found: {0}".format(jobs))
+        if push_jobs is not None and push_jobs < 1:
+            raise ValueError("The number of parallel push jobs must be at least 1. Found: {0}".format(push_jobs))
+
+        self.output = output
+        self.jobs = jobs
+        # When push_jobs is set, pushes run in a separate stage, so they overlap with the remaining builds
+        self.push_jobs = push_jobs
+        self.keep_going = keep_going
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def pipelined(self):
+        return self.push_jobs is not None
+
+    def run(self, tags, build_task=None, push_task=None, dependencies=None):
+        """Run build_task(tag, output) and then push_task(tag, output) for every tag.
+        At most `jobs` builds and `push_jobs` pushes run at the same time.
+        dependencies maps a tag to the tags it is built FROM: a build starts once the builds of its dependencies
+        succeeded, and is skipped if one of them did not.
+        Unless keep_going is set, no new task is started once a task failed."""
+        self._cancelled.clear()
+        dependencies = BuildScheduler._get_dependencies(tags, dependencies)
+        results = [BuildResult(tag) for tag in BuildScheduler.sort_tags(tags, dependencies)]
+        # tags whose build stage succeeded
+        built = set()
+
+        if self.jobs == 1 and not self.pipelined:
+            for result in results:
+                if dependencies[result.tag].issubset(built) and self._run_stage(result, build_task, self.output, "build"):
+                    built.add(result.tag)
+                    self._run_stage(result, push_task, self.output, "push")
+            return results
+
+        dependents = dict((tag, []) for tag in dependencies)
+        for tag, tag_dependencies in dependencies.items():
+            for dependency in tag_dependencies:
+                dependents[dependency].append(tag)
+        result_map = dict((result.tag, result) for result in results)
+        # number of dependencies whose build is not finished yet, and of tags not processed yet
+        waiting = dict((tag, len(tag_dependencies)) for tag, tag_dependencies in dependencies.items())
+        remaining = [len(results)]
+        done = threading.Event()
+        if not results:
+            done.set()
+        graph_lock = threading.Lock()
+
+        def release_dependents(result, succeeded):
+            ready = []
+            with graph_lock:
+                finished = [result.tag]
+                if succeeded:
+                    built.add(result.tag)
+                for finished_tag in finished:
+                    for dependent in dependents[finished_tag]:
+                        waiting[dependent] -= 1
+                        if waiting[dependent] > 0:
+                            continue
+                        if dependencies[dependent].issubset(built):
+                            ready.append(result_map[dependent])
+                        else:
+                            # A dependency failed: skip the dependent, and in turn everything built FROM it
+                            finished.append(dependent)
+                remaining[0] -= len(finished)
+                if remaining[0] == 0:
+                    done.set()
+            return ready
+
+        with ThreadPoolExecutor(max_workers=self.push_jobs or 1) as push_executor:
+            with ThreadPoolExecutor(max_workers=self.jobs) as build_executor:
+                def build(result):
+                    output = self._get_output(result)
+                    succeeded = self._run_stage(result, build_task, output, "build")
+                    for dependent in release_dependents(result, succeeded):
+                        build_executor.submit(build, dependent)
+                    if not succeeded:
+                        return
+                    if not self.pipelined:
+                        self._run_stage(result, push_task, output, "push")
+                    elif push_task is not None:
+                        push_executor.submit(self._run_stage, result, push_task, output, "push")
+
+                for result in results:
+                    if not dependencies[result.tag]:
+                        build_executor.submit(build, result)
+                # Builds are queued by build workers once their dependencies are built
+                done.wait()
+
+        return results
+
+    @staticmethod
+    def sort_tags(tags, dependencies):
+        """Sort the tags so that every tag comes after the tags it depends on, otherwise keeping the order of tags"""
+        sorted_tags = []
+        pending = list(tags)
+        while pending:
+            ready = [tag for tag in pending if dependencies.get(tag, set()).issubset(sorted_tags)]
+            if not ready:
+                raise ValueError("Circular dependency between the images: {0}".format(", ".join(pending)))
+            sorted_tags.extend(ready)
+            pending = [tag for tag in pending if tag not in ready]
+
+        return sorted_tags
+
+    def print_summary(self, results, title="BUILD SUMMARY", footer=None):
+        if not results:
+            return
+
+        self.output.header(title)
+        name_width = max(len(BuildScheduler.get_display_name(result.tag)) for result in results)
+        show_bytes = any(result.pushed_bytes for result in results)
+        for result in results:
+            line = "{0}  {1:<9}  build {2:>8}  push {3:>8}".format(
+                BuildScheduler.get_display_name(result.tag).ljust(name_width), result.status.upper(),
+                BuildScheduler._format_stage(result, "build"), BuildScheduler._format_stage(result, "push"))
+            if show_bytes:
+                line += "  {0:>10}".format(format_size(result.pushed_bytes))
+            if result.failed:
+                self.output.error(line)
+            else:
+                self.output.info(line)
+
+        succeeded = len([result for result in results if result.succeeded])
+        failed = len([result for result in results if result.failed])
+        self.output.info("{0} succeeded, {1} failed, {2} skipped".format(succeeded, failed, len(results) - succeeded - failed))
+        if footer:
+            self.output.info(footer)
+        self.output.line()
+
+    def raise_on_failure(self, results):
+        failures = [result for result in results if result.failed]
+        if not failures:
+            return
+
+        if not self.keep_going:
+            raise failures[0].error
+
+        raise Exception("Failed to process {0} of {1} images: {2}".format(
+            len(failures), len(results), ", ".join(result.tag for result in failures)))
+
+    @staticmethod
+    def get_display_name(tag):
+        # Strip the registry server: localhost:5000/filtermodule:0.0.1-amd64 -> filtermodule:0.0.1-amd64
+        return tag.split("/", 1)[-1]
+
+    @staticmethod
+    def _format_stage(result, stage):
+        if stage in result.cached_stages:
+            return "cached"
+        return "{0:.1f}s".format(getattr(result, stage + "_duration"))
+
+    @staticmethod
+    def _get_dependencies(tags, dependencies):
+        # Only the tags being processed are dependencies: other base images are pulled by the build
+        dependencies = dependencies or {}
+        return dict((tag, set(dependencies.get(tag, [])).intersection(tags).difference([tag])) for tag in tags)
+
+    def _get_output(self, result):
+        return PrefixedOutput(BuildScheduler.get_display_name(result.tag))
+
+    def _run_stage(self, result, task, output, stage):
+        """Run one stage of a tag and record its duration. Return whether the next stage can start."""
+        if task is None:
+            return True
+        if self._cancelled.is_set() and not self.keep_going:
+            result.status = BuildResult.SKIPPED
+            return False
+
+        start = time.time()
+        try:
+            if task(result.tag, output) == BuildResult.CACHED:
+                result.cached_stages.append(stage)
+            result.status = BuildResult.SUCCEEDED
+            return True
+        except Exception as ex:
+            result.status = BuildResult.FAILED
+            result.error = ex
+            with self._lock:
+                # In fail-fast mode the first error is raised by raise_on_failure, so only report the others here
+                if self.keep_going or self._cancelled.is_set():
+                    output.error(str(ex))
+                self._cancelled.set()
+            return False
+        finally:
+            setattr(result, stage + "_duration", time.time() - start)
+            output.flush()
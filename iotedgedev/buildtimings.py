@@ -0,0 +1,101 @@
+"""
+This module provides per-phase and per-step timings of the build and push of module images
+"""
+
+import contextlib
+import json
+import threading
+import time
+
+TIMINGS_VERSION = 1
+
+
+class BuildTimings:
+    def __init__(self):
+        self.start = time.time()
+        # map phase name to duration in seconds, in the order the phases ran
+        self.phases = {}
+        # map image tag to {"phases": {phase name: duration}, "steps": [{"name": step name, "duration": duration}]}
+        self.images = {}
+        self._open_steps = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def measure(self, phase, tag=None):
+        """Measure the duration of a phase of the whole run, or of the image of tag"""
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.add(phase, time.time() - start, tag)
+
+    def add(self, phase, duration, tag=None):
+        with self._lock:
+            phases = self.phases if tag is None else self._get_image(tag)["phases"]
+            phases[phase] = phases.get(phase, 0.0) + duration
+
+    def step(self, tag, name):
+        """Record that a build step of the image of tag started, which ends the previous step.
+        A name of None ends the last step."""
+        now = time.time()
+        with self._lock:
+            open_step = self._open_steps.pop(tag, None)
+            if open_step is not None:
+                self._get_image(tag)["steps"].append({"name": open_step[0], "duration": now - open_step[1]})
+            if name is not None:
+                self._open_steps[tag] = (name, now)
+
+    def add_step(self, tag, name, duration):
+        with self._lock:
+            self._get_image(tag)["steps"].append({"name": name, "duration": duration})
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "version": TIMINGS_VERSION,
+                "total": round(time.time() - self.start, 3),
+                "phases": BuildTimings._round(self.phases),
+                "images": dict((tag, {
+                    "phases": BuildTimings._round(image["phases"]),
+                    "steps": [{"name": step["name"], "duration": round(step["duration"], 3)} for step in image["steps"]]
+                }) for tag, image in sorted(self.images.items()))
+            }
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def print_summary(self, output, slowest_steps=10):
+        timings = self.to_dict()
+        output.header("TIMINGS")
+        for phase, duration in timings["phases"].items():
+            output.info("{0:<40} {1:>9.1f}s".format(phase, duration))
+        output.info("{0:<40} {1:>9.1f}s".format("total", timings["total"]))
+
+        images = timings["images"]
+        if images:
+            image_phases = []
+            for image in images.values():
+                image_phases.extend(phase for phase in image["phases"] if phase not in image_phases)
+            name_width = max(len(tag.split("/", 1)[-1]) for tag in images)
+
+            output.line()
+            output.info("  ".join([" " * name_width] + ["{0:>14}".format(phase) for phase in image_phases]))
+            for tag, image in images.items():
+                output.info("  ".join([tag.split("/", 1)[-1].ljust(name_width)] + [
+                    "{0:>13.1f}s".format(image["phases"][phase]) if phase in image["phases"] else "{0:>14}".format("-") for phase in image_phases]))
+
+        steps = [(step["duration"], tag, step["name"]) for tag, image in images.items() for step in image["steps"]]
+        if steps:
+            output.line()
+            output.info("Slowest build steps:")
+            for duration, tag, name in sorted(steps, key=lambda step: step[0], reverse=True)[:slowest_steps]:
+                output.info("{0:>9.1f}s  {1}  {2}".format(duration, tag.split("/", 1)[-1], name))
+        output.line()
+
+    def _get_image(self, tag):
+        return self.images.setdefault(tag, {"phases": {}, "steps": []})
+
+    @staticmethod
+    def _round(phases):
+        return dict((phase, round(duration, 3)) for phase, duration in phases.items())
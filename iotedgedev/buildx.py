@@ -0,0 +1,77 @@
+"""
+This module provides interfaces to build module images with Docker Buildx (BuildKit)
+"""
+
+import collections
+import os
+import re
+import subprocess
+
+
+class Buildx:
+    def __init__(self, output, utility, builder=""):
+        self.output = output
+        self.utility = utility
+        self.builder = builder
+        # Fail fast if buildx is not installed
+        self.utility.check_dependency(["docker", "buildx", "version"], "To build module images with the buildx backend, Docker Buildx")
+
+    def build(self, tag, build_profile, build_options, output=None, cache_dir="", on_step_done=None, env=None):
+        """Build the image with `docker buildx build` and load it into the local image store.
+        build_options is the list of (cli_key, cli_val) docker build options from module.json.
+        on_step_done(name, duration) is called when BuildKit reports the duration of a step.
+        env is the environment of the docker CLI selecting the daemon the default builder loads the image into,
+        such as DOCKER_CONTEXT or DOCKER_HOST with its TLS configuration. The build inherits the environment when it is None."""
+        if output is None:
+            output = self.output
+
+        cmd = self.get_build_command(tag, build_profile, build_options, cache_dir)
+        output.info(" ".join(cmd))
+
+        # Keep the tail of the output to report the failure, BuildKit prints the error at the end
+        tail = collections.deque(maxlen=20)
+        # map BuildKit vertex number to step name. Sample: '#5 [2/3] RUN pip install -r requirements.txt'
+        steps = {}
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, cwd=build_profile.context_path, env=env)
+        for line in iter(proc.stdout.readline, b""):
+            line = self.utility.decode(line)
+            tail.append(line)
+            output.procout(line)
+            if on_step_done is not None:
+                step = re.match(r"#(\d+) (\[.*)", line)
+                if step:
+                    steps[step.group(1)] = step.group(2).strip()
+                done = re.match(r"#(\d+) DONE (\d+(?:\.\d+)?)s", line)
+                if done and done.group(1) in steps:
+                    on_step_done(steps.pop(done.group(1)), float(done.group(2)))
+        proc.wait()
+
+        if proc.returncode != 0:
+            raise ValueError("docker buildx build failed for {0}:\n{1}".format(tag, "\n".join(tail)))
+
+    def get_build_command(self, tag, build_profile, build_options, cache_dir=""):
+        cmd = ["docker", "buildx", "build", "--load", "--progress", "plain",
+               "--tag", tag, "--file", build_profile.dockerfile]
+        if self.builder:
+            cmd.extend(["--builder", self.builder])
+
+        for cli_key, cli_val in build_options:
+            cmd.append(cli_key)
+            if cli_val is not None:
+                cmd.append(cli_val)
+
+        if cache_dir:
+            cache_path = os.path.abspath(os.path.join(cache_dir, Buildx.get_cache_name(tag, build_profile)))
+            if os.path.isdir(cache_path):
+                cmd.extend(["--cache-from", "type=local,src={0}".format(cache_path)])
+            cmd.extend(["--cache-to", "type=local,dest={0},mode=max".format(cache_path)])
+
+        cmd.append(build_profile.context_path)
+        return cmd
+
+    @staticmethod
+    def get_cache_name(tag, build_profile):
+        """Get the name of the local cache folder of an image. The version is left out, so the cache is reused by new versions.
+        Sample: 'localhost:5000/filtermodule:0.0.1-amd64' with Dockerfile.amd64 -> 'filtermodule-Dockerfile.amd64'"""
+        repository = tag.rsplit(":", 1)[0].split("/", 1)[-1]
+        return re.sub(r"[^a-zA-Z0-9_.-]", "_", "{0}-{1}".format(repository, os.path.basename(build_profile.dockerfile)))
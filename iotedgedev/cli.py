@@ -20,6 +20,8 @@ from .iothub import IoTHub
 from .modules import Modules
 from .organizedgroup import OrganizedGroup
 from .output import Output
+from .progress import parse_size
+from .schemacache import SCHEMA_CACHE_MODES, SchemaCache
 from .simulator import Simulator
 from .solution import Solution
 from .utility import Utility
@@ -192,12 +194,71 @@ main.add_command_with_deprecation(add, deprecated=True, alt="solution add")
               default=envvars.DEFAULT_PLATFORM,
               show_default=True,
               required=False,
-              help="Specify the platform")
+              help="Specify the platform. Use \"all\" for every platform declared in module.json of the modules")
+@click.option("--jobs",
+              "-j",
+              default=1,
+              show_default=True,
+              required=False,
+              type=click.IntRange(min=1),
+              help="Specify the number of module images to build and push in parallel")
+@click.option("--keep-going",
+              default=False,
+              show_default=True,
+              required=False,
+              is_flag=True,
+              help="Continue building and pushing the remaining module images when one of them fails")
+@click.option("--push-jobs",
+              default=None,
+              required=False,
+              type=click.IntRange(min=1),
+              help="Push module images in a separate stage with the specified number of parallel pushes, "
+                   "so that each image is pushed as soon as it is built while the remaining images are still building")
+@click.option("--skip-unchanged",
+              default=False,
+              show_default=True,
+              required=False,
+              is_flag=True,
+              help="Skip building module images whose build context, Dockerfile, build options and tag are unchanged since the last build "
+                   "and whose image still exists locally. Build fingerprints are cached in " + Constants.default_cache_folder)
+@click.option("--skip-pushed",
+              default=False,
+              show_default=True,
+              required=False,
+              is_flag=True,
+              help="Skip pushing module images when the container registry already holds the same image digest for the tag")
+@click.option("--timings",
+              default=False,
+              show_default=True,
+              required=False,
+              is_flag=True,
+              help="Print the durations of the build and push phases of each module image and of the slowest Dockerfile steps")
+@click.option("--timings-file",
+              default=None,
+              required=False,
+              help="Save the durations of the build and push phases and of the Dockerfile steps to the specified JSON file")
+@click.option("--docker-host",
+              "docker_hosts",
+              default=None,
+              required=False,
+              multiple=True,
+              help="Specify a Docker daemon URL or Docker context name to distribute the module builds over. "
+                   "Can be specified multiple times, together with --jobs. Overrides DOCKER_HOSTS")
+@click.option("--schema-cache",
+              default="auto",
+              show_default=True,
+              required=False,
+              type=click.Choice(SCHEMA_CACHE_MODES),
+              help="Specify how the deployment manifest schemas are cached in ~/.iotedgedev/schemas: "
+                   "\"auto\" refreshes them from schemastore.org once a week, \"refresh\" refreshes them now, "
+                   "\"offline\" uses the cached or bundled schemas without network access")
 @click.pass_context
 @with_telemetry
-def build(ctx, push, do_deploy, template_file, platform):
+def build(ctx, push, do_deploy, template_file, platform, jobs, keep_going, push_jobs, skip_unchanged, skip_pushed, timings, timings_file, docker_hosts, schema_cache):
+    SchemaCache.mode = schema_cache
     mod = Modules(envvars, output)
-    mod.build_push(template_file, platform, no_push=not push)
+    mod.build_push(template_file, platform, no_push=not push, jobs=jobs, keep_going=keep_going, push_jobs=push_jobs, skip_unchanged=skip_unchanged, skip_pushed=skip_pushed,
+                   timings=timings, timings_file=timings_file, docker_hosts=docker_hosts)
 
     if do_deploy:
         ctx.invoke(deploy)
@@ -233,12 +294,71 @@ main.add_command_with_deprecation(build, deprecated=True, alt="solution build")
               default=envvars.DEFAULT_PLATFORM,
               show_default=True,
               required=False,
-              help="Specify the platform")
+              help="Specify the platform. Use \"all\" for every platform declared in module.json of the modules")
+@click.option("--jobs",
+              "-j",
+              default=1,
+              show_default=True,
+              required=False,
+              type=click.IntRange(min=1),
+              help="Specify the number of module images to build and push in parallel")
+@click.option("--keep-going",
+              default=False,
+              show_default=True,
+              required=False,
+              is_flag=True,
+              help="Continue building and pushing the remaining module images when one of them fails")
+@click.option("--push-jobs",
+              default=None,
+              required=False,
+              type=click.IntRange(min=1),
+              help="Push module images in a separate stage with the specified number of parallel pushes, "
+                   "so that each image is pushed as soon as it is built while the remaining images are still building")
+@click.option("--skip-unchanged",
+              default=False,
+              show_default=True,
+              required=False,
+              is_flag=True,
+              help="Skip building module images whose build context, Dockerfile, build options and tag are unchanged since the last build "
+                   "and whose image still exists locally. Build fingerprints are cached in " + Constants.default_cache_folder)
+@click.option("--skip-pushed",
+              default=False,
+              show_default=True,
+              required=False,
+              is_flag=True,
+              help="Skip pushing module images when the container registry already holds the same image digest for the tag")
+@click.option("--timings",
+              default=False,
+              show_default=True,
+              required=False,
+              is_flag=True,
+              help="Print the durations of the build and push phases of each module image and of the slowest Dockerfile steps")
+@click.option("--timings-file",
+              default=None,
+              required=False,
+              help="Save the durations of the build and push phases and of the Dockerfile steps to the specified JSON file")
+@click.option("--docker-host",
+              "docker_hosts",
+              default=None,
+              required=False,
+              multiple=True,
+              help="Specify a Docker daemon URL or Docker context name to distribute the module builds over. "
+                   "Can be specified multiple times, together with --jobs. Overrides DOCKER_HOSTS")
+@click.option("--schema-cache",
+              default="auto",
+              show_default=True,
+              required=False,
+              type=click.Choice(SCHEMA_CACHE_MODES),
+              help="Specify how the deployment manifest schemas are cached in ~/.iotedgedev/schemas: "
+                   "\"auto\" refreshes them from schemastore.org once a week, \"refresh\" refreshes them now, "
+                   "\"offline\" uses the cached or bundled schemas without network access")
 @click.pass_context
 @with_telemetry
-def push(ctx, do_deploy, no_build, template_file, platform):
+def push(ctx, do_deploy, no_build, template_file, platform, jobs, keep_going, push_jobs, skip_unchanged, skip_pushed, timings, timings_file, docker_hosts, schema_cache):
+    SchemaCache.mode = schema_cache
     mod = Modules(envvars, output)
-    mod.push(template_file, platform, no_build=no_build)
+    mod.push(template_file, platform, no_build=no_build, jobs=jobs, keep_going=keep_going, push_jobs=push_jobs, skip_unchanged=skip_unchanged, skip_pushed=skip_pushed,
+             timings=timings, timings_file=timings_file, docker_hosts=docker_hosts)
 
     if do_deploy:
         ctx.invoke(deploy)
@@ -343,7 +463,7 @@ def tag(tags):
               default=envvars.DEFAULT_PLATFORM,
               show_default=True,
               required=False,
-              help="Specify the platform")
+              help="Specify the platform. Use \"all\" for every platform declared in module.json of the modules")
 @click.option("--fail-on-validation-error",
               "fail_on_validation_error",
               is_flag=True,
@@ -351,10 +471,43 @@ def tag(tags):
               show_default=True,
               required=False,
               help="Fail the command when deployment manifest validation failed")
+@click.option("--schema-cache",
+              default="auto",
+              show_default=True,
+              required=False,
+              type=click.Choice(SCHEMA_CACHE_MODES),
+              help="Specify how the deployment manifest schemas are cached in ~/.iotedgedev/schemas: "
+                   "\"auto\" refreshes them from schemastore.org once a week, \"refresh\" refreshes them now, "
+                   "\"offline\" uses the cached or bundled schemas without network access")
+@click.option("--force",
+              default=False,
+              show_default=True,
+              required=False,
+              is_flag=True,
+              help="Generate the deployment manifests even when the template, the module.json files, the environment variables they use "
+                   "and the platform are unchanged since they were generated. Fingerprints are cached in " + Constants.default_cache_folder)
+@click.option("--all",
+              "all_templates",
+              default=False,
+              show_default=True,
+              required=False,
+              is_flag=True,
+              help="Generate the deployment manifests of every *.template.json file of the solution for every platform declared in module.json "
+                   "of their modules, in one run. --file and --platform are ignored, and a combined validation report is printed")
+@click.option("--jobs",
+              "-j",
+              default=None,
+              required=False,
+              type=click.IntRange(min=1),
+              help="Specify the number of templates to generate in parallel with --all. Defaults to the number of CPUs")
 @with_telemetry
-def genconfig(template_file, platform, fail_on_validation_error):
+def genconfig(template_file, platform, fail_on_validation_error, schema_cache, force, all_templates, jobs):
+    SchemaCache.mode = schema_cache
     mod = Modules(envvars, output)
-    mod.build_push(template_file, platform, no_build=True, no_push=True, fail_on_validation_error=fail_on_validation_error)
+    if all_templates:
+        mod.genconfig_all(fail_on_validation_error=fail_on_validation_error, incremental=not force, jobs=jobs)
+    else:
+        mod.build_push(template_file, platform, no_build=True, no_push=True, fail_on_validation_error=fail_on_validation_error, incremental=not force)
 
 
 main.add_command_with_deprecation(genconfig, deprecated=True, alt="solution genconfig")
@@ -830,19 +983,74 @@ def setup_registry():
               required=False,
               is_flag=True,
               help="Remove all the images")
+@click.option("--dry-run",
+              default=False,
+              show_default=True,
+              required=False,
+              is_flag=True,
+              help="Only print the containers and images which would be removed, and the disk space which would be reclaimed")
+@click.option("--jobs",
+              "-j",
+              default=4,
+              show_default=True,
+              required=False,
+              type=click.IntRange(min=1),
+              help="Specify the number of containers and images to remove in parallel")
 @with_telemetry
-def clean(module, container, image):
+def clean(module, container, image, dry_run, jobs):
     utility = Utility(envvars, output)
     dock = Docker(envvars, utility, output)
 
     if module:
-        dock.remove_modules()
+        dock.remove_modules(dry_run, jobs)
 
     if container:
-        dock.remove_containers()
+        dock.remove_containers(dry_run, jobs)
 
     if image:
-        dock.remove_images()
+        dock.remove_images(dry_run, jobs)
+
+
+@docker.command(context_settings=CONTEXT_SETTINGS,
+                help="Remove old local images of the solution modules, keeping the most recently used tags of each module "
+                     "or evicting the least recently used images until they fit in a disk budget. "
+                     "Images referenced by the deployment manifests in CONFIG_OUTPUT_DIR are never removed.",
+                short_help="Remove old local images of the solution modules")
+@click.option("--keep",
+              "-k",
+              default=None,
+              required=False,
+              type=click.IntRange(min=0),
+              help="Specify the number of most recently used image tags to keep per module")
+@click.option("--max-size",
+              default=None,
+              required=False,
+              help="Remove the least recently used module images until they use at most this disk space, such as 10GB")
+@click.option("--dry-run",
+              default=False,
+              show_default=True,
+              required=False,
+              is_flag=True,
+              help="Only print the images which would be removed, and the disk space which would be reclaimed")
+@click.option("--jobs",
+              "-j",
+              default=4,
+              show_default=True,
+              required=False,
+              type=click.IntRange(min=1),
+              help="Specify the number of images to remove in parallel")
+@with_telemetry
+def prune(keep, max_size, dry_run, jobs):
+    if keep is None and max_size is None:
+        raise click.UsageError("Please specify --keep, --max-size or both")
+    try:
+        max_size = parse_size(max_size) if max_size is not None else None
+    except ValueError as ex:
+        raise click.BadParameter(str(ex), param_hint="--max-size")
+
+    utility = Utility(envvars, output)
+    dock = Docker(envvars, utility, output)
+    dock.prune_modules(keep, max_size, dry_run, jobs)
 
 
 @docker.command(context_settings=CONTEXT_SETTINGS,
@@ -863,11 +1071,32 @@ def clean(module, container, image):
               required=False,
               is_flag=True,
               help="Save EdgeAgent, EdgeHub and each Edge module logs to LOGS_PATH.")
+@click.option("--follow",
+              "-f",
+              default=False,
+              show_default=True,
+              required=False,
+              is_flag=True,
+              help="Follow the logs of EdgeAgent, EdgeHub and each Edge module in the current terminal, with the module name and time on every line.")
+@click.option("--filter",
+              "pattern",
+              default=None,
+              required=False,
+              help="Only follow the log lines matching this regular expression")
+@click.option("--since",
+              default=None,
+              required=False,
+              help="Only save or follow the logs since a duration ago (such as 10m, 2h or 1d), a UNIX timestamp or a date (such as 2021-06-01T12:00:00)")
+@click.option("--tail",
+              default="all",
+              show_default=True,
+              required=False,
+              help="Only save or follow the specified number of lines from the end of each log")
 @with_telemetry
-def log(show, save):
+def log(show, save, follow, pattern, since, tail):
     utility = Utility(envvars, output)
     dock = Docker(envvars, utility, output)
-    dock.handle_logs_cmd(show, save)
+    dock.handle_logs_cmd(show, save, since, tail, follow, pattern)
 
 
 main.add_command_with_deprecation(log, deprecated=True, alt="docker log")
@@ -0,0 +1,94 @@
+"""
+This module provides a persistent cache of deployment manifest fingerprints,
+so that genconfig only regenerates the deployment manifests whose inputs changed
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+
+from . import __version__
+
+CONFIG_CACHE_FILE = "config-cache.json"
+CONFIG_CACHE_VERSION = 1
+
+# Environment variable references expanded by os.path.expandvars, such as $VAR or ${VAR}
+ENVVAR_PATTERN = re.compile(r"\$(?:\{([A-Za-z_][A-Za-z0-9_]*)\}|([A-Za-z_][A-Za-z0-9_]*))")
+
+
+def get_referenced_envvars(content):
+    """Get the names of the environment variables referenced in a file content.
+    Sample: '{"image": "${CONTAINER_REGISTRY_SERVER}/filtermodule"}' -> {'CONTAINER_REGISTRY_SERVER'}"""
+    return set(braced or plain for braced, plain in ENVVAR_PATTERN.findall(content))
+
+
+class ConfigCache:
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.cache_file = os.path.join(cache_dir, CONFIG_CACHE_FILE)
+        self._lock = threading.Lock()
+        self._load()
+
+    def get_fingerprint(self, template_file, module_json_files, platform, replacements, settings=None):
+        """Compute a fingerprint over the template, the module.json files it refers to, the environment variables
+        they reference, the platform, the image replacements and the settings which affect the generation"""
+        fingerprint = hashlib.sha256()
+        fingerprint.update(json.dumps({"version": __version__, "platform": platform, "replacements": replacements,
+                                       "settings": settings or {}}, sort_keys=True).encode("utf-8"))
+
+        envvar_names = set()
+        for path in [template_file] + sorted(set(module_json_files)):
+            with open(path, "r") as f:
+                content = f.read()
+            fingerprint.update(os.path.abspath(path).encode("utf-8"))
+            fingerprint.update(hashlib.sha256(content.encode("utf-8")).hexdigest().encode("utf-8"))
+            envvar_names.update(get_referenced_envvars(content))
+
+        fingerprint.update(json.dumps(dict((name, os.environ.get(name)) for name in envvar_names), sort_keys=True).encode("utf-8"))
+        return fingerprint.hexdigest()
+
+    def get_up_to_date(self, manifest_path, fingerprint):
+        """Get the cache entry of the deployment manifest if it was generated from the same fingerprint
+        and is unchanged on disk, or None"""
+        with self._lock:
+            entry = self._manifests.get(os.path.abspath(manifest_path))
+        if entry is None or entry["fingerprint"] != fingerprint:
+            return None
+
+        if ConfigCache.get_file_hash(manifest_path) != entry["manifest_hash"]:
+            return None
+        return entry
+
+    def update(self, manifest_path, fingerprint, valid):
+        entry = {"fingerprint": fingerprint, "manifest_hash": ConfigCache.get_file_hash(manifest_path), "valid": valid}
+        with self._lock:
+            self._manifests[os.path.abspath(manifest_path)] = entry
+
+    def save(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        with self._lock:
+            content = {"version": CONFIG_CACHE_VERSION, "manifests": self._manifests}
+            with open(self.cache_file, "w") as f:
+                json.dump(content, f)
+
+    @staticmethod
+    def get_file_hash(path):
+        try:
+            with open(path, "rb") as f:
+                return hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            return None
+
+    def _load(self):
+        self._manifests = {}
+        try:
+            with open(self.cache_file, "r") as f:
+                content = json.load(f)
+            if content.get("version") == CONFIG_CACHE_VERSION:
+                self._manifests = content.get("manifests", {})
+        except (OSError, ValueError):
+            # A missing or corrupted cache only means that every deployment manifest will be generated
+            pass
@@ -1,11 +1,19 @@
+import os
+
+
 class Constants:
     default_config_folder = "config"
     default_modules_folder = "modules"
+    default_cache_folder = os.path.join(".iotedgedev", "cache")
+    default_build_backend = "docker"
+    buildx_build_backend = "buildx"
     default_deployment_template_file = "deployment.template.json"
     default_deployment_debug_template_file = "deployment.debug.template.json"
     default_platform = "amd64"
+    all_platforms = "all"
     deployment_template_suffix = ".template.json"
     deployment_template_schema_version = "4.0.0"
+    modules_placeholder_pattern = r'\${MODULES\.([^.}]+)(\.[^}]+)?}'
     moduledir_placeholder_pattern = r'\${MODULEDIR<(.+)>(\..+)?}'
     deployment_template_schema_url = "http://json.schemastore.org/azure-iot-edge-deployment-template-4.0"
     deployment_manifest_schema_url = "http://json.schemastore.org/azure-iot-edge-deployment-2.0"
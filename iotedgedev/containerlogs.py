@@ -0,0 +1,209 @@
+"""
+This module provides the collection of module container logs through the Docker SDK
+"""
+
+import calendar
+import collections
+import datetime
+import queue
+import re
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import docker
+
+# Size of the log data kept in memory per module before it is spooled to a temporary file
+LOG_SPOOL_SIZE = 8 * 1024 * 1024
+LOG_CHUNK_SIZE = 64 * 1024
+
+# Number of lines buffered per module while following logs, before the module's reader waits for the terminal
+LOG_QUEUE_SIZE = 1000
+# Number of lines printed per module in turn while following logs, so that a chatty module can't starve the others
+LOG_BATCH_SIZE = 20
+LOG_COLORS = ["cyan", "green", "magenta", "blue", "yellow", "white"]
+
+DURATION_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}
+DATE_FORMATS = ["%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M", "%Y-%m-%d"]
+
+
+def parse_since(since):
+    """Convert the --since option of the log commands to the UNIX timestamp the Docker SDK expects.
+    Dates without the Z suffix of UTC are local times, as in the Docker CLI.
+    Sample: '10m' -> timestamp of 10 minutes ago, '2021-06-01T12:00:00' -> timestamp, '1622548800' -> 1622548800"""
+    if not since:
+        return None
+
+    match_result = re.match(r"^(\d+)([smhd])$", since)
+    if match_result is not None:
+        delta = datetime.timedelta(**{DURATION_UNITS[match_result.group(2)]: int(match_result.group(1))})
+        return int(time.time() - delta.total_seconds())
+    if since.isdigit():
+        return int(since)
+
+    is_utc = since.endswith("Z")
+    for date_format in DATE_FORMATS:
+        try:
+            date = datetime.datetime.strptime(since[:-1] if is_utc else since, date_format)
+        except ValueError:
+            continue
+        return calendar.timegm(date.timetuple()) if is_utc else int(time.mktime(date.timetuple()))
+
+    raise ValueError("Invalid --since value: {0}. Expected a duration such as '10m', '2h' or '1d', a timestamp or a date".format(since))
+
+
+def parse_tail(tail):
+    if tail is None or tail == "all":
+        return "all"
+    if isinstance(tail, int) or tail.isdigit():
+        return int(tail)
+    raise ValueError("Invalid --tail value: {0}. Expected a number of lines or 'all'".format(tail))
+
+
+def split_timestamp(line):
+    """Split a log line of Docker with timestamps into a short timestamp and the message.
+    Sample: '2021-06-01T12:00:00.123456789Z Started' -> ('12:00:00.123', 'Started')"""
+    match_result = re.match(r"^\d{4}-\d{2}-\d{2}T(\d{2}:\d{2}:\d{2})(\.\d{1,3})?\d*\S* ?(.*)$", line, re.DOTALL)
+    if match_result is None:
+        return "", line
+    return match_result.group(1) + (match_result.group(2) or ".000").ljust(4, "0"), match_result.group(3)
+
+
+class ContainerLogs:
+    def __init__(self, docker_client, output):
+        self.docker_client = docker_client
+        self.output = output
+
+    def follow(self, modules, since=None, tail=None, pattern=None, rate_interval=30.0):
+        """Stream the logs of the module containers to one terminal until they all stop or the user interrupts.
+        Each module is read by its own thread into a bounded queue, and the queues are printed in turn.
+        Only the lines matching the regular expression pattern are printed.
+        Every rate_interval seconds, the number of lines per second of each module is printed."""
+        since = parse_since(since)
+        tail = parse_tail(tail)
+        regex = re.compile(pattern) if pattern else None
+        stop = threading.Event()
+        ready = threading.Event()
+        # map module name to the queue of its (timestamp, line) tuples, with None once its log ended
+        queues = collections.OrderedDict((module, queue.Queue(LOG_QUEUE_SIZE)) for module in modules)
+        # map module name to [number of lines since the last rate, total number of lines]
+        counters = dict((module, [0, 0]) for module in modules)
+        name_width = max([len(module) for module in modules] + [0])
+
+        def read_module(module):
+            module_queue = queues[module]
+            try:
+                container = self.docker_client.containers.get(module)
+                pending = b""
+                for chunk in container.logs(stream=True, follow=True, timestamps=True, since=since, tail=tail):
+                    lines = (pending + chunk).split(b"\n")
+                    pending = lines.pop()
+                    for line in lines:
+                        if not self._put(module_queue, line, stop, ready):
+                            return
+                    if stop.is_set():
+                        return
+                if pending:
+                    self._put(module_queue, pending, stop, ready)
+            except Exception as ex:
+                self.output.error("Error while trying to follow module log '{0}'".format(module))
+                self.output.error(str(ex))
+            finally:
+                self._put(module_queue, None, stop, ready)
+
+        for module in modules:
+            threading.Thread(target=read_module, args=(module,), name="log-" + module, daemon=True).start()
+
+        colors = dict((module, LOG_COLORS[index % len(LOG_COLORS)]) for index, module in enumerate(modules))
+        last_rate = time.time()
+        try:
+            while queues:
+                ready.clear()
+                printed = False
+                for module, module_queue in list(queues.items()):
+                    for _ in range(LOG_BATCH_SIZE):
+                        try:
+                            line = module_queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        printed = True
+                        if line is None:
+                            self.output.info("{0} log ended".format(module))
+                            del queues[module]
+                            break
+                        timestamp, message = split_timestamp(line.decode("utf-8", errors="replace").rstrip("\r"))
+                        if regex is not None and not regex.search(message):
+                            continue
+                        counters[module][0] += 1
+                        counters[module][1] += 1
+                        self.output.echo("{0} {1} {2}".format(module.ljust(name_width), timestamp, message).rstrip(), color=colors[module])
+
+                now = time.time()
+                if rate_interval and now - last_rate >= rate_interval:
+                    self.output.procout(self._format_rates(counters, now - last_rate))
+                    for counter in counters.values():
+                        counter[0] = 0
+                    last_rate = now
+
+                if not printed:
+                    ready.wait(1.0)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stop.set()
+
+        self.output.info("Lines per module: " + ", ".join("{0} {1}".format(module, counter[1]) for module, counter in counters.items()))
+        return dict((module, counter[1]) for module, counter in counters.items())
+
+    def save(self, modules, zip_path, since=None, tail=None, jobs=4):
+        """Stream the logs of the module containers into one zip entry per module.
+        Logs are fetched concurrently and spooled with bounded memory, then deflated once into the archive.
+        Return the modules whose logs were saved."""
+        since = parse_since(since)
+        tail = parse_tail(tail)
+        zip_lock = threading.Lock()
+        saved = []
+
+        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zip_file:
+            def save_module(module):
+                with tempfile.SpooledTemporaryFile(max_size=LOG_SPOOL_SIZE) as spool:
+                    try:
+                        container = self.docker_client.containers.get(module)
+                        for chunk in container.logs(stream=True, follow=False, since=since, tail=tail):
+                            spool.write(chunk)
+                    except docker.errors.APIError as ex:
+                        self.output.error("Error while trying to save module log file '{0}'".format(module))
+                        self.output.error(str(ex))
+                        return
+
+                    spool.seek(0)
+                    # Entries of a zip file can only be written one at a time
+                    with zip_lock:
+                        self.output.info("Adding {0}.log to zip".format(module))
+                        with zip_file.open(module + ".log", "w") as entry:
+                            shutil.copyfileobj(spool, entry, LOG_CHUNK_SIZE)
+                        saved.append(module)
+
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                list(executor.map(save_module, modules))
+
+        return saved
+
+    @staticmethod
+    def _put(module_queue, line, stop, ready):
+        """Queue a line, waiting while the queue is full. Return False if following was stopped."""
+        while not stop.is_set():
+            try:
+                module_queue.put(line, timeout=0.5)
+                ready.set()
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @staticmethod
+    def _format_rates(counters, duration):
+        return "Lines/s: " + ", ".join("{0} {1:.1f}".format(module, counter[0] / duration) for module, counter in counters.items())
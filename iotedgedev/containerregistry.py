@@ -1,5 +1,7 @@
 class ContainerRegistry:
-    def __init__(self, server, username, password):
+    def __init__(self, server, username, password, max_pushes=""):
         self.server = server
         self.username = username
         self.password = password
+        # maximum number of images pushed to the registry at the same time, unlimited when empty
+        self.max_pushes = max_pushes
@@ -0,0 +1,65 @@
+"""
+This module provides the compiler of module createOptions into the createOptionsNN twin properties,
+which minifies, chunks and validates them in one linear pass
+"""
+
+import json
+
+TWIN_VALUE_MAX_SIZE = 512
+TWIN_VALUE_MAX_CHUNKS = 8
+
+
+def get_chunk_name(index):
+    """Sample: 0 -> 'createOptions', 2 -> 'createOptions02'"""
+    return "createOptions" if index == 0 else "createOptions{0:0=2d}".format(index)
+
+
+def compile_create_options(module_name, create_options):
+    """Minify createOptions written as an object, and split them into chunks of at most TWIN_VALUE_MAX_SIZE characters.
+    Return the list of chunks, and whether the createOptions are known to be a valid JSON object."""
+    if isinstance(create_options, str):
+        valid = None
+    else:
+        # Stringify and minify the createOptions from dict format
+        create_options = json.dumps(create_options, separators=(',', ':'))
+        valid = create_options.startswith("{")
+
+    chunks = [create_options[i:i + TWIN_VALUE_MAX_SIZE] for i in range(0, len(create_options), TWIN_VALUE_MAX_SIZE)]
+    if len(chunks) > TWIN_VALUE_MAX_CHUNKS:
+        raise ValueError("Size of createOptions of {0} is too big. The maximum size of createOptions is 4K".format(module_name))
+
+    return chunks, valid
+
+
+def get_create_options_chunks(settings):
+    """Get the createOptions chunks of module settings, from createOptions up to the first missing createOptionsNN"""
+    chunks = []
+    for index in range(TWIN_VALUE_MAX_CHUNKS):
+        chunk_name = get_chunk_name(index)
+        if chunk_name not in settings:
+            break
+        chunks.append((chunk_name, str(settings[chunk_name])))
+    return chunks
+
+
+def validate_create_options(module_name, settings, known_valid=False):
+    """Check the length of every createOptions chunk of module settings, and that they form a JSON object.
+    Return the list of validation warnings. The JSON is not parsed again when known_valid is set."""
+    warnings = []
+    chunks = get_create_options_chunks(settings)
+    for chunk_name, chunk in chunks:
+        if len(chunk) > TWIN_VALUE_MAX_SIZE:
+            warnings.append("Length of {0} in module {1} exceeds {2}".format(chunk_name, module_name, TWIN_VALUE_MAX_SIZE))
+
+    if known_valid:
+        return warnings
+
+    create_options = "".join(chunk for _, chunk in chunks).strip()
+    if not create_options.startswith('{'):
+        warnings.append("createOptions of module {0} should be an object".format(module_name))
+    else:
+        try:
+            json.loads(create_options)
+        except ValueError as err:
+            warnings.append("createOptions of module {0} is not a valid JSON string. Error: {1}".format(module_name, err))
+    return warnings
@@ -3,6 +3,7 @@ This module provides interfaces to manipulate IoT Edge deployment manifest (depl
 and deployment manifest template (deployment.template.json)
 """
 
+import copy
 import json
 import os
 import re
@@ -10,14 +11,11 @@ import shutil
 import functools
 
 import jsonschema
-from urllib.request import urlopen
 
 from .utility import Utility
 from .constants import Constants
-
-
-TWIN_VALUE_MAX_SIZE = 512
-TWIN_VALUE_MAX_CHUNKS = 8
+from .createoptions import compile_create_options, get_chunk_name, validate_create_options
+from .schemacache import SchemaCache
 
 
 class DeploymentManifest:
@@ -43,6 +41,23 @@ class DeploymentManifest:
             else:
                 raise FileNotFoundError('Deployment manifest file "{0}" not found'.format(path))
 
+    @property
+    def json(self):
+        return self._json
+
+    @json.setter
+    def json(self, value):
+        self._json = value
+        self._module_content_split = None
+        # names of the modules whose createOptions were compiled from objects, which need no JSON validation
+        self._valid_create_options = set()
+
+    def copy(self):
+        """Get a copy of the deployment manifest, which can be modified without affecting this one"""
+        deployment_manifest = copy.copy(self)
+        deployment_manifest.json = copy.deepcopy(self.json)
+        return deployment_manifest
+
     def add_module_template(self, module_name, create_options={}, is_debug=False):
         """Add a module template to the deployment manifest"""
         new_module = {
@@ -60,6 +75,7 @@ class DeploymentManifest:
             self.utility.nested_set(self._get_module_content(), ["$edgeAgent", "properties.desired", "modules", module_name], new_module)
         except KeyError as err:
             raise KeyError("Missing key {0} in file {1}".format(err, self.path))
+        self._module_content_split = None
 
         self.add_default_route(module_name)
 
@@ -72,6 +88,7 @@ class DeploymentManifest:
             self.utility.nested_set(self._get_module_content(), ["$edgeHub", "properties.desired", "routes", new_route_name], new_route)
         except KeyError as err:
             raise KeyError("Missing key {0} in file {1}".format(err, self.path))
+        self._module_content_split = None
 
     def get_user_modules(self) -> dict:
         """Get user modules from deployment manifest"""
@@ -119,20 +136,11 @@ class DeploymentManifest:
         modules = self.get_all_modules()
         for module_name, module_info in modules.items():
             if "settings" in module_info and "createOptions" in module_info["settings"]:
-                create_options = module_info["settings"]["createOptions"]
-                if not isinstance(create_options, str):
-                    # Stringify and minify the createOptions from dict format
-                    create_options = json.dumps(create_options, separators=(',', ':'))
-
-                options = [m for m in re.finditer("(.|[\r\n]){{1,{0}}}".format(TWIN_VALUE_MAX_SIZE), create_options)]
-                if len(options) > TWIN_VALUE_MAX_CHUNKS:
-                    raise ValueError("Size of createOptions of {0} is too big. The maximum size of createOptions is 4K".format(module_name))
-
-                for i, option in enumerate(options):
-                    if i == 0:
-                        module_info["settings"]["createOptions"] = option.group()
-                    else:
-                        module_info["settings"]["createOptions{0:0=2d}".format(i)] = option.group()
+                chunks, valid = compile_create_options(module_name, module_info["settings"]["createOptions"])
+                for i, chunk in enumerate(chunks):
+                    module_info["settings"][get_chunk_name(i)] = chunk
+                if valid:
+                    self._valid_create_options.add(module_name)
 
     def expand_image_placeholders(self, replacements):
         modules = self.get_all_modules()
@@ -142,6 +150,7 @@ class DeploymentManifest:
 
     def del_key(self, keys):
         self.utility.del_key(self.json, keys)
+        self._module_content_split = None
 
     def dump(self, path=None):
         """Dump the JSON to the disk"""
@@ -152,14 +161,7 @@ class DeploymentManifest:
             json.dump(self.json, deployment_manifest, indent=2)
 
     def validate_deployment_template(self):
-        validation_success = True
-        try:
-            template_schema = json.loads(urlopen(Constants.deployment_template_schema_url).read().decode("utf-8"))
-            validation_success = self._validate_json_schema(template_schema, self.json, "Deployment template")
-        except Exception as ex:  # Ignore other non shcema validation errors
-            self.output.info("Unexpected error during deployment template schema validation, skip schema validation. Error:%s" % ex)
-
-        return validation_success
+        return self._validate_json_schema(Constants.deployment_template_schema_url, self.json, "Deployment template")
 
     def validate_deployment_manifest(self):
         validation_success = True
@@ -167,6 +169,7 @@ class DeploymentManifest:
             if not self.is_layered_deployment_schema():
                 validation_success = self._validate_deployment_manifest_schema()
             validation_success &= self._validate_create_options()
+            validation_success &= self._validate_placeholders()
         except Exception as err:
             self.output.info("Unexpected error during deployment manifest validation, skip the validation. Error:%s" % err)
 
@@ -180,7 +183,12 @@ class DeploymentManifest:
         return "${{MODULES.{0}}}".format(module_name + ".debug" if is_debug else module_name)
 
     def _get_module_content_split(self):
-        return DeploymentManifest.dot_to_json(self._get_module_content())
+        """Get modulesContent with the dotted keys such as "properties.desired" split into nested objects.
+        The split view is built once and shares the values of the dotted keys with the JSON, so that changes
+        to the modules through it are changes to the JSON. The methods which add or remove keys rebuild it."""
+        if self._module_content_split is None:
+            self._module_content_split = DeploymentManifest.dot_to_json(self._get_module_content())
+        return self._module_content_split
 
     def _get_module_content(self):
         if "modulesContent" in self.json:
@@ -205,13 +213,13 @@ class DeploymentManifest:
         return output
 
     # Carefully check upper/lower case of the output when using this function
-    def _validate_json_schema(self, schema_object, json_object, schema_type):
+    def _validate_json_schema(self, schema_url, json_object, schema_type):
         validation_success = True
         try:
             self.output.info("Validating schema of %s." % schema_type.lower())
-            validator_class = jsonschema.validators.validator_for(schema_object)
-            validator = validator_class(schema_object)
-            validation_errors = validator.iter_errors(self.json)
+            # The schemas are cached on disk and their validators are compiled once per run
+            validator = SchemaCache.get().get_validator(schema_url, self.output)
+            validation_errors = validator.iter_errors(json_object)
             for error in validation_errors:
                 validation_success = False
                 self.output.warning("%s schema error: %s. Property path:%s" % (schema_type, error.message, "->".join(error.path)))
@@ -228,14 +236,15 @@ class DeploymentManifest:
         return validation_success
 
     def _validate_deployment_manifest_schema(self):
-        validation_success = True
-        try:
-            deployment_schema = json.loads(urlopen(Constants.deployment_manifest_schema_url).read())
-            validation_success = self._validate_json_schema(deployment_schema, self.json, "Deployment manifest")
-        except Exception as ex:  # Ignore other non schema validation errors
-            self.output.info("Unexpected error during deployment manifest schema validation, skip schema validation. Error:%s" % ex)
+        return self._validate_json_schema(Constants.deployment_manifest_schema_url, self.json, "Deployment manifest")
 
-        return validation_success
+    def _validate_placeholders(self):
+        """Check that no image placeholder or environment variable reference such as ${...} is left after expansion"""
+        placeholders = sorted(set(re.findall(r"\$\{[^}]*\}", json.dumps(self.json))))
+        if not placeholders:
+            return True
+        self.output.warning("Deployment manifest contains unresolved placeholders: {0}".format(", ".join(placeholders)))
+        return False
 
     # Call _validate_deployment_manifest_schema first. This function assumes createOptions are strings.
     def _validate_create_options(self):
@@ -263,51 +272,7 @@ class DeploymentManifest:
         return validation_success
 
     def _validate_create_options_for_module(self, module_name, module_info):
-        validation_success = True
-        validation_success &= self._validate_create_options_lengh(module_name, module_info)
-        validation_success &= self._validate_create_options_format(module_name, module_info)
-        return validation_success
-
-    def _validate_create_options_lengh(self, module_name, module_info):
-        validation_success = True
-        create_options_value = module_info["settings"]["createOptions"]
-        if len(str(create_options_value)) > TWIN_VALUE_MAX_SIZE:
-            validation_success = False
-            self.output.warning("Length of createOptions in module %s exceeds %d" % (module_name, TWIN_VALUE_MAX_SIZE))
-        # Merge additional create options
-        for i in range(1, TWIN_VALUE_MAX_CHUNKS):
-            property_name = "createOptions0%d" % i
-            if property_name in module_info["settings"]:
-                create_options_value = module_info["settings"][property_name]
-                if len(str(create_options_value)) > TWIN_VALUE_MAX_SIZE:
-                    validation_success = False
-                    self.output.warning("Length of %s in module %s exceeds %d" % (property_name, module_name, TWIN_VALUE_MAX_SIZE))
-            else:
-                break
-        return validation_success
-
-    def _validate_create_options_format(self, module_name, module_info):
-        validation_success = True
-        create_options_string = self._merge_create_options(module_name, module_info)
-        if not create_options_string.startswith('{'):
-            validation_success = False
-            self.output.warning("createOptions of module %s should be an object" % module_name)
-        else:
-            try:
-                json.loads(create_options_string)
-            except ValueError as err:
-                validation_success = False
-                self.output.warning("createOptions of module %s is not a valid JSON string. Error: %s" % (module_name, err))
-        return validation_success
-
-    def _merge_create_options(self, module_name, module_info):
-        create_options = []
-        create_options.append(str(module_info["settings"]["createOptions"]))
-        # Merge additional create options
-        for i in range(1, TWIN_VALUE_MAX_CHUNKS):
-            property_name = "createOptions0%d" % i
-            if property_name in module_info["settings"]:
-                create_options.append(str(module_info["settings"][property_name]))
-            else:
-                break
-        return "".join(create_options).strip()
+        warnings = validate_create_options(module_name, module_info["settings"], known_valid=module_name in self._valid_create_options)
+        for warning in warnings:
+            self.output.warning(warning)
+        return not warnings
@@ -1,39 +1,74 @@
+import datetime
 import os
-import zipfile
+import re
+from concurrent.futures import ThreadPoolExecutor
 
 import docker
 
+from .buildcache import BuildCache
+from .buildscheduler import BuildScheduler
+from .constants import Constants
+from .containerlogs import ContainerLogs
 from .deploymentmanifest import DeploymentManifest
+from .dockersession import DockerSession
+from .module import Module
+from .progress import ProgressRenderer, format_size
+from .pushexecutor import PushExecutor
+from .registryclient import RegistryClient, parse_image_name
 from .utility import Utility
 
 
 class Docker:
 
-    def __init__(self, envvars, utility, output):
+    def __init__(self, envvars, utility, output, base_url=None, tls=None, context=None):
         self.envvars = envvars
         self.utility = utility
         self.output = output
 
         try:
-            self.docker_client = docker.from_env(version="auto")
-            self.docker_api = self.docker_client.api
+            # The connection and the daemon info are shared by all the Docker objects of the run
+            self.session = DockerSession.get(base_url, tls, context)
+            self.docker_client = self.session.client
+            self.docker_api = self.session.api
         except Exception as ex:
             msg = "Could not connect to Docker daemon. Please make sure Docker daemon is running and accessible"
             raise ValueError(msg, ex)
 
     def get_os_type(self):
-        return self.docker_client.info()["OSType"].lower()
+        return self.session.os_type
 
-    def init_registry(self):
+    def get_repo_digests(self, image_name):
+        """Get the manifest digests the local image is known by in the registry of its repository.
+        Docker only records these digests once the image was pushed to or pulled from the registry."""
+        repository = image_name.rsplit(":", 1)[0] if ":" in image_name.rsplit("/", 1)[-1] else image_name
+        try:
+            repo_digests = self.docker_client.images.get(image_name).attrs.get("RepoDigests") or []
+        except docker.errors.ImageNotFound:
+            return set()
+
+        return set(repo_digest.split("@", 1)[1] for repo_digest in repo_digests
+                   if "@" in repo_digest and repo_digest.split("@", 1)[0].lower() == repository.lower())
 
+    def init_registry(self, servers=None):
+        """Initialize the container registries of the servers, or every registry in CONTAINER_REGISTRY_MAP.
+        A registry is only initialized once per run."""
+        initialized = False
         for registry in self.envvars.CONTAINER_REGISTRY_MAP.values():
+            server = registry.server.lower()
+            if (servers is not None and server not in servers) or server in self.session.registries:
+                continue
+
             self.output.header("INITIALIZING CONTAINER REGISTRY")
             self.output.info("REGISTRY: " + registry.server)
 
             if "localhost" in registry.server:
                 self.init_local_registry(registry.server)
 
-        self.output.line()
+            self.session.registries.add(server)
+            initialized = True
+
+        if initialized:
+            self.output.line()
 
     def init_local_registry(self, local_server):
 
@@ -71,124 +106,313 @@ class Docker:
         image_names = ["azureiotedge-agent", "azureiotedge-hub", "azureiotedge-simulated-temperature-sensor"]
         default_cr = self.envvars.CONTAINER_REGISTRY_MAP['']
 
+        # map container registry image name to Microsoft Container Registry image name
+        microsoft_image_names = {}
         for image_name in image_names:
+            container_registry_image_name = "{0}/{1}:{2}".format(default_cr.server, image_name, self.envvars.EDGE_RUNTIME_VERSION)
+            microsoft_image_names[container_registry_image_name] = "mcr.microsoft.com/{0}:{1}".format(image_name, self.envvars.EDGE_RUNTIME_VERSION)
 
-            microsoft_image_name = "mcr.microsoft.com/{0}:{1}".format(
-                image_name, self.envvars.EDGE_RUNTIME_VERSION)
+        # map registry server to RegistryClient, shared by the images
+        registry_clients = {}
 
-            container_registry_image_name = "{0}/{1}:{2}".format(
-                default_cr.server, image_name, self.envvars.EDGE_RUNTIME_VERSION)
+        def pull_and_tag(container_registry_image_name, output):
+            microsoft_image_name = microsoft_image_names[container_registry_image_name]
 
-            # Pull image from MCR
-            try:
-                self.output.info(
-                    "PULLING IMAGE: '{0}'".format(microsoft_image_name))
-                image_pull = self.docker_client.images.pull(
-                    microsoft_image_name)
-                self.output.info(
-                    "SUCCESSFULLY PULLED IMAGE: '{0}'".format(microsoft_image_name))
-                self.output.info(str(image_pull))
-            except docker.errors.APIError as e:
-                self.output.error(
-                    "ERROR WHILE PULLING IMAGE: '{0}'".format(microsoft_image_name))
-                self.output.error(str(e))
+            # Pull image from MCR, unless the local image already has the digest of the image in MCR
+            if self.is_in_registry(microsoft_image_name, registry_clients, None, output):
+                output.info("IMAGE UP TO DATE: '{0}'".format(microsoft_image_name))
+            else:
+                output.info("PULLING IMAGE: '{0}'".format(microsoft_image_name))
+                try:
+                    image_pull = self.docker_client.images.pull(microsoft_image_name)
+                except docker.errors.APIError as e:
+                    raise ValueError("ERROR WHILE PULLING IMAGE: '{0}'. {1}".format(microsoft_image_name, str(e)))
+                output.info("SUCCESSFULLY PULLED IMAGE: '{0}'".format(microsoft_image_name))
+                output.info(str(image_pull))
 
             # Tagging Image with Container Registry Name
             try:
-                self.docker_api.tag(
-                    image=microsoft_image_name, repository=container_registry_image_name)
+                self.docker_api.tag(image=microsoft_image_name, repository=container_registry_image_name)
             except docker.errors.APIError as e:
-                self.output.error(
-                    "ERROR WHILE TAGGING IMAGE: '{0}'".format(microsoft_image_name))
-                self.output.error(str(e))
+                raise ValueError("ERROR WHILE TAGGING IMAGE: '{0}'. {1}".format(microsoft_image_name, str(e)))
+
+        push_executor = PushExecutor(self, [default_cr])
+
+        def push(container_registry_image_name, output):
+            # The tag only keeps the digest of a previous push when it still points to the same image,
+            # so a newer image pulled from MCR is pushed again
+            if self.is_in_registry(container_registry_image_name, registry_clients, default_cr, output):
+                output.info("IMAGE ALREADY IN CONTAINER REGISTRY: '{0}'".format(container_registry_image_name))
+                return
 
             # Push Image to Container Registry
+            output.info("PUSHING IMAGE: '{0}'".format(container_registry_image_name))
             try:
-                self.output.info("PUSHING IMAGE: '{0}'".format(
-                    container_registry_image_name))
-
-                response = self.docker_client.images.push(repository=container_registry_image_name, tag=self.envvars.EDGE_RUNTIME_VERSION, stream=True, auth_config={
-                                                          "username": default_cr.username, "password": default_cr.password})
-                self.process_api_response(response)
-                self.output.info("SUCCESSFULLY PUSHED IMAGE: '{0}'".format(
-                    container_registry_image_name))
+                push_executor.push(container_registry_image_name, output)
             except docker.errors.APIError as e:
-                self.output.error("ERROR WHILE PUSHING IMAGE: '{0}'".format(
-                    container_registry_image_name))
-                self.output.error(str(e))
+                raise ValueError("ERROR WHILE PUSHING IMAGE: '{0}'. {1}".format(container_registry_image_name, str(e)))
+            output.info("SUCCESSFULLY PUSHED IMAGE: '{0}'".format(container_registry_image_name))
+
+        # The images are independent, so a failure doesn't stop the others
+        scheduler = BuildScheduler(self.output, jobs=len(image_names), keep_going=True)
+        results = scheduler.run(list(microsoft_image_names), pull_and_tag, push)
+        for result in results:
+            result.pushed_bytes = push_executor.pushed_bytes.get(result.tag, 0)
+        scheduler.print_summary(results, "PUSH SUMMARY", push_executor.get_summary() if push_executor.pushed_bytes else None)
 
         self.setup_registry_in_config(image_names)
 
         self.output.footer("Container Registry Setup Complete")
 
+    def is_in_registry(self, image_name, registry_clients, registry=None, output=None):
+        """Check whether the registry holds the same manifest digest for the image as the local image.
+        registry_clients maps registry server to the RegistryClient reused for it, and registry provides the credentials."""
+        if output is None:
+            output = self.output
+
+        local_digests = self.get_repo_digests(image_name)
+        if not local_digests:
+            return False
+
+        server, repository, tag = parse_image_name(image_name)
+        try:
+            if server not in registry_clients:
+                registry_clients[server] = RegistryClient(server, registry.username, registry.password) if registry else RegistryClient(server)
+            return registry_clients[server].get_manifest_digest(repository, tag) in local_digests
+        except Exception as ex:
+            output.info("Could not get the digest of {0} from the registry. Error: {1}".format(image_name, ex))
+            return False
+
     def setup_registry_in_config(self, image_names):
         self.output.info(
             "Replacing 'mcr.microsoft.com/' with '{CONTAINER_REGISTRY_SERVER}/' in config files.")
 
-        # Replace mcr.microsoft.com/ with ${CONTAINER_REGISTRY_SERVER}
+        # Replace mcr.microsoft.com/ with ${CONTAINER_REGISTRY_SERVER} for all the images in one pass,
+        # and only rewrite the config files which change
+        image_pattern = re.compile(r"mcr\.microsoft\.com/(?=(?:{0}))".format("|".join(re.escape(image_name) for image_name in image_names)))
         for config_file in self.utility.get_config_files():
             config_file_contents = Utility.get_file_contents(config_file)
-            for image_name in image_names:
-                config_file_contents = config_file_contents.replace(
-                    "mcr.microsoft.com/" + image_name, "${CONTAINER_REGISTRY_SERVER}/" + image_name)
+            new_config_file_contents = image_pattern.sub("${CONTAINER_REGISTRY_SERVER}/", config_file_contents)
+            if new_config_file_contents == config_file_contents:
+                continue
 
             with open(config_file, "w") as config_file_build:
-                config_file_build.write(config_file_contents)
+                config_file_build.write(new_config_file_contents)
 
-    def remove_modules(self):
+    def remove_modules(self, dry_run=False, jobs=4):
         self.output.info(
             "Removing Edge Modules Containers and Images from Docker")
 
         deployment_manifest = DeploymentManifest(self.envvars, self.output, self.utility, self.envvars.DEPLOYMENT_CONFIG_FILE_PATH, False)
-        modules_in_config = list(deployment_manifest.get_user_modules().keys())
-
-        for module in modules_in_config:
+        user_modules = deployment_manifest.get_user_modules()
+
+        # List the containers and images once, and index the images by tag and by repository name
+        # sample: ('localhost:5000/filtermodule:0.0.1-amd64', [<Image>]), ('filtermodule', [<Image>])
+        containers = self.docker_client.containers.list()
+        image_index = {}
+        for image in self.docker_client.images.list():
+            for repo_tag in image.tags:
+                repository_name = repo_tag.rsplit(":", 1)[0].rsplit("/", 1)[-1]
+                for key in set([repo_tag.lower(), repository_name.lower()]):
+                    image_index.setdefault(key, []).append(image)
+
+        containers_to_remove = []
+        # map image ID to Image object, as several modules can share an image
+        images_to_remove = {}
+        for module, module_info in user_modules.items():
             self.output.info("Searching for {0} Containers".format(module))
-            containers = self.docker_client.containers.list(
-                filters={"name": module})
-            for container in containers:
-                self.output.info("Removing Container: " + str(container))
-                container.remove(force=True)
+            containers_to_remove.extend(container for container in containers if container.name == module)
 
             self.output.info("Searching for {0} Images".format(module))
-            for image in self.docker_client.images.list():
-                if module in str(image):
-                    self.output.info(
-                        "Removing Module Image: " + str(image))
-                    self.docker_client.images.remove(
-                        image=image.id, force=True)
-
-    def remove_containers(self):
+            image_name = module_info.get("settings", {}).get("image", "")
+            for key in [module.lower(), image_name.lower()]:
+                for image in image_index.get(key, []):
+                    images_to_remove[image.id] = image
+
+        self._remove_objects(containers_to_remove, lambda container: container.remove(force=True),
+                             lambda container: "Removing Container: " + str(container), dry_run, jobs)
+        self._remove_image_list(list(images_to_remove.values()), lambda image: "Removing Module Image: " + str(image), dry_run, jobs)
+
+    def remove_containers(self, dry_run=False, jobs=4):
         self.output.info("Removing Containers....")
         containers = self.docker_client.containers.list(all=True)
         self.output.info("Found {0} Containers".format(len(containers)))
-        for container in containers:
-            self.output.info("Removing Container: {0}:{1}".format(
-                container.id, container.name))
-            container.remove(force=True)
+        self._remove_objects(containers, lambda container: container.remove(force=True),
+                             lambda container: "Removing Container: {0}:{1}".format(container.id, container.name), dry_run, jobs)
         self.output.info("Containers Removed")
 
-    def remove_images(self):
+    def remove_images(self, dry_run=False, jobs=4):
         self.output.info("Removing Dangling Images....")
         images = self.docker_client.images.list(
             all=True, filters={"dangling": True})
         self.output.info("Found {0} Images".format(len(images)))
-
-        for image in images:
-            self.output.info("Removing Image: {0}".format(str(image.id)))
-            self.docker_client.images.remove(image=image.id, force=True)
+        removed = self._remove_image_list(images, lambda image: "Removing Image: {0}".format(str(image.id)), dry_run, jobs)
         self.output.info("Images Removed")
 
         self.output.info("Removing Images....")
-        images = self.docker_client.images.list()
+        removed_ids = set(image.id for image in removed)
+        images = [image for image in self.docker_client.images.list() if image.id not in removed_ids]
         self.output.info("Found {0} Images".format(len(images)))
-
-        for image in images:
-            self.output.info("Removing Image: {0}".format(str(image.id)))
-            self.docker_client.images.remove(image=image.id, force=True)
+        self._remove_image_list(images, lambda image: "Removing Image: {0}".format(str(image.id)), dry_run, jobs)
         self.output.info("Images Removed")
 
-    def handle_logs_cmd(self, show, save):
+    def prune_modules(self, keep=None, max_size=None, dry_run=False, jobs=4):
+        """Remove the local image tags of the solution modules, keeping the `keep` most recently used tags per module,
+        then evicting the least recently used tags until the module images fit in max_size bytes.
+        The images of the deployment manifests in CONFIG_OUTPUT_DIR are never removed."""
+        self.output.info("Pruning Edge Module Images")
+
+        repositories = self._get_module_repositories()
+        protected_tags = self._get_deployment_manifest_images()
+        build_cache = BuildCache(os.path.join(os.path.dirname(os.path.abspath(self.envvars.DEPLOYMENT_CONFIG_TEMPLATE_FILE)), Constants.default_cache_folder))
+
+        # map image tag to Image object, for the tags of the module repositories
+        module_tags = {}
+        images = {}
+        for image in self.docker_client.images.list():
+            for repo_tag in image.tags:
+                if repo_tag.rsplit(":", 1)[0].lower() in repositories:
+                    module_tags[repo_tag] = image
+                    images[image.id] = image
+        self.output.info("Found {0} tags of {1} module images".format(len(module_tags), len(images)))
+
+        def get_last_used(tag):
+            return max(build_cache.get_last_used(tag) or 0, Docker._get_created_time(module_tags[tag]))
+
+        # Most recently used first
+        tags = sorted(module_tags, key=get_last_used, reverse=True)
+        tags_to_remove = []
+        if keep is not None:
+            kept_per_repository = {}
+            for tag in tags:
+                repository = tag.rsplit(":", 1)[0].lower()
+                kept_per_repository[repository] = kept_per_repository.get(repository, 0) + 1
+                if kept_per_repository[repository] > keep and tag not in protected_tags:
+                    tags_to_remove.append(tag)
+
+        if max_size is not None:
+            # An image only frees disk space once all of its tags are removed
+            remaining_tags = dict((image_id, set(image.tags)) for image_id, image in images.items())
+            for tag in tags_to_remove:
+                remaining_tags[module_tags[tag].id].discard(tag)
+            total_size = sum(image.attrs.get("Size", 0) for image_id, image in images.items() if remaining_tags[image_id])
+
+            for tag in reversed(tags):
+                if total_size <= max_size:
+                    break
+                if tag in tags_to_remove or tag in protected_tags:
+                    continue
+                tags_to_remove.append(tag)
+                image = module_tags[tag]
+                remaining_tags[image.id].discard(tag)
+                if not remaining_tags[image.id]:
+                    total_size -= image.attrs.get("Size", 0)
+
+            if total_size > max_size:
+                self.output.warning("The module images still use up to {0} after pruning, as the others are in use by the deployment manifests".format(
+                    format_size(total_size)))
+
+        removed = self._remove_objects(tags_to_remove,
+                                       lambda tag: self.docker_client.images.remove(image=tag),
+                                       lambda tag: "Removing Image: {0}".format(tag), dry_run, jobs)
+
+        removed_tags = set(removed)
+        freed_images = [image for image in images.values() if image.tags and set(image.tags) <= removed_tags]
+        size = format_size(sum(image.attrs.get("Size", 0) for image in freed_images))
+        if dry_run:
+            self.output.info("Would reclaim up to {0} by removing {1} image tags".format(size, len(removed)))
+        else:
+            self.output.info("Reclaimed up to {0} by removing {1} image tags".format(size, len(removed)))
+        return removed
+
+    def _get_module_repositories(self):
+        """Get the lower case image repositories of the modules in MODULES_PATH"""
+        repositories = set()
+        modules_path = self.envvars.MODULES_PATH
+        if not os.path.isdir(modules_path):
+            return repositories
+
+        for folder_name in os.listdir(modules_path):
+            module_dir = os.path.join(modules_path, folder_name)
+            if os.path.exists(os.path.join(module_dir, "module.json")):
+                repository = Module(self.envvars, self.utility, module_dir).repository
+                if repository:
+                    repositories.add(repository.lower())
+        return repositories
+
+    def _get_deployment_manifest_images(self):
+        """Get the images of the modules of every deployment manifest in CONFIG_OUTPUT_DIR"""
+        if not os.path.exists(self.envvars.DEPLOYMENT_CONFIG_FILE_PATH):
+            raise ValueError("Deployment manifest {0} not found. Please run `iotedgedev genconfig` first, "
+                             "so that the images it refers to are kept".format(self.envvars.DEPLOYMENT_CONFIG_FILE_PATH))
+
+        images = set()
+        config_output_dir = os.path.dirname(self.envvars.DEPLOYMENT_CONFIG_FILE_PATH)
+        for file_name in os.listdir(config_output_dir):
+            if not file_name.endswith(".json"):
+                continue
+            try:
+                deployment_manifest = DeploymentManifest(self.envvars, self.output, self.utility, os.path.join(config_output_dir, file_name), False)
+                modules = deployment_manifest.get_all_modules()
+            except Exception:
+                # Not a deployment manifest
+                continue
+            images.update(module_info.get("settings", {}).get("image", "") for module_info in modules.values())
+        return images
+
+    @staticmethod
+    def _get_created_time(image):
+        """Get the creation time of the image as a UNIX timestamp"""
+        created = image.attrs.get("Created", "")
+        try:
+            # sample: 2021-06-01T12:00:00.123456789Z, whose fraction of second is too precise for datetime
+            return datetime.datetime.strptime(created[:19], "%Y-%m-%dT%H:%M:%S").replace(tzinfo=datetime.timezone.utc).timestamp()
+        except ValueError:
+            return 0
+
+    def _remove_image_list(self, images, describe, dry_run, jobs):
+        """Remove the images and print the disk space reclaimed. Layers shared with other images are only reclaimed with the last of them."""
+        def remove(image):
+            try:
+                self.docker_client.images.remove(image=image.id, force=True)
+            except docker.errors.ImageNotFound:
+                # Already removed along with another image
+                pass
+
+        removed = self._remove_objects(images, remove, describe, dry_run, jobs)
+        if removed:
+            size = format_size(sum(image.attrs.get("Size", 0) for image in removed))
+            if dry_run:
+                self.output.info("Would reclaim up to {0} by removing {1} images".format(size, len(removed)))
+            else:
+                self.output.info("Reclaimed up to {0} by removing {1} images".format(size, len(removed)))
+        return removed
+
+    def _remove_objects(self, objects, remove, describe, dry_run, jobs):
+        """Remove the containers or images with remove(obj) in a pool of `jobs` threads and return the removed objects.
+        With dry_run, only print what would be removed."""
+        def remove_object(obj):
+            self.output.info(("[DRY RUN] " if dry_run else "") + describe(obj))
+            if not dry_run:
+                remove(obj)
+            return obj
+
+        removed = []
+        errors = []
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(remove_object, obj) for obj in objects]
+            for future in futures:
+                try:
+                    removed.append(future.result())
+                except Exception as ex:
+                    self.output.error(str(ex))
+                    errors.append(ex)
+
+        if errors:
+            raise Exception("Failed to remove {0} of {1} Docker objects: {2}".format(len(errors), len(objects), str(errors[0])))
+        return removed
+
+    def handle_logs_cmd(self, show, save, since=None, tail=None, follow=False, pattern=None):
 
         # Create LOGS_PATH dir if it doesn't exist
         if save:
@@ -197,8 +421,8 @@ class Docker:
         deployment_manifest = DeploymentManifest(self.envvars, self.output, self.utility, self.envvars.DEPLOYMENT_CONFIG_FILE_PATH, False)
         modules_in_config = list(deployment_manifest.get_all_modules().keys())
 
-        for module in modules_in_config:
-            if show:
+        if show:
+            for module in modules_in_config:
                 try:
                     command = self.envvars.LOGS_CMD.format(module)
                     os.system(command)
@@ -206,50 +430,50 @@ class Docker:
                     self.output.error(
                         "Error while trying to open module log '{0}' with command '{1}'. Try `iotedgedev docker log --save` instead.".format(module, command))
                     self.output.error(str(ex))
-            if save:
-                try:
-                    self.utility.exe_proc(["docker", "logs", module, ">",
-                                           os.path.join(self.envvars.LOGS_PATH, module + ".log")], True)
-                except Exception as ex:
-                    self.output.error("Error while trying to save module log file '{0}'".format(module))
-                    self.output.error(str(ex))
 
         if save:
-            self.zip_logs()
+            self.save_logs(modules_in_config, since, tail)
 
-    def zip_logs(self):
-        log_files = [os.path.join(self.envvars.LOGS_PATH, f)
-                     for f in os.listdir(self.envvars.LOGS_PATH) if f.endswith(".log")]
+        if follow:
+            self.output.info("Following the logs of {0}. Press Ctrl+C to stop.".format(", ".join(modules_in_config)))
+            ContainerLogs(self.docker_client, self.output).follow(modules_in_config, since, tail, pattern)
+
+    def save_logs(self, modules, since=None, tail=None):
         zip_path = os.path.join(self.envvars.LOGS_PATH, 'edge-logs.zip')
 
         self.output.info("Creating {0} file".format(zip_path))
-
-        zipf = zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED)
-
-        for log_file in log_files:
-            self.output.info("Adding {0} to zip". format(log_file))
-            zipf.write(log_file)
-
-        zipf.close()
+        ContainerLogs(self.docker_client, self.output).save(modules, zip_path, since, tail)
 
         self.output.info("Log files successfully saved to: " + zip_path)
 
-    def process_api_response(self, response):
-        for json_ in docker.utils.json_stream.json_stream(response):
-            for key in json_:
-                if key == "stream" and isinstance(json_[key], str):
-                    self.output.procout(json_[key], nl=False)
-                if key == "status" and isinstance(json_[key], str):
-                    message = ""
-                    if ("id" in json_):
-                        message += json_["id"] + " "
-                    message += json_[key] + " "
-                    if ("progress" in json_):
-                        message += json_["progress"]
-                    self.output.procout(message)
-
-            # Docker SDK won't throw exceptions for some failures.
-            # We have to check the response ourselves.
-            # Related issue: https://github.com/docker/docker-py/issues/1772
-            if "error" in json_:
-                raise ValueError(json_["error"])
+    def process_api_response(self, response, output=None, on_step=None):
+        """Print the stream of a build or push response, and return the ProgressRenderer which rendered it.
+        on_step(name) is called when the classic builder starts a Dockerfile step, and with None when the stream ends."""
+        if output is None:
+            output = self.output
+
+        progress = ProgressRenderer(output, compact=self.envvars.DOCKER_PROGRESS != "plain")
+        try:
+            for json_ in docker.utils.json_stream.json_stream(response):
+                for key in json_:
+                    if key == "stream" and isinstance(json_[key], str):
+                        progress.stream(json_[key])
+                        if on_step is not None and re.match(r"Step \d+/\d+ : ", json_[key]):
+                            on_step(json_[key].strip())
+                    if key == "status" and isinstance(json_[key], str):
+                        progress.status(json_)
+
+                # Docker SDK won't throw exceptions for some failures.
+                # We have to check the response ourselves.
+                # Related issue: https://github.com/docker/docker-py/issues/1772
+                if "error" in json_:
+                    raise ValueError(json_["error"])
+        except Exception:
+            progress.print_tail()
+            raise
+        finally:
+            progress.close()
+            if on_step is not None:
+                on_step(None)
+
+        return progress
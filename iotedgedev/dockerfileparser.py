@@ -0,0 +1,70 @@
+import re
+
+# ${VAR}, ${VAR:-default}, ${VAR:+alternative} or $VAR
+variable_pattern = re.compile(r"\$(?:\{(\w+)(?::([-+])([^}]*))?\}|(\w+))")
+
+
+class DockerfileParser(object):
+    def __init__(self, dockerfile):
+        self.dockerfile = dockerfile
+
+    def get_instructions(self):
+        """Get the (instruction, arguments) pairs of the Dockerfile, with line continuations joined and comments removed"""
+        with open(self.dockerfile, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+
+        instructions = []
+        current = ""
+        for line in lines:
+            stripped = line.strip()
+            if not stripped or stripped.startswith("#"):
+                continue
+            if stripped.endswith("\\"):
+                current += stripped[:-1] + " "
+                continue
+            current += stripped
+            parts = current.split(None, 1)
+            instructions.append((parts[0].upper(), parts[1] if len(parts) > 1 else ""))
+            current = ""
+
+        return instructions
+
+    def get_base_images(self, build_args=None):
+        """Get the images the stages of the Dockerfile are built FROM, with the global ARGs expanded.
+        Stages built FROM a previous stage of the same Dockerfile are left out."""
+        build_args = build_args or {}
+        global_args = {}
+        stage_names = set()
+        base_images = []
+        from_found = False
+        for instruction, arguments in self.get_instructions():
+            # Only the ARGs declared before the first FROM can be used in FROM lines
+            if instruction == "ARG" and not from_found:
+                name, _, default = arguments.partition("=")
+                name = name.strip()
+                global_args[name] = build_args.get(name, default.strip().strip("\"'"))
+            elif instruction == "FROM":
+                from_found = True
+                parts = [part for part in arguments.split() if not part.startswith("--")]
+                if not parts:
+                    continue
+                image = DockerfileParser.expand_variables(parts[0], global_args)
+                if image.lower() not in stage_names and image not in base_images:
+                    base_images.append(image)
+                if len(parts) >= 3 and parts[1].upper() == "AS":
+                    stage_names.add(parts[2].lower())
+
+        return base_images
+
+    @staticmethod
+    def expand_variables(value, variables):
+        def replace(match):
+            name = match.group(1) or match.group(4)
+            val = variables.get(name, "")
+            if match.group(2) == "-":
+                return val or match.group(3)
+            if match.group(2) == "+":
+                return match.group(3) if val else ""
+            return val
+
+        return variable_pattern.sub(replace, value)
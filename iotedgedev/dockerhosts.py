@@ -0,0 +1,87 @@
+"""
+This module provides a pool of Docker daemons to distribute the builds of module images over,
+preferring the least loaded daemons which run the platform of the image natively
+"""
+
+import contextlib
+import threading
+
+import docker
+from docker.context import ContextAPI
+
+# map image platform architecture to the daemon architectures which build it natively
+NATIVE_ARCHITECTURES = {
+    "amd64": ["x86_64", "amd64"],
+    "arm32v7": ["armv7l", "armhf", "arm"],
+    "arm64v8": ["aarch64", "arm64"]
+}
+
+
+def resolve_docker_host(host):
+    """Get the daemon URL, the TLS configuration and the Docker context name of a DOCKER_HOST URL or of a Docker context name.
+    A URL only uses TLS when it is the DOCKER_HOST configured with DOCKER_TLS_VERIFY and DOCKER_CERT_PATH.
+    Sample: 'tcp://buildhost:2376' -> ('tcp://buildhost:2376', None, None), 'armhost' -> ('ssh://pi@armhost', None, 'armhost')"""
+    if "://" in host:
+        env_kwargs = docker.utils.kwargs_from_env()
+        return host, env_kwargs.get("tls") if env_kwargs.get("base_url") == host else None, None
+
+    context = ContextAPI.get_context(host)
+    if context is None:
+        raise ValueError("Docker host {0} is neither a URL such as tcp://buildhost:2376 nor the name of a Docker context".format(host))
+    return context.Host, context.TLSConfig or None, host
+
+
+def get_platform_architecture(platform):
+    """Sample: 'arm32v7.debug' -> 'arm32v7', 'windows-amd64' -> 'amd64'"""
+    return platform.split(".", 1)[0].split("-")[-1]
+
+
+class DockerHostPool:
+    def __init__(self, dockers):
+        """dockers is the list of Docker objects of the daemons, the first one being the default daemon"""
+        self.dockers = list(dockers)
+        # map index of the Docker object in dockers to the number of builds running on it
+        self.active = dict((index, 0) for index in range(len(self.dockers)))
+        self._lock = threading.Lock()
+
+    @property
+    def default(self):
+        return self.dockers[0]
+
+    @contextlib.contextmanager
+    def acquire(self, platform="", pinned=None):
+        """Choose the daemon to build an image of the platform on, and count the build in its load while the context is active.
+        pinned is the Docker object the image must be built on, such as the daemon holding its base image."""
+        with self._lock:
+            docker = pinned if pinned is not None else self.choose(platform)
+            index = self.dockers.index(docker)
+            self.active[index] += 1
+        try:
+            yield docker
+        finally:
+            with self._lock:
+                self.active[index] -= 1
+
+    def choose(self, platform):
+        """Get the least loaded daemon running the platform natively, or the least loaded daemon able to build it.
+        The load is the number of builds running on the daemon per CPU."""
+        candidates = list(range(len(self.dockers)))
+        os_type = "windows" if platform.startswith("windows") else "linux"
+        same_os = [index for index in candidates if self._get_os_type(index) == os_type]
+        candidates = same_os or candidates
+
+        architectures = NATIVE_ARCHITECTURES.get(get_platform_architecture(platform), [])
+        native = [index for index in candidates if self._get_architecture(index) in architectures]
+        candidates = native or candidates
+
+        # The first daemon wins ties, so that a single build goes to the default daemon
+        return self.dockers[min(candidates, key=lambda index: (self.active[index] + 1) / self._get_cpus(index))]
+
+    def _get_os_type(self, index):
+        return self.dockers[index].get_os_type()
+
+    def _get_architecture(self, index):
+        return self.dockers[index].session.architecture.lower()
+
+    def _get_cpus(self, index):
+        return max(self.dockers[index].session.info.get("NCPU", 1), 1)
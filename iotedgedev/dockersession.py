@@ -0,0 +1,102 @@
+"""
+This module provides Docker daemon connections shared across one CLI run,
+so that the API version negotiation and the daemon info requests are made once per daemon
+"""
+
+import os
+import threading
+
+import docker
+
+# Environment variables which select the daemon of the docker CLI
+DOCKER_CLI_ENVVARS = ["DOCKER_HOST", "DOCKER_CONTEXT", "DOCKER_TLS", "DOCKER_TLS_VERIFY", "DOCKER_CERT_PATH"]
+
+
+class DockerSession:
+    # map daemon base URL to DockerSession object
+    _sessions = {}
+    _sessions_lock = threading.Lock()
+
+    def __init__(self, base_url=None, tls=None, context=None):
+        """tls is the TLS configuration of the daemon at base_url, and context the name of the Docker context it comes from.
+        The daemon DOCKER_HOST points to is configured from the environment."""
+        kwargs = docker.utils.kwargs_from_env()
+        # whether the daemon is the one the environment selects, which the docker CLI connects to as it is
+        self.from_env = not base_url or base_url == kwargs.get("base_url")
+        if not self.from_env:
+            kwargs = {"base_url": base_url}
+        if tls:
+            kwargs["tls"] = tls
+        self.base_url = kwargs.get("base_url") or ""
+        self.tls = kwargs.get("tls")
+        self.context = context
+        self.client = docker.DockerClient(version="auto", **kwargs)
+        self._info = None
+        self._version = None
+        # servers of the container registries which were initialized for this daemon
+        self.registries = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get(cls, base_url=None, tls=None, context=None):
+        """Get the session of the daemon at base_url, or of the daemon DOCKER_HOST points to, connecting on first use"""
+        key = base_url or docker.utils.kwargs_from_env().get("base_url") or ""
+        with cls._sessions_lock:
+            if key not in cls._sessions:
+                cls._sessions[key] = cls(base_url, tls, context)
+            return cls._sessions[key]
+
+    @classmethod
+    def reset(cls):
+        with cls._sessions_lock:
+            for session in cls._sessions.values():
+                session.client.close()
+            cls._sessions = {}
+
+    def get_cli_env(self):
+        """Get the environment of docker CLI commands run against the daemon, such as docker buildx build,
+        with the same TLS configuration as the session. None for the daemon the environment selects."""
+        if self.from_env and not self.context:
+            return None
+
+        env = dict((key, value) for key, value in os.environ.items() if key not in DOCKER_CLI_ENVVARS)
+        if self.context:
+            # The context carries the endpoint and its TLS material
+            env["DOCKER_CONTEXT"] = self.context
+            return env
+
+        env["DOCKER_HOST"] = self.base_url
+        if self.tls:
+            if self.tls.verify:
+                env["DOCKER_TLS_VERIFY"] = "1"
+            else:
+                env["DOCKER_TLS"] = "1"
+            # The docker CLI reads ca.pem, cert.pem and key.pem from one folder, as kwargs_from_env does
+            env["DOCKER_CERT_PATH"] = os.path.dirname(self.tls.cert[0] if self.tls.cert else self.tls.ca_cert)
+        return env
+
+    @property
+    def api(self):
+        return self.client.api
+
+    @property
+    def info(self):
+        with self._lock:
+            if self._info is None:
+                self._info = self.client.info()
+            return self._info
+
+    @property
+    def version(self):
+        with self._lock:
+            if self._version is None:
+                self._version = self.client.version()
+            return self._version
+
+    @property
+    def os_type(self):
+        return self.info["OSType"].lower()
+
+    @property
+    def architecture(self):
+        return self.info.get("Architecture", "")
@@ -102,6 +102,11 @@ class EnvVars:
 
                 self.BYPASS_MODULES = self.get_envvar("BYPASS_MODULES", default="")
                 self.CONTAINER_TAG = self.get_envvar("CONTAINER_TAG", default="")
+                self.BUILD_BACKEND = self.get_envvar("BUILD_BACKEND", default=Constants.default_build_backend)
+                self.BUILDX_BUILDER = self.get_envvar("BUILDX_BUILDER", default="")
+                self.BUILDX_CACHE_DIR = self.get_envvar("BUILDX_CACHE_DIR", default="")
+                self.DOCKER_PROGRESS = self.get_envvar("DOCKER_PROGRESS", default="compact")
+                self.DOCKER_HOSTS = self.get_envvar("DOCKER_HOSTS", default="")
                 self.EDGE_RUNTIME_VERSION = self.get_envvar("EDGE_RUNTIME_VERSION", default="")
                 self.EDGEAGENT_SCHEMA_VERSION = self.get_envvar("EDGEAGENT_SCHEMA_VERSION", default="")
                 self.EDGEHUB_SCHEMA_VERSION = self.get_envvar("EDGEHUB_SCHEMA_VERSION", default="")
@@ -188,8 +193,9 @@ class EnvVars:
 
     def get_registries(self):
         self.CONTAINER_REGISTRY_MAP = {}
-        subkeys = ['server', 'username', 'password']
-        # loops through os.environ for key matching container_registry_server, container_registry_username, container_registry_password
+        subkeys = ['server', 'username', 'password', 'max_pushes']
+        # loops through os.environ for key matching container_registry_server, container_registry_username, container_registry_password,
+        # container_registry_max_pushes
         for key in os.environ:
             for subkey in subkeys:
                 self._set_registry_map(key, subkey)
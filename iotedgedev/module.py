@@ -45,6 +45,10 @@ class Module(object):
     def build_options(self):
         return self.file_json_content.get("image", {}).get("buildOptions", [])
 
+    @property
+    def build_backend(self):
+        return self.file_json_content.get("image", {}).get("buildBackend", "")
+
     @property
     def context_path(self):
         context_path = self.file_json_content.get("image", {}).get("contextPath", ".")
@@ -2,6 +2,8 @@ import os
 import re
 import shutil
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 from urllib.request import urlopen
 from zipfile import ZipFile
@@ -9,16 +11,26 @@ from zipfile import ZipFile
 import commentjson
 
 from iotedgedev.envvars import EnvVars
-from iotedgedev.output import Output
+from iotedgedev.output import Output, PrefixedOutput
 
 from . import telemetry
+from .buildcache import BuildCache
+from .buildcontext import BuildContextCache
 from .buildoptionsparser import BuildOptionsParser
 from .buildprofile import BuildProfile
+from .buildscheduler import BuildResult, BuildScheduler
+from .buildtimings import BuildTimings
+from .buildx import Buildx
+from .configcache import ConfigCache
 from .constants import Constants
 from .deploymentmanifest import DeploymentManifest
+from .dockerfileparser import DockerfileParser
 from .dockercls import Docker
+from .dockerhosts import DockerHostPool, resolve_docker_host
 from .dotnet import DotNet
 from .module import Module
+from .pushexecutor import PushExecutor
+from .registryclient import RegistryClient, parse_image_name
 from .utility import Utility
 
 
@@ -27,6 +39,10 @@ class Modules:
         self.envvars = envvars
         self.output = output
         self.utility = Utility(self.envvars, self.output)
+        self._lock = threading.Lock()
+        self._buildx = None
+        # map module folder to Module object, so module.json is only parsed once for all the templates of a run
+        self._modules = {}
 
     def add(self, name, template, group_id):
         self.output.header("ADDING MODULE {0}".format(name))
@@ -117,109 +133,364 @@ class Modules:
 
         self.output.footer("ADD COMPLETE")
 
-    def build(self, template_file, platform):
-        return self.build_push(template_file, platform, no_push=True)
+    def build(self, template_file, platform, **kwargs):
+        return self.build_push(template_file, platform, no_push=True, **kwargs)
 
-    def push(self, template_file, platform, no_build=False):
-        return self.build_push(template_file, platform, no_build=no_build)
+    def push(self, template_file, platform, no_build=False, **kwargs):
+        return self.build_push(template_file, platform, no_build=no_build, **kwargs)
 
-    def build_push(self, template_file, default_platform, no_build=False, no_push=False, fail_on_validation_error=False):
+    def build_push(self, template_file, default_platform, timings=False, timings_file=None, **kwargs):
+        """Build and push the module images referenced by the template, and generate the deployment manifest.
+        When default_platform is "all", the images of every platform declared in module.json are built in one run,
+        and the list of the generated deployment manifests (one per platform) is returned.
+        When timings is set, the durations of the phases and build steps are printed, and timings_file receives them as JSON.
+        When incremental is set, the deployment manifests whose inputs didn't change since they were generated are kept as they are."""
+        build_timings = BuildTimings()
+        try:
+            return self._build_push(template_file, default_platform, build_timings, **kwargs)
+        finally:
+            if timings:
+                build_timings.print_summary(self.output)
+            if timings_file:
+                build_timings.save(timings_file)
+                self.output.info("Timings saved to {0}".format(timings_file))
+
+    def genconfig_all(self, fail_on_validation_error=False, incremental=False, jobs=None):
+        """Generate the deployment manifests of every template of the solution for every platform declared by their modules.
+        Templates are generated in parallel and share the parsed module.json files, then one validation report is printed.
+        Return the list of the generated deployment manifests."""
+        template_files = sorted(self.utility.get_config_files())
+        if not template_files:
+            raise ValueError("No deployment manifest template file (*.template.json) found in {0}".format(os.getcwd()))
+
+        self.output.header("GENERATING {0} DEPLOYMENT MANIFEST TEMPLATES".format(len(template_files)))
+        # The templates of the solution share the cache folder and the config folder
+        config_cache = ConfigCache(os.path.join(os.getcwd(), Constants.default_cache_folder)) if incremental else None
+        self.utility.ensure_dir(self.envvars.CONFIG_OUTPUT_DIR)
+        # map generated deployment manifest path to "passed", "failed" or "up to date"
+        validation_results = {}
+        # map template file to the error which stopped its generation
+        errors = {}
+
+        def genconfig_template(template_file):
+            template_modules = self._fork(PrefixedOutput(os.path.basename(template_file)))
+            try:
+                template_modules.build_push(template_file, Constants.all_platforms, no_build=True, no_push=True,
+                                            config_cache=config_cache, validation_results=validation_results)
+            except Exception as ex:
+                errors[template_file] = ex
+                template_modules.output.error(str(ex))
+
+        with ThreadPoolExecutor(max_workers=jobs or min(len(template_files), os.cpu_count() or 1)) as executor:
+            list(executor.map(genconfig_template, template_files))
+
+        self._print_validation_report(validation_results, errors)
+        if errors:
+            raise Exception("Failed to generate the deployment manifests of {0} of {1} templates: {2}".format(
+                len(errors), len(template_files), ", ".join(os.path.basename(template_file) for template_file in sorted(errors))))
+        if fail_on_validation_error and "failed" in validation_results.values():
+            raise Exception("Deployment manifest validation failed. Please see previous logs for more details.")
+
+        return sorted(validation_results)
+
+    def _fork(self, output):
+        """Get a Modules object writing to output, which shares the parsed module.json files with this one"""
+        modules = Modules(self.envvars, output)
+        modules._lock = self._lock
+        modules._modules = self._modules
+        return modules
+
+    def _print_validation_report(self, validation_results, errors):
+        self.output.header("VALIDATION REPORT")
+        for path in sorted(validation_results):
+            line = "{0}  {1}".format(os.path.basename(path), validation_results[path].upper())
+            if validation_results[path] == "failed":
+                self.output.warning(line)
+            else:
+                self.output.info(line)
+        for template_file in sorted(errors):
+            self.output.error("{0}  ERROR: {1}".format(os.path.basename(template_file), errors[template_file]))
+
+        counts = [len([result for result in validation_results.values() if result == status]) for status in ["passed", "failed", "up to date"]]
+        self.output.info("{0} passed, {1} failed, {2} up to date, {3} templates with errors".format(*(counts + [len(errors)])))
+        self.output.line()
+
+    def _build_push(self, template_file, default_platform, timings, no_build=False, no_push=False, fail_on_validation_error=False,
+                    jobs=1, keep_going=False, push_jobs=None, skip_unchanged=False, skip_pushed=False, docker_hosts=None, incremental=False,
+                    config_cache=None, validation_results=None):
         self.output.header("BUILDING MODULES", suppress=no_build)
 
         template_file_folder = os.path.dirname(template_file)
         bypass_modules = self.utility.get_bypass_modules()
-        validation_success = True
 
-        # map image placeholder to tag.
-        # sample: ('${MODULES.filtermodule.amd64}', 'localhost:5000/filtermodule:0.0.1-amd64')
-        placeholder_tag_map = {}
         # map image tag to BuildProfile object
         tag_build_profile_map = {}
         # image tags to build
         # sample: 'localhost:5000/filtermodule:0.0.1-amd64'
         tags_to_build = set()
 
-        deployment_manifest = DeploymentManifest(self.envvars, self.output, self.utility, template_file, True, True)
+        with timings.measure("load deployment manifest"):
+            deployment_manifest = DeploymentManifest(self.envvars, self.output, self.utility, template_file, True, True)
+            user_modules = deployment_manifest.get_user_modules()
+
+            # map placeholder base to Module object
+            # sample: ('MODULES.filtermodule', <Module>), ('MODULEDIR<./modules/filtermodule>', <Module>)
+            placeholder_modules = self._get_placeholder_modules(template_file_folder, user_modules)
+
+        if default_platform == Constants.all_platforms:
+            platforms = self._get_declared_platforms(placeholder_modules, user_modules)
+            self.output.info("Platforms declared by the modules: {0}".format(", ".join(platforms)))
+        else:
+            platforms = [default_platform]
+
+        # map platform to the replacements of user module images
+        # sample: ('amd64', {'filtermodule': 'localhost:5000/filtermodule:0.0.1-amd64'})
+        platform_replacements = {}
+        for platform in list(platforms):
+            # map image placeholder to tag.
+            # sample: ('${MODULES.filtermodule.amd64}', 'localhost:5000/filtermodule:0.0.1-amd64')
+            placeholder_tag_map = {}
+            for placeholder_base, module in placeholder_modules.items():
+                self._update_module_maps(placeholder_base, module, placeholder_tag_map, tag_build_profile_map, platform)
+
+            unresolved = Modules._get_unresolved_placeholders(user_modules, placeholder_tag_map)
+            if unresolved:
+                msg = "Image placeholders {0} of {1} can't be resolved for platform {2}, as the modules don't declare it in module.json".format(
+                    ", ".join(unresolved), os.path.basename(template_file), platform)
+                if default_platform != Constants.all_platforms:
+                    raise ValueError(msg)
+                self.output.warning(msg + ". Skipping the platform")
+                platforms.remove(platform)
+                continue
+
+            replacements = {}
+            for module_name, module_info in user_modules.items():
+                image = module_info["settings"]["image"]
+                if image in placeholder_tag_map:
+                    tag = placeholder_tag_map[image]
+                    replacements[module_name] = tag
+                    if not self.utility.in_asterisk_list(module_name, bypass_modules):
+                        tags_to_build.add(tag)
+            platform_replacements[platform] = replacements
+
+        if not platforms:
+            raise ValueError("The image placeholders of {0} can't be resolved for any platform declared by the modules".format(os.path.basename(template_file)))
+
+        if not no_build or not no_push:
+            docker_hosts = list(docker_hosts or []) or [docker_host.strip() for docker_host in self.envvars.DOCKER_HOSTS.split(",") if docker_host.strip()]
+            # The first Docker host is the default one, which also pushes the images it didn't build
+            docker_pool = DockerHostPool([Docker(self.envvars, self.utility, self.output, *resolve_docker_host(docker_host)) for docker_host in docker_hosts]
+                                         if docker_hosts else [Docker(self.envvars, self.utility, self.output)])
+            docker = docker_pool.default
+            # map image tag to the Docker object of the daemon which built it
+            built_on = {}
+            build_cache = BuildCache(os.path.join(template_file_folder, Constants.default_cache_folder)) if skip_unchanged and not no_build else None
+            # platforms of a module usually share the context folder, which is archived once for all of them
+            build_context_cache = BuildContextCache(self.output)
+
+            def build_tag(tag, output):
+                build_profile = tag_build_profile_map[tag]
+                # An image built FROM another module image must be built on the daemon holding that image
+                pinned = next((built_on[dependency] for dependency in dependencies.get(tag, []) if dependency in built_on), None)
+                with docker_pool.acquire(build_profile.platform, pinned) as build_docker:
+                    if len(docker_pool.dockers) > 1:
+                        output.info("DOCKER HOST: {0}".format(build_docker.session.base_url))
+                    built_on[tag] = build_docker
+                    # The dependencies are built when the tag is scheduled, and their new image IDs invalidate its cache entry
+                    base_image_ids = [built_on.get(dependency, build_docker).docker_client.images.get(dependency).id
+                                      for dependency in dependencies.get(tag, [])] if build_cache is not None else None
+                    return self._build_image(build_docker, tag, build_profile, output, build_cache, build_context_cache, timings, base_image_ids)
+
+            registry_clients = {} if skip_pushed else None
+            push_executor = PushExecutor(docker, self.envvars.CONTAINER_REGISTRY_MAP.values())
+
+            def push_tag(tag, output):
+                return self._push_image(built_on.get(tag, docker), tag, output, registry_clients, timings, push_executor)
+
+            tags = sorted(tag for tag in tags_to_build if tag in tag_build_profile_map)
+            dependencies = {} if no_build else self._get_build_dependencies(tags, tag_build_profile_map)
+            if not no_push:
+                # Only the registries the images are pushed to need to be ready, on every daemon which pushes images
+                for push_docker in docker_pool.dockers if not no_build else [docker]:
+                    push_docker.init_registry(set(tag.split("/")[0].lower() for tag in tags))
+
+            scheduler = BuildScheduler(self.output, jobs, keep_going, push_jobs)
+            try:
+                with timings.measure("push images" if no_build else "build images" if no_push else "build and push images"):
+                    results = scheduler.run(tags,
+                                            None if no_build else build_tag,
+                                            None if no_push else push_tag,
+                                            dependencies)
+            finally:
+                build_context_cache.cleanup()
+                if build_cache is not None:
+                    build_cache.save()
+            for result in results:
+                result.pushed_bytes = push_executor.pushed_bytes.get(result.tag, 0)
+            scheduler.print_summary(results, "PUSH SUMMARY" if no_build else "BUILD SUMMARY",
+                                    push_executor.get_summary() if push_executor.pushed_bytes else None)
+            scheduler.raise_on_failure(results)
+
+        validation_success = True
+        gen_deployment_manifest_paths = []
+        if config_cache is None and incremental:
+            config_cache = ConfigCache(os.path.join(template_file_folder, Constants.default_cache_folder))
+        for platform in platforms:
+            if config_cache is not None:
+                gen_deployment_manifest_path = os.path.join(self.envvars.CONFIG_OUTPUT_DIR, Utility.get_deployment_manifest_name(
+                    template_file, deployment_manifest.get_template_schema_ver(), platform))
+                fingerprint = config_cache.get_fingerprint(template_file, [module.module_json_file for module in placeholder_modules.values()],
+                                                           platform, platform_replacements[platform], {"CONTAINER_TAG": self.envvars.CONTAINER_TAG})
+                # A manifest which failed validation is generated again, so that the validation errors are reported on every run
+                cache_entry = config_cache.get_up_to_date(gen_deployment_manifest_path, fingerprint)
+                if cache_entry is not None and cache_entry["valid"]:
+                    self.output.info("Deployment manifest {0} is up to date. Use --force to generate it again".format(gen_deployment_manifest_path))
+                    gen_deployment_manifest_paths.append(gen_deployment_manifest_path)
+                    if validation_results is not None:
+                        validation_results[gen_deployment_manifest_path] = "up to date"
+                    continue
+
+            platform_deployment_manifest = deployment_manifest if len(platforms) == 1 else deployment_manifest.copy()
+            with timings.measure("generate deployment manifest"):
+                gen_deployment_manifest_path = self._gen_deployment_manifest(template_file, platform_deployment_manifest, platform, platform_replacements[platform])
+            gen_deployment_manifest_paths.append(gen_deployment_manifest_path)
+
+            self.output.info("Validating generated deployment manifest %s" % gen_deployment_manifest_path)
+            with timings.measure("validate deployment manifest"):
+                platform_validation_success = platform_deployment_manifest.validate_deployment_manifest()
+            validation_success &= platform_validation_success
+            if validation_results is not None:
+                validation_results[gen_deployment_manifest_path] = "passed" if platform_validation_success else "failed"
+
+            if config_cache is not None:
+                config_cache.update(gen_deployment_manifest_path, fingerprint, platform_validation_success)
+                config_cache.save()
 
-        # get image tags for ${MODULES.modulename.xxx} placeholder
+        if fail_on_validation_error and not validation_success:
+            raise Exception("Deployment manifest validation failed. Please see previous logs for more details.")
+
+        if default_platform == Constants.all_platforms:
+            return gen_deployment_manifest_paths
+        return gen_deployment_manifest_paths[0]
+
+    def _get_placeholder_modules(self, template_file_folder, user_modules):
+        """Get the modules the user modules of the template refer to, without parsing the module.json of other modules"""
+        placeholder_modules = {}
         modules_path = os.path.join(template_file_folder, self.envvars.MODULES_PATH)
-        if os.path.isdir(modules_path):
-            for folder_name in os.listdir(modules_path):
-                project_folder = os.path.join(modules_path, folder_name)
-                if os.path.exists(os.path.join(project_folder, "module.json")):
-                    module = Module(self.envvars, self.utility, project_folder)
-                    self._update_module_maps("MODULES.{0}".format(folder_name), module, placeholder_tag_map, tag_build_profile_map, default_platform)
+        literal_images = []
 
-        # get image tags for ${MODULEDIR<relative path>.xxx} placeholder
-        user_modules = deployment_manifest.get_user_modules()
         for module_name, module_info in user_modules.items():
             image = module_info["settings"]["image"]
+
+            # get modules for ${MODULES.modulename.xxx} placeholder
+            match_result = re.search(Constants.modules_placeholder_pattern, image)
+            if match_result is not None:
+                folder_name = match_result.group(1)
+                project_folder = os.path.join(modules_path, folder_name)
+                if os.path.exists(os.path.join(project_folder, "module.json")):
+                    placeholder_modules["MODULES.{0}".format(folder_name)] = self._get_module(project_folder)
+                continue
+
+            # get modules for ${MODULEDIR<relative path>.xxx} placeholder
             match_result = re.search(Constants.moduledir_placeholder_pattern, image)
-            if (match_result is not None):
+            if match_result is not None:
                 module_dir = match_result.group(1)
-                module = Module(self.envvars, self.utility, os.path.join(template_file_folder, module_dir))
-                self._update_module_maps("MODULEDIR<{0}>".format(module_dir), module, placeholder_tag_map, tag_build_profile_map, default_platform)
+                placeholder_modules["MODULEDIR<{0}>".format(module_dir)] = self._get_module(os.path.join(template_file_folder, module_dir))
+                continue
+
+            literal_images.append(image)
+
+        # get modules for image tags written out in the template, such as localhost:5000/filtermodule:0.0.1-amd64
+        if literal_images and os.path.isdir(modules_path):
+            self._add_literal_image_modules(placeholder_modules, modules_path, literal_images)
+
+        return placeholder_modules
+
+    def _add_literal_image_modules(self, placeholder_modules, modules_path, images):
+        folder_names = sorted(folder_name for folder_name in os.listdir(modules_path) if os.path.exists(os.path.join(modules_path, folder_name, "module.json")))
+        registry_servers = set(registry.server.lower() for registry in self.envvars.CONTAINER_REGISTRY_MAP.values())
+
+        for image in images:
+            server, repository, _ = parse_image_name(image)
+            # The module folder is usually named after the image repository, so try that folder first.
+            # Only images of the user's container registries can be built from any other module folder.
+            repository_name = repository.rsplit("/", 1)[-1].lower()
+            candidates = [folder_name for folder_name in folder_names if folder_name.lower() == repository_name]
+            if server.lower() in registry_servers:
+                candidates += [folder_name for folder_name in folder_names if folder_name.lower() != repository_name]
+
+            for folder_name in candidates:
+                placeholder_base = "MODULES.{0}".format(folder_name)
+                module = self._get_module(os.path.join(modules_path, folder_name))
+                placeholder_tag_map = {}
+                self._update_module_maps(placeholder_base, module, placeholder_tag_map, {}, "")
+                if image in placeholder_tag_map:
+                    placeholder_modules[placeholder_base] = module
+                    break
+
+    def _get_module(self, module_dir):
+        module_dir = os.path.abspath(module_dir)
+        with self._lock:
+            if module_dir not in self._modules:
+                self._modules[module_dir] = Module(self.envvars, self.utility, module_dir)
+            return self._modules[module_dir]
+
+    def _get_declared_platforms(self, placeholder_modules, user_modules):
+        """Get the platforms declared in module.json by the modules the user modules refer to.
+        Debug platforms are built along with their platform, as they are referred to by ${MODULES.modulename.debug}."""
+        images = set(module_info["settings"]["image"] for module_info in user_modules.values())
+        platforms = []
+        for placeholder_base, module in placeholder_modules.items():
+            placeholder_tag_map = {}
+            self._update_module_maps(placeholder_base, module, placeholder_tag_map, {}, "")
+            placeholder_tag_map["${{{0}}}".format(placeholder_base)] = None
+            placeholder_tag_map["${{{0}.debug}}".format(placeholder_base)] = None
+            if images.isdisjoint(placeholder_tag_map):
+                continue
 
-        replacements = {}
-        for module_name, module_info in user_modules.items():
+            for platform in module.platforms:
+                if platform.endswith(".debug"):
+                    platform = platform[:-len(".debug")]
+                if platform not in platforms:
+                    platforms.append(platform)
+
+        if not platforms:
+            self.output.info("No platforms declared by the modules in the deployment manifest template. Using the default platform {0}".format(self.envvars.DEFAULT_PLATFORM))
+            platforms.append(self.envvars.DEFAULT_PLATFORM)
+
+        return platforms
+
+    @staticmethod
+    def _get_unresolved_placeholders(user_modules, placeholder_tag_map):
+        """Get the ${MODULES...} and ${MODULEDIR<...>...} images of the user modules which have no tag for the platform of placeholder_tag_map"""
+        unresolved = set()
+        for module_info in user_modules.values():
             image = module_info["settings"]["image"]
             if image in placeholder_tag_map:
-                tag = placeholder_tag_map[image]
-                replacements[module_name] = tag
-                if not self.utility.in_asterisk_list(module_name, bypass_modules):
-                    tags_to_build.add(tag)
-
-        if not no_build or not no_push:
-            docker = Docker(self.envvars, self.utility, self.output)
-            for tag in tags_to_build:
-                if tag in tag_build_profile_map:
-                    # BUILD DOCKER IMAGE
-                    if not no_build:
-                        build_profile = tag_build_profile_map.get(tag)
-
-                        dockerfile = build_profile.dockerfile
-                        self.output.info("PROCESSING DOCKERFILE: {0}".format(dockerfile))
-                        self.output.info("BUILDING DOCKER IMAGE: {0}".format(tag))
-
-                        build_options = build_profile.extra_options
-                        build_options_parser = BuildOptionsParser(build_options)
-                        sdk_options = build_options_parser.parse_build_options()
-
-                        context_path = build_profile.context_path
-
-                        # A hack to work around Python Docker SDK's bug with Linux container mode on Windows
-                        # https://github.com/docker/docker-py/issues/2127
-                        dockerfile_relative = os.path.relpath(dockerfile, context_path)
-                        if docker.get_os_type() == "linux" and sys.platform == "win32":
-                            dockerfile_relative = dockerfile_relative.replace("\\", "/")
-
-                        build_args = {"tag": tag, "path": context_path, "dockerfile": dockerfile_relative}
-                        build_args.update(sdk_options)
-
-                        response = docker.docker_api.build(**build_args)
-                        docker.process_api_response(response)
-                        self.output.footer("BUILD COMPLETE")
-                    if not no_push:
-                        docker.init_registry()
-
-                        # PUSH TO CONTAINER REGISTRY
-                        self.output.info("PUSHING DOCKER IMAGE: " + tag)
-                        registry_key = None
-                        for key, registry in self.envvars.CONTAINER_REGISTRY_MAP.items():
-                            # Split the repository tag in the module.json (ex: Localhost:5000/filtermodule)
-                            if registry.server.lower() == tag.split('/')[0].lower():
-                                registry_key = key
-                                break
-                        if registry_key is None:
-                            self.output.info("Could not find registry credentials with name {0} in environment variable. Pushing anonymously.".format(tag.split('/')[0].lower()))
-                            response = docker.docker_client.images.push(repository=tag, stream=True)
-                        else:
-                            response = docker.docker_client.images.push(repository=tag, stream=True, auth_config={
-                                "username": self.envvars.CONTAINER_REGISTRY_MAP[registry_key].username,
-                                "password": self.envvars.CONTAINER_REGISTRY_MAP[registry_key].password})
-                        docker.process_api_response(response)
-                        self.output.footer("PUSH COMPLETE")
-
+                continue
+            if re.search(Constants.modules_placeholder_pattern, image) or re.search(Constants.moduledir_placeholder_pattern, image):
+                unresolved.add(image)
+        return sorted(unresolved)
+
+    def _get_build_dependencies(self, tags, tag_build_profile_map):
+        """Map every image tag to the tags of the module images its Dockerfile is built FROM"""
+        dependencies = {}
+        for tag in tags:
+            build_profile = tag_build_profile_map[tag]
+            build_args = BuildOptionsParser(build_profile.extra_options).get_build_args()
+            try:
+                base_images = DockerfileParser(build_profile.dockerfile).get_base_images(build_args)
+            except OSError:
+                # The build reports the missing Dockerfile
+                base_images = []
+
+            dependencies[tag] = [image for image in base_images if image in tags]
+            if dependencies[tag]:
+                self.output.info("{0} is built FROM {1}".format(tag, ", ".join(dependencies[tag])))
+
+        return dependencies
+
+    def _gen_deployment_manifest(self, template_file, deployment_manifest, platform, replacements):
         self.output.info("Expanding image placeholders")
         deployment_manifest.expand_image_placeholders(replacements)
         self.output.info("Converting createOptions")
@@ -229,20 +500,136 @@ class Modules:
         deployment_manifest.del_key(["$schema-template"])
 
         self.utility.ensure_dir(self.envvars.CONFIG_OUTPUT_DIR)
-        gen_deployment_manifest_name = Utility.get_deployment_manifest_name(template_file, template_schema_ver, default_platform)
+        gen_deployment_manifest_name = Utility.get_deployment_manifest_name(template_file, template_schema_ver, platform)
         gen_deployment_manifest_path = os.path.join(self.envvars.CONFIG_OUTPUT_DIR, gen_deployment_manifest_name)
 
         self.output.info("Expanding '{0}' to '{1}'".format(os.path.basename(template_file), gen_deployment_manifest_path))
         deployment_manifest.dump(gen_deployment_manifest_path)
 
-        self.output.info("Validating generated deployment manifest %s" % gen_deployment_manifest_path)
-        validation_success = deployment_manifest.validate_deployment_manifest()
-
-        if fail_on_validation_error and not validation_success:
-            raise Exception("Deployment manifest validation failed. Please see previous logs for more details.")
-
         return gen_deployment_manifest_path
 
+    def _build_image(self, docker, tag, build_profile, output, build_cache=None, build_context_cache=None, timings=None, base_image_ids=None):
+        dockerfile = build_profile.dockerfile
+        output.info("PROCESSING DOCKERFILE: {0}".format(dockerfile))
+
+        build_backend = (build_profile.build_backend or self.envvars.BUILD_BACKEND or Constants.default_build_backend).lower()
+        if build_backend not in [Constants.default_build_backend, Constants.buildx_build_backend]:
+            raise ValueError("Build backend {0} is not supported. Expected: '{1}' or '{2}'".format(
+                build_backend, Constants.default_build_backend, Constants.buildx_build_backend))
+
+        build_options = build_profile.extra_options
+        build_options_parser = BuildOptionsParser(build_options)
+        if build_backend == Constants.buildx_build_backend:
+            # buildx takes the docker build CLI options from module.json as they are
+            cli_options = build_options_parser.get_cli_build_options()
+            fingerprint_options = {"backend": build_backend, "options": cli_options}
+            no_cache = "--no-cache" in [cli_key for cli_key, cli_val in cli_options]
+        else:
+            sdk_options = build_options_parser.parse_build_options()
+            fingerprint_options = sdk_options
+            no_cache = sdk_options.get("nocache")
+
+        if timings is None:
+            timings = BuildTimings()
+
+        fingerprint = None
+        if build_cache is not None and not no_cache:
+            with timings.measure("check cache", tag):
+                fingerprint = build_cache.get_fingerprint(tag, build_profile, fingerprint_options, base_image_ids)
+                up_to_date = build_cache.is_up_to_date(tag, fingerprint, docker.docker_client)
+            if up_to_date:
+                output.info("SKIPPING DOCKER IMAGE: {0}. Build inputs are unchanged and the image exists locally (cache hit)".format(tag))
+                output.line()
+                return BuildResult.CACHED
+
+        output.info("BUILDING DOCKER IMAGE: {0}".format(tag))
+
+        if build_backend == Constants.buildx_build_backend:
+            with timings.measure("build", tag):
+                self._get_buildx().build(tag, build_profile, cli_options, output, self.envvars.BUILDX_CACHE_DIR,
+                                         lambda name, duration: timings.add_step(tag, name, duration), docker.session.get_cli_env())
+        else:
+            context_path = build_profile.context_path
+
+            # A hack to work around Python Docker SDK's bug with Linux container mode on Windows
+            # https://github.com/docker/docker-py/issues/2127
+            dockerfile_relative = os.path.relpath(dockerfile, context_path)
+            if docker.get_os_type() == "linux" and sys.platform == "win32":
+                dockerfile_relative = dockerfile_relative.replace("\\", "/")
+
+            build_args = {"tag": tag, "path": context_path, "dockerfile": dockerfile_relative}
+            build_args.update(sdk_options)
+
+            context = None
+            try:
+                # The context is archived and uploaded before the build API call returns
+                with timings.measure("send context", tag):
+                    context = build_context_cache.open(build_profile) if build_context_cache is not None else None
+                    if context is not None:
+                        build_args.update({"fileobj": context, "custom_context": True})
+                    response = docker.docker_api.build(**build_args)
+                with timings.measure("build", tag):
+                    docker.process_api_response(response, output, lambda name: timings.step(tag, name))
+            finally:
+                if context is not None:
+                    context.close()
+
+        if fingerprint is not None:
+            build_cache.update(tag, fingerprint, docker.docker_client.images.get(tag).id)
+        output.footer("BUILD COMPLETE")
+
+    def _get_buildx(self):
+        with self._lock:
+            if self._buildx is None:
+                self._buildx = Buildx(self.output, self.utility, self.envvars.BUILDX_BUILDER)
+            return self._buildx
+
+    def _push_image(self, docker, tag, output, registry_clients=None, timings=None, push_executor=None):
+        if timings is None:
+            timings = BuildTimings()
+        if push_executor is None:
+            push_executor = PushExecutor(docker, self.envvars.CONTAINER_REGISTRY_MAP.values())
+
+        server = tag.split('/')[0].lower()
+        registry = self._get_registry(server)
+
+        if registry_clients is not None:
+            with timings.measure("check registry", tag):
+                pushed = self._is_pushed(docker, tag, registry, registry_clients, output)
+            if pushed:
+                output.info("SKIPPING PUSH OF DOCKER IMAGE: {0}. The registry already holds the same image digest".format(tag))
+                output.line()
+                return BuildResult.CACHED
+
+        # PUSH TO CONTAINER REGISTRY
+        output.info("PUSHING DOCKER IMAGE: " + tag)
+        with timings.measure("push", tag):
+            push_executor.push(tag, output, docker)
+        output.footer("PUSH COMPLETE")
+
+    def _get_registry(self, server):
+        for registry in self.envvars.CONTAINER_REGISTRY_MAP.values():
+            # Split the repository tag in the module.json (ex: Localhost:5000/filtermodule)
+            if registry.server.lower() == server.lower():
+                return registry
+        return None
+
+    def _is_pushed(self, docker, tag, registry, registry_clients, output):
+        """Check whether the registry holds the same manifest digest for the tag as the local image"""
+        local_digests = docker.get_repo_digests(tag)
+        if not local_digests:
+            return False
+
+        server, repository, image_tag = parse_image_name(tag)
+        try:
+            with self._lock:
+                if server not in registry_clients:
+                    registry_clients[server] = RegistryClient(server, registry.username, registry.password) if registry else RegistryClient(server)
+            return registry_clients[server].get_manifest_digest(repository, image_tag) in local_digests
+        except Exception as ex:
+            output.info("Could not get the digest of {0} from the registry, pushing the image. Error: {1}".format(tag, ex))
+            return False
+
     def _update_module_maps(self, placeholder_base, module, placeholder_tag_map, tag_build_profile_map, default_platform):
         try:
             for platform in module.platforms:
@@ -258,7 +645,7 @@ class Modules:
                 elif platform == default_platform + ".debug":
                     placeholder_tag_map["${{{0}.{1}}}".format(placeholder_base, "debug")] = tag
 
-                tag_build_profile_map[tag] = BuildProfile(dockerfile, module.context_path, module.build_options)
+                tag_build_profile_map[tag] = BuildProfile(dockerfile, module.context_path, module.build_options, module.build_backend, platform)
         except FileNotFoundError:
             pass
 
@@ -1,3 +1,6 @@
+import sys
+import threading
+
 import click
 
 
@@ -59,3 +62,37 @@ class Output:
     def prompt_question(self, text, default=""):
         self.line()
         return click.prompt(text, default=default)
+
+    def flush(self):
+        pass
+
+    def is_tty(self):
+        return sys.stdout.isatty()
+
+
+class PrefixedOutput(Output):
+    """Output which prefixes every line, so that concurrent builds and pushes can share one terminal"""
+
+    _lock = threading.Lock()
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self._pending = ""
+
+    def echo(self, text, color="", dim=False, nl=True, err=False):
+        # Buffer partial lines (such as Docker build stream chunks) until they are complete
+        text = self._pending + str(text) + ("\n" if nl else "")
+        lines = text.split("\n")
+        self._pending = lines.pop()
+
+        with PrefixedOutput._lock:
+            for line in lines:
+                super().echo("[{0}] {1}".format(self.prefix, line), color=color, dim=dim, err=err)
+
+    def flush(self):
+        if self._pending:
+            self.echo("")
+
+    def is_tty(self):
+        # Lines of concurrent streams can't be updated in place
+        return False
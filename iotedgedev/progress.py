@@ -0,0 +1,145 @@
+"""
+This module provides a compact renderer of the JSON streams of Docker builds, pushes and pulls
+"""
+
+import collections
+import re
+import time
+
+# Layer statuses meaning that the layer needs no more transfer
+LAYER_DONE_STATUSES = ["pushed", "layer already exists", "pull complete", "already exists", "mounted from"]
+
+
+def format_size(size):
+    for unit in ["B", "KB", "MB"]:
+        if size < 1024:
+            return "{0:.1f} {1}".format(size, unit)
+        size /= 1024.0
+    return "{0:.1f} GB".format(size)
+
+
+def parse_size(size):
+    """Parse a size such as '500MB', '10 GB' or '1024' (bytes) into a number of bytes"""
+    match_result = re.match(r"^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)B?\s*$", str(size), re.IGNORECASE)
+    if match_result is None:
+        raise ValueError("Invalid size: {0}. Expected a number of bytes or a size such as 500MB or 10GB".format(size))
+    return int(float(match_result.group(1)) * 1024 ** " KMGT".index(match_result.group(2).upper() or " "))
+
+
+class ProgressRenderer:
+    def __init__(self, output, compact=True, interval=5.0, tail_size=200):
+        """In compact mode, the layer statuses are aggregated into one line per stream, which is updated in place on a TTY
+        and printed at most every interval seconds otherwise. Build output is only printed for the Dockerfile steps,
+        and the last tail_size lines of the full output are kept for print_tail()."""
+        self.output = output
+        self.compact = compact
+        self.tty = compact and output.is_tty()
+        self.interval = interval
+        self.tail = collections.deque(maxlen=tail_size)
+        # map layer ID to [status, current bytes, total bytes]
+        self.layers = collections.OrderedDict()
+        self.start = time.time()
+        self._last_render = 0.0
+        self._line_length = 0
+        self._closed = False
+
+    def stream(self, text):
+        """Handle a chunk of build output"""
+        self.tail.extend(line for line in text.splitlines() if line.strip())
+        if not self.compact:
+            self.output.procout(text, nl=False)
+            return
+
+        for line in text.splitlines():
+            if line.startswith("Step ") or line.startswith("Successfully "):
+                self._clear_line()
+                self.output.procout(line)
+
+    def status(self, json_):
+        """Handle a status message, such as the progress of a layer push"""
+        message = ""
+        if ("id" in json_):
+            message += json_["id"] + " "
+        message += json_["status"] + " "
+        if ("progress" in json_):
+            message += json_["progress"]
+
+        if "id" in json_:
+            layer = self.layers.setdefault(json_["id"], [json_["status"], 0, 0])
+            layer[0] = json_["status"]
+            progress_detail = json_.get("progressDetail") or {}
+            if progress_detail.get("total"):
+                layer[1] = progress_detail.get("current", 0)
+                layer[2] = progress_detail["total"]
+            if self._is_done(layer):
+                layer[1] = layer[2]
+
+        if not self.compact:
+            self.output.procout(message)
+            return
+
+        if "progress" not in json_:
+            self.tail.append(message)
+        if "id" not in json_:
+            self._clear_line()
+            self.output.procout(message)
+            return
+
+        self._render()
+
+    @property
+    def transferred(self):
+        """Number of bytes of the layers transferred so far"""
+        return sum(layer[1] for layer in self.layers.values())
+
+    def get_summary(self):
+        done = len([layer for layer in self.layers.values() if self._is_done(layer)])
+        current = self.transferred
+        total = sum(layer[2] for layer in self.layers.values())
+        elapsed = max(time.time() - self.start, 0.001)
+
+        return "{0}/{1} layers done, {2} of {3} transferred, {4}/s".format(
+            done, len(self.layers), format_size(current), format_size(total), format_size(current / elapsed))
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self.compact and self.layers:
+            self._render(force=True)
+        if self.tty and self._line_length:
+            self.output.echo("")
+            self._line_length = 0
+
+    def print_tail(self):
+        """Print the last lines of the full output, to investigate a failure"""
+        if not self.compact or not self.tail:
+            return
+
+        self.close()
+        self.output.info("Last {0} lines of output:".format(len(self.tail)))
+        for line in self.tail:
+            self.output.procout(line)
+
+    def _render(self, force=False):
+        now = time.time()
+        if not force and now - self._last_render < (0.1 if self.tty else self.interval):
+            return
+        self._last_render = now
+
+        summary = self.get_summary()
+        if self.tty:
+            self.output.echo("\r" + summary.ljust(self._line_length), dim=True, nl=False)
+            self._line_length = len(summary)
+        else:
+            self.output.procout(summary)
+
+    def _clear_line(self):
+        if self.tty and self._line_length:
+            self.output.echo("\r" + " " * self._line_length + "\r", nl=False)
+            self._line_length = 0
+            self._last_render = 0.0
+
+    @staticmethod
+    def _is_done(layer):
+        return any(layer[0].lower().startswith(status) for status in LAYER_DONE_STATUSES)
@@ -0,0 +1,114 @@
+"""
+This module provides the push of images to container registries shared by concurrent workers,
+with a limit of concurrent pushes per registry and a retry on transient errors
+"""
+
+import threading
+import time
+
+import requests
+
+from .progress import format_size
+
+# HTTP status codes of responses worth a retry. 500 is not retried, as the Docker daemon also reports permanent failures with it.
+TRANSIENT_STATUS_CODES = [429, 502, 503, 504]
+# Fragments of the error messages of failures which are worth a retry, such as registry throttling.
+# The status codes are matched with their reason phrase, as bare numbers also appear in digests and sizes.
+TRANSIENT_ERRORS = ["toomanyrequests", "429 too many requests", "502 bad gateway", "503 service unavailable", "504 gateway timeout",
+                    "timeout", "timed out", "connection reset", "connection refused", "broken pipe", "unexpected eof", "temporary failure"]
+
+
+def is_transient_error(ex):
+    if isinstance(ex, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    response = getattr(ex, "response", None)
+    if getattr(response, "status_code", None) in TRANSIENT_STATUS_CODES:
+        return True
+    message = str(ex).lower()
+    return any(error in message for error in TRANSIENT_ERRORS)
+
+
+class _Unlimited:
+    """Context manager standing for the semaphore of a registry without a limit of concurrent pushes"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class PushExecutor:
+    def __init__(self, docker, registries, retries=1, backoff=5.0):
+        """registries is the list of ContainerRegistry objects which provide the credentials and the push limits.
+        A push failing with a transient error is retried `retries` times, waiting backoff seconds more at every attempt."""
+        self.docker = docker
+        self.registries = list(registries)
+        self.retries = retries
+        self.backoff = backoff
+        # map image tag to number of bytes pushed
+        self.pushed_bytes = {}
+        self._semaphores = {}
+        self._start = None
+        self._end = None
+        self._lock = threading.Lock()
+
+    def push(self, tag, output, docker=None):
+        """Push the image of tag from the daemon of docker, or of the default Docker object, and return the number of bytes pushed"""
+        if docker is None:
+            docker = self.docker
+        server = tag.split("/")[0].lower()
+        registry = self.get_registry(server)
+        if registry is None:
+            output.info("Could not find registry credentials with name {0} in environment variable. Pushing anonymously.".format(server))
+            auth_config = None
+        else:
+            auth_config = {"username": registry.username, "password": registry.password}
+
+        with self._get_semaphore(server, registry):
+            with self._lock:
+                if self._start is None:
+                    self._start = time.time()
+
+            attempt = 0
+            while True:
+                try:
+                    response = docker.docker_client.images.push(repository=tag, stream=True, auth_config=auth_config)
+                    progress = docker.process_api_response(response, output)
+                    break
+                except Exception as ex:
+                    if attempt >= self.retries or not is_transient_error(ex):
+                        raise
+                    attempt += 1
+                    output.warning("Pushing {0} failed with a transient error: {1}. Retrying in {2:.0f}s".format(tag, str(ex), self.backoff * attempt))
+                    time.sleep(self.backoff * attempt)
+
+            with self._lock:
+                self.pushed_bytes[tag] = progress.transferred
+                self._end = time.time()
+
+        return progress.transferred
+
+    def get_registry(self, server):
+        for registry in self.registries:
+            if registry.server.lower() == server.lower():
+                return registry
+        return None
+
+    def get_summary(self):
+        with self._lock:
+            total = sum(self.pushed_bytes.values())
+            duration = self._end - self._start if self._end is not None else 0.0
+
+        return "Pushed {0} in {1:.1f}s ({2}/s)".format(format_size(total), duration, format_size(total / max(duration, 0.001)))
+
+    def _get_semaphore(self, server, registry):
+        with self._lock:
+            if server not in self._semaphores:
+                max_pushes = registry.max_pushes if registry is not None else ""
+                try:
+                    max_pushes = int(max_pushes or 0)
+                except ValueError:
+                    raise ValueError("The maximum number of concurrent pushes to {0} must be a number. Found: {1}".format(server, max_pushes))
+                self._semaphores[server] = threading.BoundedSemaphore(max_pushes) if max_pushes > 0 else _Unlimited()
+            return self._semaphores[server]
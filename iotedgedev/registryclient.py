@@ -0,0 +1,101 @@
+"""
+This module provides a minimal client of the Docker Registry HTTP API V2,
+used to look up image manifest digests without pulling or pushing images
+"""
+
+import re
+
+import requests
+
+MANIFEST_MEDIA_TYPES = [
+    "application/vnd.docker.distribution.manifest.v2+json",
+    "application/vnd.docker.distribution.manifest.list.v2+json",
+    "application/vnd.oci.image.manifest.v1+json",
+    "application/vnd.oci.image.index.v1+json"
+]
+
+DOCKER_HUB_SERVERS = ["docker.io", "index.docker.io", "registry-1.docker.io"]
+
+
+def parse_image_name(image):
+    """Split an image name into server, repository and tag.
+    Sample: 'localhost:5000/filtermodule:0.0.1-amd64' -> ('localhost:5000', 'filtermodule', '0.0.1-amd64')"""
+    tag = "latest"
+    name = image.split("@", 1)[0]
+    last_part = name.rsplit("/", 1)[-1]
+    if ":" in last_part:
+        name, tag = name.rsplit(":", 1)
+
+    parts = name.split("/", 1)
+    if len(parts) == 2 and ("." in parts[0] or ":" in parts[0] or parts[0] == "localhost"):
+        server, repository = parts
+    else:
+        server, repository = "docker.io", name
+
+    if server in DOCKER_HUB_SERVERS and "/" not in repository:
+        repository = "library/" + repository
+
+    return server, repository, tag
+
+
+class RegistryClient:
+    def __init__(self, server, username=None, password=None, timeout=30):
+        self.server = server
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._tokens = {}
+
+    @property
+    def base_url(self):
+        if self.server in DOCKER_HUB_SERVERS:
+            return "https://registry-1.docker.io"
+
+        # A local registry such as registry:2 started by `iotedgedev docker setup` only serves plain HTTP
+        host = self.server.split(":", 1)[0]
+        scheme = "http" if host in ["localhost", "127.0.0.1"] else "https"
+        return "{0}://{1}".format(scheme, self.server)
+
+    def get_manifest_digest(self, repository, tag):
+        """Get the manifest digest of repository:tag in the registry. Return None if the tag doesn't exist."""
+        url = "{0}/v2/{1}/manifests/{2}".format(self.base_url, repository, tag)
+        response = self._request("HEAD", url, repository, headers={"Accept": ", ".join(MANIFEST_MEDIA_TYPES)})
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+
+        return response.headers.get("Docker-Content-Digest")
+
+    def _request(self, method, url, repository, headers=None):
+        headers = dict(headers or {})
+        if repository in self._tokens:
+            headers["Authorization"] = "Bearer " + self._tokens[repository]
+
+        response = self.session.request(method, url, headers=headers, timeout=self.timeout)
+        if response.status_code != 401:
+            return response
+
+        challenge = response.headers.get("WWW-Authenticate", "")
+        if challenge.lower().startswith("bearer"):
+            self._tokens[repository] = self._get_token(challenge, repository)
+            headers["Authorization"] = "Bearer " + self._tokens[repository]
+            return self.session.request(method, url, headers=headers, timeout=self.timeout)
+        elif self.username:
+            return self.session.request(method, url, headers=headers, auth=(self.username, self.password), timeout=self.timeout)
+
+        return response
+
+    def _get_token(self, challenge, repository):
+        params = dict(re.findall(r'(\w+)="([^"]*)"', challenge))
+        realm = params.pop("realm", None)
+        if realm is None:
+            raise ValueError("Invalid authentication challenge from registry {0}: {1}".format(self.server, challenge))
+        params.setdefault("scope", "repository:{0}:pull".format(repository))
+
+        auth = (self.username, self.password) if self.username else None
+        response = self.session.get(realm, params=params, auth=auth, timeout=self.timeout)
+        response.raise_for_status()
+        token_json = response.json()
+
+        return token_json.get("token") or token_json.get("access_token")
@@ -0,0 +1,124 @@
+"""
+This module provides the JSON schemas of deployment manifests and templates from a local cache,
+refreshed from schemastore.org with ETags, and falling back to the published copies bundled with the package
+"""
+
+import json
+import os
+import threading
+import time
+
+import jsonschema
+import requests
+
+SCHEMA_CACHE_MODES = ["auto", "refresh", "offline"]
+# Number of seconds a cached schema is used without asking schemastore.org whether it changed
+SCHEMA_CACHE_TTL = 7 * 24 * 3600
+# Verbatim copies of the published schemas, updated with scripts/update_schemas.py
+BUNDLED_SCHEMAS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schemas")
+
+
+class SchemaCache:
+    # mode of the run, set by the --schema-cache option of the CLI commands
+    mode = "auto"
+    # map cache folder to SchemaCache object
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, cache_dir=None, ttl=SCHEMA_CACHE_TTL, timeout=10):
+        self.cache_dir = cache_dir or os.path.join(os.path.expanduser("~"), ".iotedgedev", "schemas")
+        self.ttl = ttl
+        self.timeout = timeout
+        # map schema URL to schema, and to the compiled validator
+        self._schemas = {}
+        self._validators = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get(cls, cache_dir=None):
+        """Get the schema cache of the run, whose schemas and validators are shared by all the deployment manifests.
+        It holds no output, so that every caller reports through its own output, such as a template of genconfig --all."""
+        with cls._instances_lock:
+            if cache_dir not in cls._instances:
+                cls._instances[cache_dir] = cls(cache_dir)
+            return cls._instances[cache_dir]
+
+    @classmethod
+    def reset(cls):
+        with cls._instances_lock:
+            cls._instances = {}
+
+    def get_validator(self, url, output):
+        """Get the jsonschema validator of the schema at url, compiled once per run"""
+        with self._lock:
+            if url not in self._validators:
+                schema = self._get_schema(url, output)
+                validator_class = jsonschema.validators.validator_for(schema)
+                validator_class.check_schema(schema)
+                self._validators[url] = validator_class(schema)
+            return self._validators[url]
+
+    def get_schema(self, url, output):
+        with self._lock:
+            return self._get_schema(url, output)
+
+    def _get_schema(self, url, output):
+        if url not in self._schemas:
+            self._schemas[url] = self._load_schema(url, output)
+        return self._schemas[url]
+
+    def _load_schema(self, url, output):
+        """Get the schema at url from the cache while it is fresh, refreshing it when it is stale or the mode is refresh.
+        A schema which can't be refreshed is taken from the cache, then from the bundled copy."""
+        name = url.rstrip("/").rsplit("/", 1)[-1]
+        schema_path = os.path.join(self.cache_dir, name + ".json")
+        meta_path = os.path.join(self.cache_dir, name + ".meta.json")
+
+        schema = SchemaCache._read_json(schema_path)
+        meta = SchemaCache._read_json(meta_path) or {}
+        stale = schema is None or time.time() - meta.get("fetched", 0) > self.ttl
+        if SchemaCache.mode != "offline" and (stale or SchemaCache.mode == "refresh"):
+            try:
+                schema = self._fetch_schema(url, schema, meta, schema_path, meta_path, output)
+            except Exception as ex:
+                output.info("Could not refresh schema {0}, using the {1} copy. Error: {2}".format(
+                    url, "cached" if schema is not None else "bundled", ex))
+
+        if schema is None:
+            schema = SchemaCache._read_json(os.path.join(BUNDLED_SCHEMAS_DIR, name + ".json"))
+        if schema is None:
+            raise ValueError("Schema {0} is neither cached nor bundled. Run with --schema-cache refresh while online".format(url))
+        return schema
+
+    def _fetch_schema(self, url, schema, meta, schema_path, meta_path, output):
+        headers = {}
+        if schema is not None and meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+
+        response = requests.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304:
+            output.info("Schema {0} is up to date".format(url))
+        else:
+            response.raise_for_status()
+            schema = response.json()
+            output.info("Refreshed schema {0}".format(url))
+            os.makedirs(self.cache_dir, exist_ok=True)
+            SchemaCache._write_json(schema_path, schema)
+
+        SchemaCache._write_json(meta_path, {"url": url, "etag": response.headers.get("ETag", meta.get("etag")), "fetched": time.time()})
+        return schema
+
+    @staticmethod
+    def _read_json(path):
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_json(path, content):
+        # Concurrent runs never see a partially written file
+        with open(path + ".tmp", "w") as f:
+            json.dump(content, f)
+        os.replace(path + ".tmp", path)
@@ -0,0 +1,85 @@
+"""
+Benchmark the compilation and validation of createOptions on a synthetic solution with many modules.
+
+Usage: python scripts/benchmark_createoptions.py [--modules 500] [--size 3500] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from iotedgedev.createoptions import (TWIN_VALUE_MAX_CHUNKS, TWIN_VALUE_MAX_SIZE,  # noqa: E402
+                                      compile_create_options, get_chunk_name, validate_create_options)
+
+
+def get_modules(count, size):
+    modules = {}
+    for index in range(count):
+        create_options = {
+            "Env": ["MODULE_INDEX={0}".format(index), "LOG_LEVEL=debug"],
+            "HostConfig": {"PortBindings": {"{0}/tcp".format(5000 + index): [{"HostPort": str(5000 + index)}]}},
+            "Labels": {"padding": ""}
+        }
+        padding = size - len(json.dumps(create_options, separators=(',', ':')))
+        create_options["Labels"]["padding"] = "x" * max(padding, 0)
+        modules["module{0}".format(index)] = {"settings": {"createOptions": create_options}}
+    return modules
+
+
+def convert_with_regex(module_name, settings):
+    """The chunking and validation of createOptions before the createoptions module, as the baseline"""
+    create_options = json.dumps(settings["createOptions"], separators=(',', ':'))
+    options = [m for m in re.finditer("(.|[\r\n]){{1,{0}}}".format(TWIN_VALUE_MAX_SIZE), create_options)]
+    if len(options) > TWIN_VALUE_MAX_CHUNKS:
+        raise ValueError("Size of createOptions of {0} is too big. The maximum size of createOptions is 4K".format(module_name))
+    for i, option in enumerate(options):
+        settings[get_chunk_name(i)] = option.group()
+
+    merged = []
+    for i in range(TWIN_VALUE_MAX_CHUNKS):
+        if get_chunk_name(i) not in settings:
+            break
+        merged.append(str(settings[get_chunk_name(i)]))
+    json.loads("".join(merged).strip())
+
+
+def convert_with_compiler(module_name, settings):
+    chunks, valid = compile_create_options(module_name, settings["createOptions"])
+    for i, chunk in enumerate(chunks):
+        settings[get_chunk_name(i)] = chunk
+    validate_create_options(module_name, settings, known_valid=valid)
+
+
+def measure(convert, count, size, repeat):
+    best = None
+    for _ in range(repeat):
+        modules = get_modules(count, size)
+        start = time.perf_counter()
+        for module_name, module_info in modules.items():
+            convert(module_name, module_info["settings"])
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the createOptions compiler")
+    parser.add_argument("--modules", type=int, default=500, help="Number of modules in the synthetic solution")
+    parser.add_argument("--size", type=int, default=3500, help="Size of the minified createOptions of each module")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of runs, of which the fastest is reported")
+    args = parser.parse_args()
+
+    baseline = measure(convert_with_regex, args.modules, args.size, args.repeat)
+    compiled = measure(convert_with_compiler, args.modules, args.size, args.repeat)
+    print("{0} modules with {1} characters of createOptions".format(args.modules, args.size))
+    print("regex chunking and JSON validation: {0:.3f}s".format(baseline))
+    print("createoptions compiler:             {0:.3f}s ({1:.1f}x)".format(compiled, baseline / compiled))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Download the published deployment manifest and template schemas into iotedgedev/schemas, byte for byte,
+and record where and when they were fetched in iotedgedev/schemas/SOURCES.json.
+
+Usage: python scripts/update_schemas.py
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import sys
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from iotedgedev.constants import Constants  # noqa: E402
+from iotedgedev.schemacache import BUNDLED_SCHEMAS_DIR  # noqa: E402
+
+SCHEMA_URLS = [Constants.deployment_manifest_schema_url, Constants.deployment_template_schema_url]
+
+
+def main():
+    sources = {}
+    for url in SCHEMA_URLS:
+        response = requests.get(url, timeout=30)
+        response.raise_for_status()
+        # Fail before writing anything which is not a JSON schema, such as an error page
+        json.loads(response.content.decode("utf-8"))
+
+        name = url.rstrip("/").rsplit("/", 1)[-1] + ".json"
+        with open(os.path.join(BUNDLED_SCHEMAS_DIR, name), "wb") as f:
+            f.write(response.content)
+        sources[name] = {
+            "url": url,
+            "fetched": datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "etag": response.headers.get("ETag"),
+            "sha256": hashlib.sha256(response.content).hexdigest()
+        }
+        print("Saved {0} from {1}".format(name, url))
+
+    with open(os.path.join(BUNDLED_SCHEMAS_DIR, "SOURCES.json"), "w") as f:
+        json.dump(sources, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+from unittest import mock
+
+import docker
+import pytest
+
+from iotedgedev.buildcache import BuildCache, get_context_files
+from iotedgedev.buildprofile import BuildProfile
+
+pytestmark = pytest.mark.unit
+
+tag = "localhost:5000/filtermodule:0.0.1-amd64"
+
+
+@pytest.fixture
+def module_dir(tmp_path):
+    context = tmp_path / "filtermodule"
+    context.mkdir()
+    (context / "Dockerfile.amd64").write_text("FROM alpine\nCOPY . /app\n")
+    (context / "main.py").write_text("print('hello')\n")
+    (context / "model.bin").write_text("weights")
+    (context / ".dockerignore").write_text("# ignored files\n*.bin\n")
+    return context
+
+
+@pytest.fixture
+def build_profile(module_dir):
+    return BuildProfile(str(module_dir / "Dockerfile.amd64"), str(module_dir), [])
+
+
+def test_get_context_files(module_dir):
+    assert get_context_files(str(module_dir), ["Dockerfile.amd64"]) == [".dockerignore", "Dockerfile.amd64", "main.py"]
+
+
+def test_fingerprint_is_stable(tmp_path, build_profile):
+    build_cache = BuildCache(str(tmp_path / "cache"))
+    assert build_cache.get_fingerprint(tag, build_profile, {}) == build_cache.get_fingerprint(tag, build_profile, {})
+
+
+def test_fingerprint_changes_with_inputs(tmp_path, module_dir, build_profile):
+    build_cache = BuildCache(str(tmp_path / "cache"))
+    fingerprint = build_cache.get_fingerprint(tag, build_profile, {})
+
+    assert build_cache.get_fingerprint(tag.replace("0.0.1", "0.0.2"), build_profile, {}) != fingerprint
+    assert build_cache.get_fingerprint(tag, build_profile, {"buildargs": {"a": "b"}}) != fingerprint
+
+    (module_dir / "model.bin").write_text("new weights")
+    assert build_cache.get_fingerprint(tag, build_profile, {}) == fingerprint
+
+    (module_dir / "main.py").write_text("print('hello world')\n")
+    assert build_cache.get_fingerprint(tag, build_profile, {}) != fingerprint
+
+
+def test_fingerprint_changes_with_base_images(tmp_path, build_profile):
+    build_cache = BuildCache(str(tmp_path / "cache"))
+    fingerprint = build_cache.get_fingerprint(tag, build_profile, {}, ["sha256:1", "sha256:2"])
+
+    assert build_cache.get_fingerprint(tag, build_profile, {}, ["sha256:2", "sha256:1"]) == fingerprint
+    assert build_cache.get_fingerprint(tag, build_profile, {}, ["sha256:3", "sha256:2"]) != fingerprint
+    assert build_cache.get_fingerprint(tag, build_profile, {}) != fingerprint
+
+
+def test_file_hash_is_reused_when_unchanged(tmp_path, module_dir):
+    build_cache = BuildCache(str(tmp_path / "cache"))
+    path = str(module_dir / "main.py")
+    file_hash = build_cache.get_file_hash(path)
+
+    with mock.patch("builtins.open", side_effect=AssertionError("file should not be rehashed")):
+        assert build_cache.get_file_hash(path) == file_hash
+
+
+def test_is_up_to_date(tmp_path, build_profile):
+    docker_client = mock.MagicMock()
+    docker_client.images.get.return_value.id = "sha256:1234"
+
+    build_cache = BuildCache(str(tmp_path / "cache"))
+    fingerprint = build_cache.get_fingerprint(tag, build_profile, {})
+    assert not build_cache.is_up_to_date(tag, fingerprint, docker_client)
+
+    build_cache.update(tag, fingerprint, "sha256:1234")
+    build_cache.save()
+
+    build_cache = BuildCache(str(tmp_path / "cache"))
+    assert build_cache.is_up_to_date(tag, fingerprint, docker_client)
+    assert not build_cache.is_up_to_date(tag, "other", docker_client)
+
+    docker_client.images.get.return_value.id = "sha256:5678"
+    assert not build_cache.is_up_to_date(tag, fingerprint, docker_client)
+
+    docker_client.images.get.side_effect = docker.errors.ImageNotFound("not found")
+    assert not build_cache.is_up_to_date(tag, fingerprint, docker_client)
+
+
+def test_get_last_used(tmp_path):
+    build_cache = BuildCache(str(tmp_path / "cache"))
+    assert build_cache.get_last_used(tag) is None
+
+    with mock.patch("iotedgedev.buildcache.time.time", return_value=1000.0):
+        build_cache.update(tag, "fingerprint", "sha256:1234")
+    assert build_cache.get_last_used(tag) == 1000.0
@@ -0,0 +1,81 @@
+import os
+import tarfile
+from unittest import mock
+
+import docker
+import pytest
+
+from iotedgedev.buildcontext import BuildContextCache
+from iotedgedev.buildprofile import BuildProfile
+from iotedgedev.output import Output
+
+pytestmark = pytest.mark.unit
+
+
+def write_file(path, content=""):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+@pytest.fixture
+def context_path(tmp_path):
+    write_file(str(tmp_path / "Dockerfile.amd64"), "FROM alpine")
+    write_file(str(tmp_path / "Dockerfile.arm32v7"), "FROM alpine")
+    write_file(str(tmp_path / "main.py"), "print('hello')")
+    write_file(str(tmp_path / "model" / "weights.bin"), "0" * 1024)
+    write_file(str(tmp_path / "bin" / "out.txt"))
+    write_file(str(tmp_path / ".dockerignore"), "bin\n")
+    return str(tmp_path)
+
+
+@pytest.fixture
+def build_context_cache():
+    build_context_cache = BuildContextCache(Output())
+    yield build_context_cache
+    build_context_cache.cleanup()
+
+
+def get_profile(context_path, dockerfile):
+    return BuildProfile(os.path.join(context_path, dockerfile), context_path, [])
+
+
+def get_names(context):
+    with context, tarfile.open(fileobj=context) as tar:
+        return sorted(tar.getnames())
+
+
+def test_archive_shared_by_dockerfiles(context_path, build_context_cache):
+    with mock.patch("docker.utils.build.tar", wraps=docker.utils.build.tar) as tar:
+        amd64 = build_context_cache.open(get_profile(context_path, "Dockerfile.amd64"))
+        arm32v7 = build_context_cache.open(get_profile(context_path, "Dockerfile.arm32v7"))
+
+    assert tar.call_count == 1
+    assert amd64.name == arm32v7.name
+    assert get_names(amd64) == [".dockerignore", "Dockerfile.amd64", "Dockerfile.arm32v7", "main.py", "model", "model/weights.bin"]
+    arm32v7.close()
+
+
+def test_ignored_dockerfile_not_shared(context_path, build_context_cache):
+    write_file(os.path.join(context_path, ".dockerignore"), "bin\nDockerfile*\n")
+
+    amd64 = build_context_cache.open(get_profile(context_path, "Dockerfile.amd64"))
+    arm32v7 = build_context_cache.open(get_profile(context_path, "Dockerfile.arm32v7"))
+
+    assert amd64.name != arm32v7.name
+    assert "Dockerfile.arm32v7" not in get_names(amd64)
+    assert "Dockerfile.amd64" not in get_names(arm32v7)
+
+
+def test_dockerfile_outside_context(context_path, build_context_cache):
+    profile = BuildProfile(os.path.join(context_path, "Dockerfile.amd64"), os.path.join(context_path, "model"), [])
+    assert build_context_cache.open(profile) is None
+
+
+def test_cleanup(context_path, build_context_cache):
+    build_context_cache.open(get_profile(context_path, "Dockerfile.amd64")).close()
+    archive_dir = build_context_cache.archive_dir
+    assert os.path.isdir(archive_dir)
+
+    build_context_cache.cleanup()
+    assert not os.path.exists(archive_dir)
@@ -153,3 +153,26 @@ def test_filtered_valid_build_options():
     }
     build_options_parser = BuildOptionsParser(build_options)
     assert sdk_options == build_options_parser.parse_build_options()
+
+
+def test_get_cli_build_options():
+    build_options = [
+        "--rm",
+        "--build-arg a=b",
+        "--ulimit nofile=1024:1024",
+        "--no-cache"
+    ]
+    build_options_parser = BuildOptionsParser(build_options)
+    assert build_options_parser.get_cli_build_options() == [("--build-arg", "a=b"), ("--ulimit", "nofile=1024:1024"), ("--no-cache", None)]
+    assert BuildOptionsParser(None).get_cli_build_options() == []
+
+
+def test_get_build_args():
+    build_options = [
+        "--build-arg a=b",
+        "--build-arg=c=d=e",
+        "--build-arg f",
+        "--no-cache"
+    ]
+    assert BuildOptionsParser(build_options).get_build_args() == {"a": "b", "c": "d=e", "f": None}
+    assert BuildOptionsParser(None).get_build_args() == {}
@@ -0,0 +1,174 @@
+import threading
+import time
+
+import pytest
+
+from iotedgedev.buildscheduler import BuildResult, BuildScheduler
+from iotedgedev.output import Output
+
+pytestmark = pytest.mark.unit
+
+tags = ["localhost:5000/module{0}:0.0.1-amd64".format(i) for i in range(6)]
+
+
+def test_run_all_tags_in_order():
+    processed = []
+    scheduler = BuildScheduler(Output())
+    results = scheduler.run(tags, lambda tag, output: processed.append(tag))
+
+    assert processed == tags
+    assert [result.tag for result in results] == tags
+    assert all(result.succeeded for result in results)
+
+
+def test_run_bounded_parallelism():
+    lock = threading.Lock()
+    running = []
+    max_running = []
+
+    def task(tag, output):
+        with lock:
+            running.append(tag)
+            max_running.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.remove(tag)
+
+    scheduler = BuildScheduler(Output(), jobs=3)
+    results = scheduler.run(tags, task)
+
+    assert all(result.succeeded for result in results)
+    assert max(max_running) == 3
+
+
+def test_fail_fast():
+    def task(tag, output):
+        if tag == tags[1]:
+            raise ValueError("build failed")
+
+    scheduler = BuildScheduler(Output())
+    results = scheduler.run(tags, task)
+
+    assert results[0].succeeded
+    assert results[1].failed
+    assert all(result.status == BuildResult.SKIPPED for result in results[2:])
+    with pytest.raises(ValueError, match="build failed"):
+        scheduler.raise_on_failure(results)
+
+
+def test_keep_going():
+    def task(tag, output):
+        if tag in tags[1:3]:
+            raise ValueError("build failed")
+
+    scheduler = BuildScheduler(Output(), jobs=2, keep_going=True)
+    results = scheduler.run(tags, task)
+
+    assert [result.status for result in results] == [BuildResult.SUCCEEDED, BuildResult.FAILED, BuildResult.FAILED,
+                                                     BuildResult.SUCCEEDED, BuildResult.SUCCEEDED, BuildResult.SUCCEEDED]
+    with pytest.raises(Exception, match="Failed to process 2 of 6 images"):
+        scheduler.raise_on_failure(results)
+
+
+def test_invalid_jobs():
+    with pytest.raises(ValueError):
+        BuildScheduler(Output(), jobs=0)
+
+
+def test_get_display_name():
+    assert BuildScheduler.get_display_name("localhost:5000/filtermodule:0.0.1-amd64") == "filtermodule:0.0.1-amd64"
+    assert BuildScheduler.get_display_name("filtermodule:0.0.1-amd64") == "filtermodule:0.0.1-amd64"
+
+
+def test_pipelined_push_overlaps_builds():
+    events = []
+    lock = threading.Lock()
+
+    def build(tag, output):
+        time.sleep(0.05)
+        with lock:
+            events.append(("build", tag))
+
+    def push(tag, output):
+        with lock:
+            events.append(("push", tag))
+
+    scheduler = BuildScheduler(Output(), jobs=1, push_jobs=2)
+    results = scheduler.run(tags, build, push)
+
+    assert all(result.succeeded for result in results)
+    # Every image is pushed right after its own build, before the last image is built
+    assert events.index(("push", tags[0])) < events.index(("build", tags[-1]))
+    for tag in tags:
+        assert events.index(("build", tag)) < events.index(("push", tag))
+
+
+def test_pipelined_build_failure_skips_push():
+    pushed = []
+
+    def build(tag, output):
+        if tag == tags[0]:
+            raise ValueError("build failed")
+
+    scheduler = BuildScheduler(Output(), jobs=1, keep_going=True, push_jobs=1)
+    results = scheduler.run(tags, build, lambda tag, output: pushed.append(tag))
+
+    assert results[0].failed
+    assert pushed == tags[1:]
+
+
+def test_push_only():
+    pushed = []
+    scheduler = BuildScheduler(Output(), push_jobs=2)
+    results = scheduler.run(tags, None, lambda tag, output: pushed.append(tag))
+
+    assert all(result.succeeded for result in results)
+    assert sorted(pushed) == sorted(tags)
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_dependencies_built_first(jobs):
+    lock = threading.Lock()
+    events = []
+
+    def build(tag, output):
+        with lock:
+            events.append(("start", tag))
+        time.sleep(0.02)
+        with lock:
+            events.append(("end", tag))
+
+    # module0 <- module1 <- module2, module0 <- module3
+    dependencies = {tags[2]: [tags[1]], tags[1]: [tags[0]], tags[3]: [tags[0], "mcr.microsoft.com/dotnet/runtime:6.0"]}
+    scheduler = BuildScheduler(Output(), jobs=jobs)
+    results = scheduler.run(list(reversed(tags)), build, dependencies=dependencies)
+
+    assert all(result.succeeded for result in results)
+    for tag, tag_dependencies in dependencies.items():
+        for dependency in tag_dependencies:
+            if dependency in tags:
+                assert events.index(("end", dependency)) < events.index(("start", tag))
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_dependencies_of_failed_build_skipped(jobs):
+    def build(tag, output):
+        if tag == tags[0]:
+            raise ValueError("build failed")
+
+    dependencies = {tags[1]: [tags[0]], tags[2]: [tags[1]]}
+    scheduler = BuildScheduler(Output(), jobs=jobs, keep_going=True)
+    results = dict((result.tag, result) for result in scheduler.run(tags, build, dependencies=dependencies))
+
+    assert results[tags[0]].failed
+    assert results[tags[1]].status == BuildResult.SKIPPED
+    assert results[tags[2]].status == BuildResult.SKIPPED
+    assert all(results[tag].succeeded for tag in tags[3:])
+
+
+def test_sort_tags():
+    dependencies = {tags[0]: {tags[2]}, tags[2]: {tags[1]}}
+    assert BuildScheduler.sort_tags(tags, dependencies) == [tags[1], tags[3], tags[4], tags[5], tags[2], tags[0]]
+
+    with pytest.raises(ValueError, match="Circular dependency"):
+        BuildScheduler.sort_tags(tags, {tags[0]: {tags[1]}, tags[1]: {tags[0]}})
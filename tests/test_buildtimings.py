@@ -0,0 +1,57 @@
+import json
+from unittest import mock
+
+import pytest
+
+from iotedgedev.buildtimings import BuildTimings
+from iotedgedev.output import Output
+
+pytestmark = pytest.mark.unit
+
+tag = "localhost:5000/filtermodule:0.0.1-amd64"
+
+
+@pytest.fixture
+def timings():
+    timings = BuildTimings()
+    with mock.patch("time.time", side_effect=[1.0, 3.0, 3.0, 4.5, 5.0, 5.0, 7.0]):
+        with timings.measure("load deployment manifest"):
+            pass
+        with timings.measure("build", tag):
+            pass
+        timings.step(tag, "Step 1/2 : FROM alpine")
+        timings.step(tag, "Step 2/2 : RUN make")
+        timings.step(tag, None)
+    timings.add("build", 0.5, tag)
+    timings.add_step("localhost:5000/othermodule:0.0.1-amd64", "#5 [2/2] RUN make", 12.0)
+    return timings
+
+
+def test_to_dict(timings):
+    content = timings.to_dict()
+
+    assert content["version"] == 1
+    assert content["phases"] == {"load deployment manifest": 2.0}
+    assert content["images"][tag] == {
+        "phases": {"build": 2.0},
+        "steps": [{"name": "Step 1/2 : FROM alpine", "duration": 0.0}, {"name": "Step 2/2 : RUN make", "duration": 2.0}]
+    }
+    assert content["images"]["localhost:5000/othermodule:0.0.1-amd64"]["steps"] == [{"name": "#5 [2/2] RUN make", "duration": 12.0}]
+
+
+def test_save(timings, tmp_path):
+    timings_file = str(tmp_path / "timings.json")
+    timings.save(timings_file)
+
+    with open(timings_file) as f:
+        assert json.load(f)["images"][tag]["phases"] == {"build": 2.0}
+
+
+def test_print_summary(timings):
+    output = mock.MagicMock(spec=Output)
+    timings.print_summary(output, slowest_steps=1)
+
+    lines = [call[0][0] for call in output.info.call_args_list]
+    assert any(line.startswith("load deployment manifest") and line.endswith("2.0s") for line in lines)
+    assert any(line.startswith("filtermodule:0.0.1-amd64") and line.endswith("2.0s") for line in lines)
+    assert lines[-1].split() == ["12.0s", "othermodule:0.0.1-amd64", "#5", "[2/2]", "RUN", "make"]
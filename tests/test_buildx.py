@@ -0,0 +1,56 @@
+import os
+from unittest import mock
+
+import pytest
+
+from iotedgedev.buildprofile import BuildProfile
+from iotedgedev.buildx import Buildx
+from iotedgedev.output import Output
+
+pytestmark = pytest.mark.unit
+
+tag = "localhost:5000/filtermodule:0.0.1-amd64"
+
+
+@pytest.fixture
+def build_profile(tmp_path):
+    return BuildProfile(str(tmp_path / "Dockerfile.amd64"), str(tmp_path), [], "buildx")
+
+
+def test_get_build_command(build_profile):
+    buildx = Buildx(Output(), mock.MagicMock())
+    cmd = buildx.get_build_command(tag, build_profile, [("--build-arg", "a=b"), ("--no-cache", None)])
+
+    assert cmd == ["docker", "buildx", "build", "--load", "--progress", "plain", "--tag", tag, "--file", build_profile.dockerfile,
+                   "--build-arg", "a=b", "--no-cache", build_profile.context_path]
+
+
+def test_get_build_command_with_builder_and_cache(tmp_path, build_profile):
+    buildx = Buildx(Output(), mock.MagicMock(), "edgebuilder")
+    cache_dir = str(tmp_path / "cache")
+    cache_path = os.path.join(cache_dir, "filtermodule-Dockerfile.amd64")
+
+    cmd = buildx.get_build_command(tag, build_profile, [], cache_dir)
+    assert cmd[cmd.index("--builder") + 1] == "edgebuilder"
+    assert "--cache-from" not in cmd
+    assert cmd[cmd.index("--cache-to") + 1] == "type=local,dest={0},mode=max".format(cache_path)
+
+    os.makedirs(cache_path)
+    cmd = buildx.get_build_command(tag, build_profile, [], cache_dir)
+    assert cmd[cmd.index("--cache-from") + 1] == "type=local,src={0}".format(cache_path)
+
+
+def test_get_cache_name(build_profile):
+    assert Buildx.get_cache_name(tag, build_profile) == "filtermodule-Dockerfile.amd64"
+    assert Buildx.get_cache_name("myregistry.azurecr.io/team/filtermodule:0.0.2-amd64", build_profile) == "team_filtermodule-Dockerfile.amd64"
+
+
+def test_build_runs_with_daemon_env(build_profile):
+    buildx = Buildx(Output(), mock.MagicMock())
+    env = {"DOCKER_CONTEXT": "buildhost"}
+    with mock.patch("iotedgedev.buildx.subprocess.Popen") as popen:
+        popen.return_value.stdout.readline.return_value = b""
+        popen.return_value.returncode = 0
+        buildx.build(tag, build_profile, [], env=env)
+
+    assert popen.call_args[1]["env"] is env
@@ -0,0 +1,68 @@
+import os
+from unittest import mock
+
+import pytest
+
+from iotedgedev.configcache import ConfigCache, get_referenced_envvars
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    template_file = tmp_path / "deployment.template.json"
+    template_file.write_text('{"image": "${MODULES.filtermodule}", "registry": "$CONTAINER_REGISTRY_SERVER", "version": "${EDGE_RUNTIME_VERSION}"}')
+    module_json_file = tmp_path / "module.json"
+    module_json_file.write_text('{"image": {"repository": "${CONTAINER_REGISTRY_SERVER}/filtermodule"}}')
+    manifest_path = tmp_path / "config" / "deployment.amd64.json"
+    manifest_path.parent.mkdir()
+    manifest_path.write_text("{}")
+    return str(template_file), str(module_json_file), str(manifest_path)
+
+
+def test_get_referenced_envvars():
+    assert get_referenced_envvars('"${MODULES.filtermodule}" "$CONTAINER_TAG" "${EDGE_RUNTIME_VERSION}" "$$"') == set(["CONTAINER_TAG", "EDGE_RUNTIME_VERSION"])
+
+
+@mock.patch.dict(os.environ, {"CONTAINER_REGISTRY_SERVER": "localhost:5000", "EDGE_RUNTIME_VERSION": "1.2"})
+def test_fingerprint_changes_with_inputs(tmp_path, inputs):
+    template_file, module_json_file, _ = inputs
+    config_cache = ConfigCache(str(tmp_path / "cache"))
+
+    def get_fingerprint(platform="amd64"):
+        return config_cache.get_fingerprint(template_file, [module_json_file], platform, {"filtermodule": "localhost:5000/filtermodule:0.0.1-amd64"})
+
+    fingerprint = get_fingerprint()
+    assert get_fingerprint() == fingerprint
+    assert get_fingerprint("arm32v7") != fingerprint
+
+    with mock.patch.dict(os.environ, {"EDGE_RUNTIME_VERSION": "1.3"}):
+        assert get_fingerprint() != fingerprint
+    # Variables which aren't referenced don't matter
+    with mock.patch.dict(os.environ, {"OTHER_VARIABLE": "value"}):
+        assert get_fingerprint() == fingerprint
+
+    with open(module_json_file, "a") as f:
+        f.write(" ")
+    assert get_fingerprint() != fingerprint
+
+
+def test_get_up_to_date(tmp_path, inputs):
+    _, _, manifest_path = inputs
+    config_cache = ConfigCache(str(tmp_path / "cache"))
+    assert config_cache.get_up_to_date(manifest_path, "fingerprint") is None
+
+    config_cache.update(manifest_path, "fingerprint", True)
+    config_cache.save()
+
+    config_cache = ConfigCache(str(tmp_path / "cache"))
+    assert config_cache.get_up_to_date(manifest_path, "fingerprint")["valid"]
+    assert config_cache.get_up_to_date(manifest_path, "other") is None
+
+    # The manifest was edited by hand
+    with open(manifest_path, "w") as f:
+        f.write('{"edited": true}')
+    assert config_cache.get_up_to_date(manifest_path, "fingerprint") is None
+
+    os.remove(manifest_path)
+    assert config_cache.get_up_to_date(manifest_path, "fingerprint") is None
@@ -0,0 +1,97 @@
+import datetime
+import time
+import zipfile
+from unittest import mock
+
+import docker
+import pytest
+
+from iotedgedev.containerlogs import ContainerLogs, parse_since, parse_tail, split_timestamp
+
+pytestmark = pytest.mark.unit
+
+
+def test_parse_since():
+    assert parse_since(None) is None
+    assert parse_since("1622548800") == 1622548800
+    assert parse_since("2021-06-01T12:00:00Z") == 1622548800
+    assert parse_since("2021-06-01") == int(time.mktime(datetime.datetime(2021, 6, 1).timetuple()))
+    assert parse_since("2021-06-01T12:00:00") == int(time.mktime(datetime.datetime(2021, 6, 1, 12).timetuple()))
+
+    # Durations are epoch timestamps, which the Docker SDK doesn't shift by the local UTC offset
+    with mock.patch("iotedgedev.containerlogs.time.time", return_value=1622548800.5):
+        assert parse_since("10m") == 1622548200
+        assert parse_since("2h") == 1622541600
+
+    with pytest.raises(ValueError):
+        parse_since("yesterday")
+
+
+def test_parse_tail():
+    assert parse_tail(None) == "all"
+    assert parse_tail("all") == "all"
+    assert parse_tail("100") == 100
+    with pytest.raises(ValueError):
+        parse_tail("many")
+
+
+def test_save(tmp_path):
+    containers = {
+        "edgeHub": [b"hub line 1\n", b"hub line 2\n"],
+        "filtermodule": [b"filter line\n"]
+    }
+
+    def get_container(name):
+        if name not in containers:
+            raise docker.errors.NotFound("No such container: " + name)
+        container = mock.MagicMock()
+        container.logs.return_value = iter(containers[name])
+        return container
+
+    docker_client = mock.MagicMock()
+    docker_client.containers.get.side_effect = get_container
+    output = mock.MagicMock()
+    zip_path = str(tmp_path / "edge-logs.zip")
+
+    saved = ContainerLogs(docker_client, output).save(["edgeHub", "missing", "filtermodule"], zip_path, tail="10")
+
+    assert sorted(saved) == ["edgeHub", "filtermodule"]
+    output.error.assert_any_call("Error while trying to save module log file 'missing'")
+    with zipfile.ZipFile(zip_path) as zip_file:
+        assert sorted(zip_file.namelist()) == ["edgeHub.log", "filtermodule.log"]
+        assert zip_file.read("edgeHub.log") == b"hub line 1\nhub line 2\n"
+        assert zip_file.read("filtermodule.log") == b"filter line\n"
+
+
+def test_split_timestamp():
+    assert split_timestamp("2021-06-01T12:00:00.123456789Z Started") == ("12:00:00.123", "Started")
+    assert split_timestamp("2021-06-01T12:00:00Z Started") == ("12:00:00.000", "Started")
+    assert split_timestamp("Started") == ("", "Started")
+
+
+def test_follow():
+    containers = {
+        "edgeHub": [b"2021-06-01T12:00:00.1Z hub ", b"line 1\n2021-06-01T12:00:01.2Z hub error\n"],
+        "filtermodule": [b"2021-06-01T12:00:00.5Z filter error\n2021-06-01T12:00:02Z filter line"]
+    }
+
+    def get_container(name):
+        if name not in containers:
+            raise docker.errors.NotFound("No such container: " + name)
+        container = mock.MagicMock()
+        container.logs.return_value = iter(containers[name])
+        return container
+
+    docker_client = mock.MagicMock()
+    docker_client.containers.get.side_effect = get_container
+    output = mock.MagicMock()
+
+    counts = ContainerLogs(docker_client, output).follow(["edgeHub", "filtermodule", "missing"], pattern="error")
+
+    assert counts == {"edgeHub": 1, "filtermodule": 1, "missing": 0}
+    lines = [call[0][0] for call in output.echo.call_args_list]
+    assert "edgeHub      12:00:01.200 hub error" in lines
+    assert "filtermodule 12:00:00.500 filter error" in lines
+    assert len(lines) == 2
+    output.error.assert_any_call("Error while trying to follow module log 'missing'")
+    output.info.assert_any_call("missing log ended")
@@ -0,0 +1,87 @@
+import json
+import re
+
+import pytest
+
+from iotedgedev.createoptions import (TWIN_VALUE_MAX_SIZE, compile_create_options, get_chunk_name,
+                                      get_create_options_chunks, validate_create_options)
+
+pytestmark = pytest.mark.unit
+
+
+def get_create_options(size):
+    """Get createOptions whose minified JSON is at least size characters, and exactly size for large sizes"""
+    create_options = {"Env": ["LINE=a\r\nb"], "Labels": {"padding": ""}}
+    padding = size - len(json.dumps(create_options, separators=(',', ':')))
+    create_options["Labels"]["padding"] = "x" * max(padding, 0)
+    return create_options
+
+
+def test_get_chunk_name():
+    assert get_chunk_name(0) == "createOptions"
+    assert get_chunk_name(1) == "createOptions01"
+    assert get_chunk_name(7) == "createOptions07"
+
+
+@pytest.mark.parametrize("size", [0, 100, TWIN_VALUE_MAX_SIZE, TWIN_VALUE_MAX_SIZE + 1, 3000, 8 * TWIN_VALUE_MAX_SIZE])
+def test_compile_create_options_matches_regex_chunking(size):
+    create_options = get_create_options(size)
+    minified = json.dumps(create_options, separators=(',', ':'))
+    expected = [m.group() for m in re.finditer("(.|[\r\n]){{1,{0}}}".format(TWIN_VALUE_MAX_SIZE), minified)]
+
+    chunks, valid = compile_create_options("tempSensor", create_options)
+
+    assert chunks == expected
+    assert "".join(chunks) == minified
+    assert valid is True
+
+
+def test_compile_create_options_string():
+    create_options = "{\"HostConfig\":\r\n{}}" + " " * TWIN_VALUE_MAX_SIZE
+
+    chunks, valid = compile_create_options("tempSensor", create_options)
+
+    assert len(chunks) == 2
+    assert "".join(chunks) == create_options
+    assert valid is None
+
+
+def test_compile_create_options_empty_string():
+    assert compile_create_options("tempSensor", "") == ([], None)
+
+
+def test_compile_create_options_too_big():
+    with pytest.raises(ValueError, match="Size of createOptions of tempSensor is too big"):
+        compile_create_options("tempSensor", get_create_options(8 * TWIN_VALUE_MAX_SIZE + 1))
+
+
+def test_get_create_options_chunks_stops_at_missing_chunk():
+    settings = {"createOptions": "{", "createOptions01": "}", "createOptions03": "ignored"}
+
+    assert get_create_options_chunks(settings) == [("createOptions", "{"), ("createOptions01", "}")]
+
+
+def test_validate_create_options_passes():
+    chunks, _ = compile_create_options("tempSensor", get_create_options(2000))
+    settings = dict((get_chunk_name(i), chunk) for i, chunk in enumerate(chunks))
+
+    assert validate_create_options("tempSensor", settings) == []
+
+
+def test_validate_create_options_warnings():
+    settings = {"createOptions": "{\"HostConfig\":", "createOptions01": "x" * (TWIN_VALUE_MAX_SIZE + 1)}
+
+    warnings = validate_create_options("tempSensor", settings)
+
+    assert warnings[0] == "Length of createOptions01 in module tempSensor exceeds 512"
+    assert warnings[1].startswith("createOptions of module tempSensor is not a valid JSON string. Error: ")
+
+
+def test_validate_create_options_not_object():
+    assert validate_create_options("tempSensor", {"createOptions": "[]"}) == ["createOptions of module tempSensor should be an object"]
+
+
+def test_validate_create_options_known_valid_skips_json():
+    settings = {"createOptions": "{\"HostConfig\":"}
+
+    assert validate_create_options("tempSensor", settings, known_valid=True) == []
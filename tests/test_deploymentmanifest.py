@@ -1,11 +1,15 @@
 import json
 import os
+from unittest import mock
 
 import pytest
+import requests
 
+from iotedgedev.constants import Constants
 from iotedgedev.deploymentmanifest import DeploymentManifest
 from iotedgedev.envvars import EnvVars
 from iotedgedev.output import Output
+from iotedgedev.schemacache import SchemaCache
 from iotedgedev.utility import Utility
 
 from .utility import assert_list_equal
@@ -104,3 +108,60 @@ def test_expand_image_placeholders(deployment_manifest):
 def test_get_image_placeholder():
     assert DeploymentManifest.get_image_placeholder("filtermodule") == "${MODULES.filtermodule}"
     assert DeploymentManifest.get_image_placeholder("filtermodule", True) == "${MODULES.filtermodule.debug}"
+
+
+def test_copy(deployment_manifest):
+    deployment_manifest = deployment_manifest(test_file_1)
+    deployment_manifest_copy = deployment_manifest.copy()
+    deployment_manifest_copy.expand_image_placeholders({"csharpmodule": "localhost:5000/csharpmodule:0.0.1-amd64"})
+
+    assert deployment_manifest_copy.path == deployment_manifest.path
+    assert deployment_manifest_copy.get_user_modules()["csharpmodule"]["settings"]["image"] == "localhost:5000/csharpmodule:0.0.1-amd64"
+    assert deployment_manifest.get_user_modules()["csharpmodule"]["settings"]["image"] == "${MODULES.csharpmodule.amd64}"
+
+
+def test_module_content_split_is_cached(deployment_manifest):
+    deployment_manifest = deployment_manifest(test_file_1)
+
+    with mock.patch.object(DeploymentManifest, "dot_to_json", wraps=DeploymentManifest.dot_to_json) as dot_to_json:
+        deployment_manifest.get_all_modules()
+        deployment_manifest.convert_create_options()
+        deployment_manifest._validate_create_options()
+    top_level_calls = [call for call in dot_to_json.call_args_list if call[0][0] is deployment_manifest.json["modulesContent"]]
+    assert len(top_level_calls) == 1
+
+
+def test_module_content_split_follows_changes(deployment_manifest):
+    deployment_manifest = deployment_manifest(test_file_1)
+    assert "csharpmodule2" not in deployment_manifest.get_user_modules()
+
+    deployment_manifest.add_module_template("csharpmodule2")
+    assert "csharpmodule2" in deployment_manifest.get_user_modules()
+    assert "csharpmodule2ToIoTHub" in deployment_manifest.get_desired_property("$edgeHub", "routes")
+
+    deployment_manifest.del_key(["modulesContent", "$edgeAgent", "properties.desired", "modules", "csharpmodule2"])
+    assert "csharpmodule2" not in deployment_manifest.get_user_modules()
+
+    deployment_manifest.get_user_modules()["tempSensor"]["settings"]["image"] = "localhost:5000/tempsensor:0.0.1-amd64"
+    assert deployment_manifest.json["modulesContent"]["$edgeAgent"]["properties.desired"]["modules"]["tempSensor"]["settings"]["image"] == \
+        "localhost:5000/tempsensor:0.0.1-amd64"
+
+
+def test_validate_deployment_manifest_without_network_or_cache(deployment_manifest, tmp_path):
+    """With no network and an empty cache, the manifest is still validated, against the bundled schema"""
+    name = Constants.deployment_manifest_schema_url.rsplit("/", 1)[-1]
+    bundled_dir = tmp_path / "bundled"
+    bundled_dir.mkdir()
+    (bundled_dir / (name + ".json")).write_text(json.dumps({"type": "object", "required": ["modulesContent", "missing"]}))
+
+    with mock.patch.dict(SchemaCache._instances, {None: SchemaCache(str(tmp_path / "cache"))}), \
+            mock.patch("iotedgedev.schemacache.BUNDLED_SCHEMAS_DIR", str(bundled_dir)), \
+            mock.patch("iotedgedev.schemacache.requests.get", side_effect=requests.exceptions.ConnectionError("no network")):
+        invalid_manifest = deployment_manifest(os.path.join(test_assets_dir, "deployment.manifest_invalid_schema.json"))
+        assert not invalid_manifest._validate_deployment_manifest_schema()
+
+        SchemaCache.mode = "offline"
+        try:
+            assert not invalid_manifest._validate_deployment_manifest_schema()
+        finally:
+            SchemaCache.mode = "auto"
@@ -0,0 +1,223 @@
+from unittest import mock
+
+import pytest
+
+from iotedgedev.dockercls import Docker
+from iotedgedev.envvars import ContainerRegistry
+from iotedgedev.output import Output
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def docker():
+    envvars = mock.MagicMock()
+    envvars.CONTAINER_REGISTRY_MAP = {
+        "": ContainerRegistry("localhost:5000", "", ""),
+        "ACR": ContainerRegistry("myregistry.azurecr.io", "user", "password")
+    }
+    with mock.patch("iotedgedev.dockercls.DockerSession.get") as get_session:
+        get_session.return_value.registries = set()
+        yield Docker(envvars, mock.MagicMock(), Output())
+
+
+def mock_image(image_id, tags, size):
+    image = mock.MagicMock()
+    image.id = image_id
+    image.tags = tags
+    image.attrs = {"Size": size}
+    return image
+
+
+def mock_container(name):
+    container = mock.MagicMock()
+    container.name = name
+    return container
+
+
+@pytest.fixture
+def modules_docker(docker):
+    user_modules = {
+        "filtermodule": {"settings": {"image": "localhost:5000/filtermodule:0.0.1-amd64"}},
+        "SensorModule": {"settings": {"image": "myregistry.azurecr.io/tempsensor:0.0.1-amd64"}}
+    }
+    docker.images = [
+        mock_image("sha256:1", ["localhost:5000/filtermodule:0.0.1-amd64", "localhost:5000/filtermodule:0.0.2-amd64"], 1024 * 1024),
+        mock_image("sha256:2", ["myregistry.azurecr.io/tempsensor:0.0.1-amd64"], 2 * 1024 * 1024),
+        mock_image("sha256:3", ["localhost:5000/sensormodule:0.0.1-amd64"], 1024 * 1024),
+        mock_image("sha256:4", ["localhost:5000/filtermoduleextra:0.0.1-amd64"], 1024 * 1024),
+        mock_image("sha256:5", ["mcr.microsoft.com/azureiotedge-hub:1.2"], 1024 * 1024)
+    ]
+    docker.containers = [mock_container("filtermodule"), mock_container("edgeHub"), mock_container("SensorModule")]
+    docker.docker_client.images.list.return_value = docker.images
+    docker.docker_client.containers.list.return_value = docker.containers
+
+    with mock.patch("iotedgedev.dockercls.DeploymentManifest") as deployment_manifest:
+        deployment_manifest.return_value.get_user_modules.return_value = user_modules
+        yield docker
+
+
+def test_remove_modules(modules_docker):
+    output = mock.MagicMock(spec=Output)
+    modules_docker.output = output
+    modules_docker.remove_modules(jobs=2)
+
+    assert modules_docker.docker_client.images.list.call_count == 1
+    removed_images = sorted(call[1]["image"] for call in modules_docker.docker_client.images.remove.call_args_list)
+    assert removed_images == ["sha256:1", "sha256:2", "sha256:3"]
+    modules_docker.containers[0].remove.assert_called_once_with(force=True)
+    modules_docker.containers[1].remove.assert_not_called()
+    modules_docker.containers[2].remove.assert_called_once_with(force=True)
+    output.info.assert_any_call("Reclaimed up to 4.0 MB by removing 3 images")
+
+
+def test_remove_modules_dry_run(modules_docker):
+    output = mock.MagicMock(spec=Output)
+    modules_docker.output = output
+    modules_docker.remove_modules(dry_run=True)
+
+    modules_docker.docker_client.images.remove.assert_not_called()
+    for container in modules_docker.containers:
+        container.remove.assert_not_called()
+    output.info.assert_any_call("Would reclaim up to 4.0 MB by removing 3 images")
+
+
+def test_init_registry_targeted_servers_once(docker):
+    with mock.patch.object(docker, "init_local_registry") as init_local_registry:
+        docker.init_registry({"myregistry.azurecr.io"})
+        init_local_registry.assert_not_called()
+
+        docker.init_registry({"localhost:5000", "myregistry.azurecr.io"})
+        docker.init_registry({"localhost:5000"})
+        init_local_registry.assert_called_once_with("localhost:5000")
+    assert docker.session.registries == {"localhost:5000", "myregistry.azurecr.io"}
+
+
+def test_init_registry_all(docker):
+    with mock.patch.object(docker, "init_local_registry"):
+        docker.init_registry()
+    assert docker.session.registries == {"localhost:5000", "myregistry.azurecr.io"}
+
+
+def test_setup_registry_skips_images_in_sync(docker):
+    docker.envvars.EDGE_RUNTIME_VERSION = "1.2"
+    docker.docker_client.images.pull.return_value = "pulled"
+    in_sync = set(["mcr.microsoft.com/azureiotedge-agent:1.2", "localhost:5000/azureiotedge-agent:1.2", "mcr.microsoft.com/azureiotedge-hub:1.2"])
+
+    with mock.patch.object(Docker, "is_in_registry", side_effect=lambda image_name, *args: image_name in in_sync), \
+            mock.patch.object(Docker, "init_registry"), \
+            mock.patch.object(Docker, "setup_registry_in_config") as setup_registry_in_config, \
+            mock.patch("iotedgedev.dockercls.PushExecutor") as push_executor:
+        push_executor.return_value.pushed_bytes = {}
+        docker.setup_registry()
+
+    docker.docker_client.images.pull.assert_called_once_with("mcr.microsoft.com/azureiotedge-simulated-temperature-sensor:1.2")
+    assert docker.docker_api.tag.call_count == 3
+    pushed = sorted(call[0][0] for call in push_executor.return_value.push.call_args_list)
+    assert pushed == ["localhost:5000/azureiotedge-hub:1.2", "localhost:5000/azureiotedge-simulated-temperature-sensor:1.2"]
+    setup_registry_in_config.assert_called_once()
+
+
+def test_is_in_registry(docker):
+    registry_client = mock.MagicMock()
+    registry_client.get_manifest_digest.return_value = "sha256:1"
+    registry_clients = {"localhost:5000": registry_client}
+
+    with mock.patch.object(Docker, "get_repo_digests", return_value=set(["sha256:1"])):
+        assert docker.is_in_registry("localhost:5000/azureiotedge-hub:1.2", registry_clients)
+    registry_client.get_manifest_digest.assert_called_once_with("azureiotedge-hub", "1.2")
+
+    with mock.patch.object(Docker, "get_repo_digests", return_value=set(["sha256:2"])):
+        assert not docker.is_in_registry("localhost:5000/azureiotedge-hub:1.2", registry_clients)
+
+    registry_client.get_manifest_digest.side_effect = Exception("connection refused")
+    with mock.patch.object(Docker, "get_repo_digests", return_value=set(["sha256:1"])):
+        assert not docker.is_in_registry("localhost:5000/azureiotedge-hub:1.2", registry_clients)
+
+    with mock.patch.object(Docker, "get_repo_digests", return_value=set()):
+        assert not docker.is_in_registry("localhost:5000/azureiotedge-hub:1.2", {})
+
+
+def test_setup_registry_in_config(docker, tmp_path):
+    template = tmp_path / "deployment.template.json"
+    template.write_text('{"agent": "mcr.microsoft.com/azureiotedge-agent:1.2", "hub": "mcr.microsoft.com/azureiotedge-hub:1.2", '
+                        '"other": "mcr.microsoft.com/other:1.0"}')
+    unchanged = tmp_path / "unchanged.template.json"
+    unchanged.write_text('{"other": "mcr.microsoft.com/other:1.0"}')
+    docker.utility.get_config_files.return_value = [str(template), str(unchanged)]
+
+    with mock.patch("builtins.open", wraps=open) as open_file:
+        docker.setup_registry_in_config(["azureiotedge-agent", "azureiotedge-hub"])
+
+    assert template.read_text() == ('{"agent": "${CONTAINER_REGISTRY_SERVER}/azureiotedge-agent:1.2", "hub": "${CONTAINER_REGISTRY_SERVER}/azureiotedge-hub:1.2", '
+                                    '"other": "mcr.microsoft.com/other:1.0"}')
+    assert unchanged.read_text() == '{"other": "mcr.microsoft.com/other:1.0"}'
+    assert [call for call in open_file.call_args_list if call[0][1:] == ("w",)] == [mock.call(str(template), "w")]
+
+
+@pytest.fixture
+def prune_docker(docker, tmp_path):
+    def image(image_id, tags, created, size=1024 * 1024):
+        image = mock_image(image_id, tags, size)
+        image.attrs["Created"] = "2021-06-{0:02d}T12:00:00.123456789Z".format(created)
+        return image
+
+    docker.envvars.DEPLOYMENT_CONFIG_TEMPLATE_FILE = str(tmp_path / "deployment.template.json")
+    docker.images = [
+        image("sha256:1", ["localhost:5000/filtermodule:0.0.1-amd64"], 1),
+        image("sha256:2", ["localhost:5000/filtermodule:0.0.2-amd64"], 2),
+        image("sha256:3", ["localhost:5000/filtermodule:0.0.3-amd64", "localhost:5000/filtermodule:latest"], 3),
+        image("sha256:4", ["localhost:5000/sensormodule:0.0.1-amd64"], 4),
+        image("sha256:5", ["localhost:5000/sensormodule:0.0.2-amd64"], 5),
+        image("sha256:6", ["mcr.microsoft.com/azureiotedge-hub:1.2"], 1)
+    ]
+    docker.docker_client.images.list.return_value = docker.images
+
+    with mock.patch.object(Docker, "_get_module_repositories", return_value=set(["localhost:5000/filtermodule", "localhost:5000/sensormodule"])), \
+            mock.patch.object(Docker, "_get_deployment_manifest_images", return_value=set(["localhost:5000/filtermodule:0.0.1-amd64"])):
+        yield docker
+
+
+def removed_tags(docker):
+    return sorted(call[1]["image"] for call in docker.docker_client.images.remove.call_args_list)
+
+
+def test_prune_modules_keep(prune_docker):
+    removed = prune_docker.prune_modules(keep=1)
+
+    # filtermodule:0.0.1-amd64 is in the deployment manifest
+    assert sorted(removed) == ["localhost:5000/filtermodule:0.0.2-amd64", "localhost:5000/filtermodule:latest", "localhost:5000/sensormodule:0.0.1-amd64"]
+    assert removed_tags(prune_docker) == sorted(removed)
+
+
+def test_prune_modules_max_size(prune_docker):
+    # 5 module images of 1 MB, of which the least recently used is in the deployment manifest
+    removed = prune_docker.prune_modules(max_size=3 * 1024 * 1024)
+
+    assert sorted(removed) == ["localhost:5000/filtermodule:0.0.2-amd64", "localhost:5000/filtermodule:0.0.3-amd64", "localhost:5000/filtermodule:latest"]
+
+
+def test_prune_modules_uses_build_cache(prune_docker):
+    with mock.patch("iotedgedev.dockercls.BuildCache") as build_cache:
+        build_cache.return_value.get_last_used.side_effect = lambda tag: 2e9 if tag == "localhost:5000/sensormodule:0.0.1-amd64" else None
+        removed = prune_docker.prune_modules(keep=1)
+
+    assert "localhost:5000/sensormodule:0.0.2-amd64" in removed
+    assert "localhost:5000/sensormodule:0.0.1-amd64" not in removed
+
+
+def test_prune_modules_dry_run(prune_docker):
+    removed = prune_docker.prune_modules(keep=0, dry_run=True)
+
+    assert len(removed) == 5
+    prune_docker.docker_client.images.remove.assert_not_called()
+
+
+def test_get_module_repositories(docker, tmp_path):
+    for name, repository in [("filtermodule", "localhost:5000/FilterModule"), ("empty", "")]:
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "module.json").write_text('{"image": {"repository": "%s"}}' % repository)
+    (tmp_path / "notamodule").mkdir()
+    docker.envvars.MODULES_PATH = str(tmp_path)
+
+    assert docker._get_module_repositories() == set(["localhost:5000/filtermodule"])
@@ -0,0 +1,46 @@
+import pytest
+
+from iotedgedev.dockerfileparser import DockerfileParser
+
+pytestmark = pytest.mark.unit
+
+
+def get_base_images(tmp_path, content, build_args=None):
+    dockerfile = tmp_path / "Dockerfile.amd64"
+    dockerfile.write_text(content)
+    return DockerfileParser(str(dockerfile)).get_base_images(build_args)
+
+
+def test_get_base_images(tmp_path):
+    content = """
+# syntax=docker/dockerfile:1
+FROM mcr.microsoft.com/dotnet/sdk:6.0 AS build-env
+RUN dotnet publish \\
+    -c Release -o out
+
+FROM --platform=linux/amd64 mcr.microsoft.com/dotnet/runtime:6.0
+COPY --from=build-env /app/out ./
+"""
+    assert get_base_images(tmp_path, content) == ["mcr.microsoft.com/dotnet/sdk:6.0", "mcr.microsoft.com/dotnet/runtime:6.0"]
+
+
+def test_get_base_images_skips_stages(tmp_path):
+    content = """
+FROM python:3.9 AS Base
+FROM base AS test
+FROM base
+"""
+    assert get_base_images(tmp_path, content) == ["python:3.9"]
+
+
+def test_get_base_images_expands_args(tmp_path):
+    content = """
+ARG CONTAINER_REGISTRY_SERVER=localhost:5000
+ARG BASE_VERSION
+FROM ${CONTAINER_REGISTRY_SERVER}/ourbase:${BASE_VERSION:-0.0.1}-amd64
+ARG CONTAINER_REGISTRY_SERVER=ignored
+FROM $CONTAINER_REGISTRY_SERVER/other:latest
+"""
+    assert get_base_images(tmp_path, content) == ["localhost:5000/ourbase:0.0.1-amd64", "localhost:5000/other:latest"]
+    assert get_base_images(tmp_path, content, {"CONTAINER_REGISTRY_SERVER": "myregistry.azurecr.io", "BASE_VERSION": "0.0.2"}) == \
+        ["myregistry.azurecr.io/ourbase:0.0.2-amd64", "myregistry.azurecr.io/other:latest"]
@@ -0,0 +1,93 @@
+from unittest import mock
+
+import pytest
+
+from iotedgedev.dockerhosts import DockerHostPool, get_platform_architecture, resolve_docker_host
+
+pytestmark = pytest.mark.unit
+
+
+def mock_docker(base_url, architecture="x86_64", os_type="linux", cpus=4):
+    docker = mock.MagicMock()
+    docker.session.base_url = base_url
+    docker.session.architecture = architecture
+    docker.session.info = {"NCPU": cpus}
+    docker.get_os_type.return_value = os_type
+    return docker
+
+
+@pytest.fixture
+def dockers():
+    return [mock_docker("unix:///var/run/docker.sock"),
+            mock_docker("tcp://big:2375", cpus=16),
+            mock_docker("ssh://pi@arm64", architecture="aarch64"),
+            mock_docker("tcp://windows:2375", os_type="windows")]
+
+
+def test_get_platform_architecture():
+    assert get_platform_architecture("amd64") == "amd64"
+    assert get_platform_architecture("arm32v7.debug") == "arm32v7"
+    assert get_platform_architecture("windows-amd64") == "amd64"
+
+
+def test_resolve_docker_host(monkeypatch):
+    monkeypatch.delenv("DOCKER_HOST", raising=False)
+    assert resolve_docker_host("tcp://buildhost:2376") == ("tcp://buildhost:2376", None, None)
+
+    with mock.patch("iotedgedev.dockerhosts.ContextAPI.get_context") as get_context:
+        get_context.return_value.Host = "ssh://pi@armhost"
+        get_context.return_value.TLSConfig = None
+        assert resolve_docker_host("armhost") == ("ssh://pi@armhost", None, "armhost")
+
+        get_context.return_value = None
+        with pytest.raises(ValueError):
+            resolve_docker_host("missing")
+
+
+def test_resolve_docker_host_tls():
+    tls = mock.MagicMock()
+    with mock.patch("iotedgedev.dockerhosts.ContextAPI.get_context") as get_context:
+        get_context.return_value.Host = "tcp://buildhost:2376"
+        get_context.return_value.TLSConfig = tls
+        assert resolve_docker_host("buildhost") == ("tcp://buildhost:2376", tls, "buildhost")
+
+    # The TLS configuration of the environment only applies to the daemon DOCKER_HOST points to
+    with mock.patch("iotedgedev.dockerhosts.docker.utils.kwargs_from_env", return_value={"base_url": "tcp://buildhost:2376", "tls": tls}):
+        assert resolve_docker_host("tcp://buildhost:2376") == ("tcp://buildhost:2376", tls, None)
+        assert resolve_docker_host("tcp://otherhost:2376") == ("tcp://otherhost:2376", None, None)
+
+
+def test_choose_prefers_native_hosts(dockers):
+    pool = DockerHostPool(dockers)
+
+    assert pool.choose("arm64v8") is dockers[2]
+    assert pool.choose("arm64v8.debug") is dockers[2]
+    assert pool.choose("windows-amd64") is dockers[3]
+    # No native arm32v7 daemon: the least loaded Linux daemon per CPU builds it with emulation
+    assert pool.choose("arm32v7") is dockers[1]
+
+
+def test_acquire_balances_load(dockers):
+    pool = DockerHostPool(dockers[:2])
+
+    with pool.acquire("amd64") as first:
+        assert first is dockers[1]
+        assert pool.active == {0: 0, 1: 1}
+        # 2 builds on 16 CPUs are still less load than 1 build on 4 CPUs
+        with pool.acquire("amd64") as second:
+            assert second is dockers[1]
+    assert pool.active == {0: 0, 1: 0}
+
+    pool = DockerHostPool([mock_docker("unix:///var/run/docker.sock"), mock_docker("tcp://other:2375")])
+    with pool.acquire("amd64") as first:
+        with pool.acquire("amd64") as second:
+            assert first is pool.dockers[0]
+            assert second is pool.dockers[1]
+
+
+def test_acquire_pinned(dockers):
+    pool = DockerHostPool(dockers)
+
+    with pool.acquire("arm64v8", pinned=dockers[0]) as docker:
+        assert docker is dockers[0]
+        assert pool.active[0] == 1
@@ -0,0 +1,69 @@
+import os
+from unittest import mock
+
+import docker
+import pytest
+
+from iotedgedev.dockersession import DockerSession
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def docker_client():
+    DockerSession.reset()
+    with mock.patch("docker.DockerClient") as docker_client:
+        docker_client.return_value.info.return_value = {"OSType": "Linux", "Architecture": "x86_64"}
+        yield docker_client
+        DockerSession.reset()
+
+
+def test_get_connects_once(docker_client, monkeypatch):
+    monkeypatch.delenv("DOCKER_HOST", raising=False)
+    assert DockerSession.get() is DockerSession.get()
+    assert docker_client.call_count == 1
+
+    monkeypatch.setenv("DOCKER_HOST", "tcp://10.0.0.4:2375")
+    session = DockerSession.get()
+    assert session.base_url == "tcp://10.0.0.4:2375"
+    assert DockerSession.get("tcp://10.0.0.4:2375") is session
+    assert docker_client.call_count == 2
+
+
+def test_info_memoized(docker_client):
+    session = DockerSession.get()
+    assert session.os_type == "linux"
+    assert session.architecture == "x86_64"
+    assert docker_client.return_value.info.call_count == 1
+
+
+def test_tls_is_configured_per_daemon(docker_client):
+    env_tls = mock.MagicMock()
+    context_tls = mock.MagicMock()
+    with mock.patch("docker.utils.kwargs_from_env", return_value={"base_url": "tcp://10.0.0.4:2376", "tls": env_tls}):
+        DockerSession.get()
+        docker_client.assert_called_with(version="auto", base_url="tcp://10.0.0.4:2376", tls=env_tls)
+
+        DockerSession.get("tcp://10.0.0.5:2375")
+        docker_client.assert_called_with(version="auto", base_url="tcp://10.0.0.5:2375")
+
+        DockerSession.get("tcp://10.0.0.6:2376", context_tls)
+        docker_client.assert_called_with(version="auto", base_url="tcp://10.0.0.6:2376", tls=context_tls)
+
+
+def test_cli_env_selects_daemon_with_its_tls(docker_client, tmp_path):
+    for name in ["ca.pem", "cert.pem", "key.pem"]:
+        (tmp_path / name).write_text("")
+    tls = docker.tls.TLSConfig(client_cert=(str(tmp_path / "cert.pem"), str(tmp_path / "key.pem")), ca_cert=str(tmp_path / "ca.pem"), verify=True)
+    environ = {"DOCKER_HOST": "tcp://10.0.0.4:2376", "DOCKER_TLS_VERIFY": "1", "DOCKER_CERT_PATH": "/certs/default", "PATH": "/usr/bin"}
+    with mock.patch.dict(os.environ, environ, clear=True), \
+            mock.patch("docker.utils.kwargs_from_env", return_value={"base_url": "tcp://10.0.0.4:2376"}):
+        assert DockerSession.get().get_cli_env() is None
+
+        # A plain URL doesn't inherit the TLS configuration of DOCKER_HOST
+        assert DockerSession.get("tcp://10.0.0.5:2375").get_cli_env() == {"DOCKER_HOST": "tcp://10.0.0.5:2375", "PATH": "/usr/bin"}
+
+        assert DockerSession.get("tcp://10.0.0.6:2376", tls).get_cli_env() == {
+            "DOCKER_HOST": "tcp://10.0.0.6:2376", "DOCKER_TLS_VERIFY": "1", "DOCKER_CERT_PATH": str(tmp_path), "PATH": "/usr/bin"}
+
+        assert DockerSession.get("tcp://buildhost:2376", tls, "buildhost").get_cli_env() == {"DOCKER_CONTEXT": "buildhost", "PATH": "/usr/bin"}
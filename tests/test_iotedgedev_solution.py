@@ -366,9 +366,9 @@ def test_validate_deployment_template_and_manifest_success():
         shutil.copyfile(env_file_path, os.path.join(test_solution_shared_lib_dir, env_file_name))
 
         if get_docker_os_type() == "windows":
-            result = runner_invoke(['genconfig', '-P', get_platform_type(), '-f', deployment_file_name])
+            result = runner_invoke(['genconfig', '-P', get_platform_type(), '-f', deployment_file_name, '--force'])
         else:
-            result = runner_invoke(['genconfig', '-f', deployment_file_name])
+            result = runner_invoke(['genconfig', '-f', deployment_file_name, '--force'])
 
         assert "ERROR" not in result.output
         assert "Warning: Deployment manifest schema validation failed" not in result.output
@@ -0,0 +1,255 @@
+import itertools
+import json
+import os
+from unittest import mock
+
+import pytest
+
+from iotedgedev.envvars import ContainerRegistry
+from iotedgedev.module import Module
+from iotedgedev.modules import Modules
+from iotedgedev.output import Output
+
+pytestmark = pytest.mark.unit
+
+
+def add_module(solution_folder, folder_name, repository):
+    module_folder = os.path.join(solution_folder, "modules", folder_name)
+    os.makedirs(module_folder)
+    with open(os.path.join(module_folder, "module.json"), "w") as f:
+        json.dump({"image": {"repository": repository, "tag": {"version": "0.0.1", "platforms": {"amd64": "./Dockerfile.amd64"}}}}, f)
+
+
+def get_user_modules(*images):
+    return dict(("module{0}".format(i), {"settings": {"image": image}}) for i, image in enumerate(images))
+
+
+@pytest.fixture
+def solution_folder(tmp_path):
+    add_module(str(tmp_path), "filtermodule", "localhost:5000/filtermodule")
+    add_module(str(tmp_path), "sensor", "localhost:5000/tempsensor")
+    add_module(str(tmp_path), "unused", "localhost:5000/unused")
+    return str(tmp_path)
+
+
+@pytest.fixture
+def modules():
+    envvars = mock.MagicMock()
+    envvars.MODULES_PATH = "modules"
+    envvars.CONTAINER_TAG = ""
+    envvars.CONTAINER_REGISTRY_MAP = {"": ContainerRegistry("localhost:5000", "", "")}
+    return Modules(envvars, Output())
+
+
+def test_get_placeholder_modules_referenced_only(solution_folder, modules):
+    user_modules = get_user_modules("${MODULES.filtermodule}", "${MODULEDIR<./modules/sensor>.debug}", "mcr.microsoft.com/azureiotedge-simulated-temperature-sensor:1.0")
+    with mock.patch("iotedgedev.modules.Module", wraps=Module) as module_cls:
+        placeholder_modules = modules._get_placeholder_modules(solution_folder, user_modules)
+
+    assert sorted(placeholder_modules) == ["MODULEDIR<./modules/sensor>", "MODULES.filtermodule"]
+    assert module_cls.call_count == 2
+
+
+def test_get_placeholder_modules_literal_image(solution_folder, modules):
+    placeholder_modules = modules._get_placeholder_modules(solution_folder, get_user_modules("localhost:5000/filtermodule:0.0.1-amd64"))
+    assert list(placeholder_modules) == ["MODULES.filtermodule"]
+
+    # The repository doesn't match the folder name, so the folders of the user's registry are scanned
+    placeholder_modules = modules._get_placeholder_modules(solution_folder, get_user_modules("localhost:5000/tempsensor:0.0.1-amd64"))
+    assert list(placeholder_modules) == ["MODULES.sensor"]
+
+
+def test_get_placeholder_modules_cached(solution_folder, modules):
+    user_modules = get_user_modules("${MODULES.filtermodule.amd64}")
+    first = modules._get_placeholder_modules(solution_folder, user_modules)
+    second = modules._get_placeholder_modules(solution_folder, user_modules)
+    assert first["MODULES.filtermodule"] is second["MODULES.filtermodule"]
+
+
+@mock.patch.dict(os.environ, {"EDGE_RUNTIME_VERSION": "1.2"})
+def test_genconfig_incremental(solution_folder, modules):
+    template = {
+        "$schema-template": "4.0.0",
+        "modulesContent": {
+            "$edgeAgent": {"properties.desired": {"modules": {"filtermodule": {"settings": {"image": "${MODULES.filtermodule}", "createOptions": {}}}},
+                                                  "systemModules": {"edgeHub": {"settings": {"image": "mcr.microsoft.com/azureiotedge-hub:${EDGE_RUNTIME_VERSION}"}}}}},
+            "$edgeHub": {"properties.desired": {"routes": {}}}
+        }
+    }
+    template_file = os.path.join(solution_folder, "deployment.template.json")
+    with open(template_file, "w") as f:
+        json.dump(template, f)
+    modules.envvars.CONFIG_OUTPUT_DIR = os.path.join(solution_folder, "config")
+    modules.envvars.BYPASS_MODULES = ""
+
+    def genconfig(incremental=True):
+        with mock.patch.object(Modules, "_gen_deployment_manifest", autospec=True, side_effect=Modules._gen_deployment_manifest) as gen, \
+                mock.patch("iotedgedev.modules.DeploymentManifest.validate_deployment_manifest", return_value=True):
+            path = modules.build_push(template_file, "amd64", no_build=True, no_push=True, incremental=incremental)
+        return path, gen.call_count
+
+    path, generated = genconfig()
+    assert path == os.path.join(solution_folder, "config", "deployment.amd64.json")
+    assert generated == 1
+    assert genconfig() == (path, 0)
+    assert genconfig(incremental=False) == (path, 1)
+
+    with mock.patch.dict(os.environ, {"EDGE_RUNTIME_VERSION": "1.3"}):
+        assert genconfig() == (path, 1)
+        with open(path) as f:
+            assert "azureiotedge-hub:1.3" in f.read()
+
+
+@mock.patch.dict(os.environ, {"EDGE_RUNTIME_VERSION": "1.2"})
+def test_genconfig_all(solution_folder, modules, monkeypatch):
+    for name, images in [("deployment.template.json", ["${MODULES.filtermodule}"]),
+                         ("site2.deployment.template.json", ["${MODULES.filtermodule}", "${MODULES.sensor}"])]:
+        user_modules = dict(("module{0}".format(i), {"settings": {"image": image, "createOptions": {}}}) for i, image in enumerate(images))
+        with open(os.path.join(solution_folder, name), "w") as f:
+            json.dump({"$schema-template": "4.0.0",
+                       "modulesContent": {"$edgeAgent": {"properties.desired": {"modules": user_modules, "systemModules": {}}},
+                                          "$edgeHub": {"properties.desired": {"routes": {}}}}}, f)
+    monkeypatch.chdir(solution_folder)
+    modules.envvars.CONFIG_OUTPUT_DIR = os.path.join(solution_folder, "config")
+    modules.envvars.BYPASS_MODULES = ""
+
+    def genconfig_all(valid=True, **kwargs):
+        with mock.patch("iotedgedev.modules.Module", wraps=Module) as module_cls, \
+                mock.patch("iotedgedev.modules.DeploymentManifest.validate_deployment_manifest", return_value=valid), \
+                mock.patch.object(modules, "_print_validation_report", wraps=modules._print_validation_report) as report:
+            paths = modules.genconfig_all(jobs=2, **kwargs)
+        return paths, module_cls.call_count, report.call_args[0][0]
+
+    paths, parsed, validation_results = genconfig_all(incremental=True)
+    assert paths == [os.path.join(solution_folder, "config", "deployment.amd64.json"),
+                     os.path.join(solution_folder, "config", "site2.deployment.amd64.json")]
+    # filtermodule is referenced by both templates, and its module.json is parsed once
+    assert parsed == 2
+    assert set(validation_results.values()) == set(["passed"])
+
+    _, _, validation_results = genconfig_all(incremental=True)
+    assert set(validation_results.values()) == set(["up to date"])
+
+    with pytest.raises(Exception, match="Deployment manifest validation failed"):
+        genconfig_all(valid=False, fail_on_validation_error=True)
+
+
+def test_genconfig_all_no_templates(tmp_path, modules, monkeypatch):
+    monkeypatch.chdir(str(tmp_path))
+    with pytest.raises(ValueError, match="No deployment manifest template file"):
+        modules.genconfig_all()
+
+
+@mock.patch.dict(os.environ, {"EDGE_RUNTIME_VERSION": "1.2"})
+def test_skip_unchanged_rebuilds_images_built_from_rebuilt_module(solution_folder, modules):
+    base_dockerfile = os.path.join(solution_folder, "modules", "filtermodule", "Dockerfile.amd64")
+    with open(base_dockerfile, "w") as f:
+        f.write("FROM alpine\n")
+    with open(os.path.join(solution_folder, "modules", "sensor", "Dockerfile.amd64"), "w") as f:
+        f.write("FROM localhost:5000/filtermodule:0.0.1-amd64\n")
+    user_modules = {"filtermodule": {"settings": {"image": "${MODULES.filtermodule}", "createOptions": {}}},
+                    "tempsensor": {"settings": {"image": "${MODULES.sensor}", "createOptions": {}}}}
+    template_file = os.path.join(solution_folder, "deployment.template.json")
+    with open(template_file, "w") as f:
+        json.dump({"$schema-template": "4.0.0",
+                   "modulesContent": {"$edgeAgent": {"properties.desired": {"modules": user_modules, "systemModules": {}}},
+                                      "$edgeHub": {"properties.desired": {"routes": {}}}}}, f)
+    modules.envvars.CONFIG_OUTPUT_DIR = os.path.join(solution_folder, "config")
+    modules.envvars.BYPASS_MODULES = ""
+    modules.envvars.DOCKER_HOSTS = ""
+    modules.envvars.BUILD_BACKEND = ""
+
+    # map image tag to the ID of its local image
+    images = {}
+    image_ids = itertools.count()
+    built = []
+
+    def build(**kwargs):
+        built.append(kwargs["tag"])
+        images[kwargs["tag"]] = "sha256:{0}".format(next(image_ids))
+        return []
+
+    docker = mock.MagicMock()
+    docker.get_os_type.return_value = "linux"
+    docker.session.architecture = "x86_64"
+    docker.session.info = {"NCPU": 1}
+    docker.docker_client.images.get.side_effect = lambda tag: mock.MagicMock(id=images[tag])
+    docker.docker_api.build.side_effect = build
+
+    def build_modules():
+        del built[:]
+        with mock.patch("iotedgedev.modules.Docker", return_value=docker), \
+                mock.patch("iotedgedev.modules.DeploymentManifest.validate_deployment_manifest", return_value=True):
+            modules.build(template_file, "amd64", skip_unchanged=True)
+        return sorted(built)
+
+    base_tag = "localhost:5000/filtermodule:0.0.1-amd64"
+    sensor_tag = "localhost:5000/tempsensor:0.0.1-amd64"
+    assert build_modules() == [base_tag, sensor_tag]
+    assert build_modules() == []
+
+    with open(base_dockerfile, "a") as f:
+        f.write("ENV LEVEL=debug\n")
+    assert build_modules() == [base_tag, sensor_tag]
+    assert build_modules() == []
+
+
+def write_template(solution_folder, images, name="deployment.template.json"):
+    user_modules = dict(("module{0}".format(i), {"settings": {"image": image, "createOptions": {}}}) for i, image in enumerate(images))
+    template_file = os.path.join(solution_folder, name)
+    with open(template_file, "w") as f:
+        json.dump({"$schema-template": "4.0.0",
+                   "modulesContent": {"$edgeAgent": {"properties.desired": {"modules": user_modules, "systemModules": {}}},
+                                      "$edgeHub": {"properties.desired": {"routes": {}}}}}, f)
+    return template_file
+
+
+@mock.patch.dict(os.environ, {"EDGE_RUNTIME_VERSION": "1.2"})
+def test_genconfig_all_platforms_skips_unresolved_platforms(solution_folder, modules):
+    # filtermodule declares more platforms than sensor, whose placeholders only resolve for amd64
+    with open(os.path.join(solution_folder, "modules", "filtermodule", "module.json"), "w") as f:
+        json.dump({"image": {"repository": "localhost:5000/filtermodule",
+                             "tag": {"version": "0.0.1", "platforms": {"amd64": "./Dockerfile.amd64", "amd64.debug": "./Dockerfile.amd64.debug",
+                                                                       "arm32v7": "./Dockerfile.arm32v7"}}}}, f)
+    template_file = write_template(solution_folder, ["${MODULES.filtermodule}", "${MODULEDIR<./modules/sensor>}"])
+    debug_template_file = write_template(solution_folder, ["${MODULES.filtermodule.debug}", "${MODULES.sensor.debug}"], "deployment.debug.template.json")
+    modules.envvars.CONFIG_OUTPUT_DIR = os.path.join(solution_folder, "config")
+    modules.envvars.BYPASS_MODULES = ""
+
+    with mock.patch("iotedgedev.modules.DeploymentManifest.validate_deployment_manifest", return_value=True), \
+            mock.patch.object(modules.output, "warning") as warning:
+        paths = modules.build_push(template_file, "all", no_build=True, no_push=True)
+        assert paths == [os.path.join(solution_folder, "config", "deployment.amd64.json")]
+        assert "can't be resolved for platform arm32v7" in warning.call_args[0][0]
+        with open(paths[0]) as f:
+            assert "${" not in f.read()
+
+        with pytest.raises(ValueError, match=r"\$\{MODULEDIR<./modules/sensor>\} of deployment.template.json can't be resolved for platform arm32v7"):
+            modules.build_push(template_file, "arm32v7", no_build=True, no_push=True)
+
+        with pytest.raises(ValueError, match="can't be resolved for any platform"):
+            modules.build_push(debug_template_file, "all", no_build=True, no_push=True)
+    assert not os.path.exists(os.path.join(solution_folder, "config", "deployment.arm32v7.json"))
+
+
+@mock.patch.dict(os.environ, {"EDGE_RUNTIME_VERSION": "1.2"})
+def test_genconfig_all_reports_unresolved_placeholders_as_failed(solution_folder, modules, monkeypatch):
+    write_template(solution_folder, ["${MODULES.filtermodule}"])
+    template_file = write_template(solution_folder, ["${MODULES.filtermodule}"], "site2.deployment.template.json")
+    with open(template_file) as f:
+        template = json.load(f)
+    template["modulesContent"]["$edgeHub"]["properties.desired"]["routes"]["upstream"] = "FROM ${UNDEFINED_ROUTE_SOURCE} INTO $upstream"
+    with open(template_file, "w") as f:
+        json.dump(template, f)
+    monkeypatch.chdir(solution_folder)
+    monkeypatch.delenv("UNDEFINED_ROUTE_SOURCE", raising=False)
+    modules.envvars.CONFIG_OUTPUT_DIR = os.path.join(solution_folder, "config")
+    modules.envvars.BYPASS_MODULES = ""
+
+    with mock.patch("iotedgedev.modules.DeploymentManifest._validate_deployment_manifest_schema", return_value=True), \
+            mock.patch.object(modules, "_print_validation_report", wraps=modules._print_validation_report) as report:
+        with pytest.raises(Exception, match="Deployment manifest validation failed"):
+            modules.genconfig_all(fail_on_validation_error=True)
+
+    assert report.call_args[0][0] == {os.path.join(solution_folder, "config", "deployment.amd64.json"): "passed",
+                                      os.path.join(solution_folder, "config", "site2.deployment.amd64.json"): "failed"}
@@ -0,0 +1,94 @@
+from unittest import mock
+
+import pytest
+
+from iotedgedev.output import Output
+from iotedgedev.progress import ProgressRenderer, format_size, parse_size
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def output():
+    output = mock.MagicMock(spec=Output)
+    output.is_tty.return_value = False
+    return output
+
+
+def get_lines(output):
+    return [call[0][0] for call in output.procout.call_args_list]
+
+
+def push_statuses():
+    yield {"status": "The push refers to repository [localhost:5000/filtermodule]"}
+    for layer in ["a1", "b2"]:
+        yield {"status": "Preparing", "id": layer}
+    for current in range(0, 2048 + 1, 512):
+        yield {"status": "Pushing", "id": "a1", "progressDetail": {"current": current, "total": 2048}, "progress": "[==>  ]"}
+    yield {"status": "Pushed", "id": "a1"}
+    yield {"status": "Layer already exists", "id": "b2"}
+    yield {"status": "0.0.1-amd64: digest: sha256:0123 size: 739"}
+
+
+def test_format_size():
+    assert format_size(512) == "512.0 B"
+    assert format_size(2048) == "2.0 KB"
+    assert format_size(3 * 1024 * 1024 * 1024) == "3.0 GB"
+
+
+def test_parse_size():
+    assert parse_size("1024") == 1024
+    assert parse_size("500MB") == 500 * 1024 * 1024
+    assert parse_size("1.5 gb") == int(1.5 * 1024 * 1024 * 1024)
+    assert parse_size("2K") == 2048
+    with pytest.raises(ValueError):
+        parse_size("lots")
+
+
+def test_plain(output):
+    progress = ProgressRenderer(output, compact=False)
+    for json_ in push_statuses():
+        progress.status(json_)
+    progress.stream("Step 1/2 : FROM alpine\n")
+    progress.close()
+
+    assert len(get_lines(output)) == 12
+    assert get_lines(output)[5] == "a1 Pushing [==>  ]"
+
+
+def test_compact_rate_limited(output):
+    progress = ProgressRenderer(output, interval=60)
+    for json_ in push_statuses():
+        progress.status(json_)
+    progress.close()
+
+    lines = get_lines(output)
+    assert lines[0] == "The push refers to repository [localhost:5000/filtermodule] "
+    assert lines[1].startswith("0/1 layers done, 0.0 B of 0.0 B transferred")
+    assert lines[2] == "0.0.1-amd64: digest: sha256:0123 size: 739 "
+    # Summary when the stream ends
+    assert lines[3].startswith("2/2 layers done, 2.0 KB of 2.0 KB transferred")
+    assert len(lines) == 4
+
+
+def test_compact_tty_updates_one_line(output):
+    output.is_tty.return_value = True
+    progress = ProgressRenderer(output)
+    progress.status({"status": "Pushing", "id": "a1", "progressDetail": {"current": 512, "total": 2048}})
+    progress.close()
+
+    echoed = [call[0][0] for call in output.echo.call_args_list]
+    assert echoed[0].startswith("\r0/1 layers done, 512.0 B of 2.0 KB transferred")
+    assert echoed[-1] == ""
+    output.procout.assert_not_called()
+
+
+def test_compact_build_prints_steps_and_tail_on_failure(output):
+    progress = ProgressRenderer(output, tail_size=3)
+    progress.stream("Step 1/2 : FROM alpine\n")
+    progress.stream(" ---> 0123\nStep 2/2 : RUN make\n")
+    progress.stream("make: *** No rule to make target\n")
+    assert get_lines(output) == ["Step 1/2 : FROM alpine", "Step 2/2 : RUN make"]
+
+    progress.print_tail()
+    assert get_lines(output)[2:] == [" ---> 0123", "Step 2/2 : RUN make", "make: *** No rule to make target"]
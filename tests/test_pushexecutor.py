@@ -0,0 +1,119 @@
+import threading
+import time
+from unittest import mock
+
+import docker
+import pytest
+
+from iotedgedev.containerregistry import ContainerRegistry
+from iotedgedev.output import Output
+from iotedgedev.pushexecutor import PushExecutor, is_transient_error
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def dock():
+    dock = mock.MagicMock()
+    dock.process_api_response.return_value.transferred = 1024
+    return dock
+
+
+def test_is_transient_error():
+    assert is_transient_error(ValueError("toomanyrequests: too many requests"))
+    assert is_transient_error(ValueError("received unexpected HTTP status: 503 Service Unavailable"))
+    assert is_transient_error(docker.errors.APIError("500 Server Error: net/http: TLS handshake timeout"))
+    assert not is_transient_error(ValueError("unauthorized: authentication required"))
+    # Status codes are only matched with their reason phrase, not inside digests or sizes
+    assert is_transient_error(ValueError("429 Too Many Requests"))
+    assert not is_transient_error(ValueError("unauthorized: blob sha256:5029f5031a50429b unknown"))
+    assert not is_transient_error(ValueError("manifest invalid: layer of 5030504 bytes"))
+
+    response = mock.MagicMock()
+    response.status_code = 503
+    assert is_transient_error(docker.errors.APIError("Server Error", response=response))
+    response.status_code = 401
+    assert not is_transient_error(docker.errors.APIError("Client Error", response=response))
+
+    # The status code and the reason phrase of a 500 response agree on not retrying it
+    response.status_code = 500
+    assert not is_transient_error(docker.errors.APIError("Server Error", response=response))
+    assert not is_transient_error(docker.errors.APIError("500 Server Error: Internal Server Error (\"manifest unknown\")", response=response))
+    assert not is_transient_error(ValueError("received unexpected HTTP status: 500 Internal Server Error"))
+
+
+def test_push_with_credentials(dock):
+    registry = ContainerRegistry("myregistry.azurecr.io", "user", "password")
+    push_executor = PushExecutor(dock, [registry])
+
+    assert push_executor.push("myregistry.azurecr.io/filtermodule:0.0.1-amd64", Output()) == 1024
+    dock.docker_client.images.push.assert_called_once_with(repository="myregistry.azurecr.io/filtermodule:0.0.1-amd64", stream=True,
+                                                           auth_config={"username": "user", "password": "password"})
+    assert push_executor.pushed_bytes == {"myregistry.azurecr.io/filtermodule:0.0.1-amd64": 1024}
+    assert push_executor.get_summary().startswith("Pushed 1.0 KB in ")
+
+
+def test_push_from_other_daemon(dock):
+    other_dock = mock.MagicMock()
+    other_dock.process_api_response.return_value.transferred = 2048
+    push_executor = PushExecutor(dock, [])
+
+    assert push_executor.push("localhost:5000/filtermodule:0.0.1-arm64v8", Output(), other_dock) == 2048
+    other_dock.docker_client.images.push.assert_called_once()
+    dock.docker_client.images.push.assert_not_called()
+
+
+def test_push_retry_transient_error(dock):
+    dock.process_api_response.side_effect = [ValueError("toomanyrequests: retry later"), dock.process_api_response.return_value]
+    push_executor = PushExecutor(dock, [], backoff=0)
+
+    assert push_executor.push("localhost:5000/filtermodule:0.0.1-amd64", Output()) == 1024
+    assert dock.docker_client.images.push.call_count == 2
+
+
+def test_push_no_retry(dock):
+    dock.process_api_response.side_effect = ValueError("unauthorized: authentication required")
+    with pytest.raises(ValueError, match="unauthorized"):
+        PushExecutor(dock, [], backoff=0).push("localhost:5000/filtermodule:0.0.1-amd64", Output())
+    assert dock.docker_client.images.push.call_count == 1
+
+    dock.process_api_response.side_effect = ValueError("toomanyrequests: retry later")
+    with pytest.raises(ValueError, match="toomanyrequests"):
+        PushExecutor(dock, [], retries=2, backoff=0).push("localhost:5000/filtermodule:0.0.1-amd64", Output())
+    assert dock.docker_client.images.push.call_count == 4
+
+
+def test_push_limited_per_registry(dock):
+    lock = threading.Lock()
+    running = {}
+    max_running = {}
+
+    def process_api_response(response, output):
+        server = response
+        with lock:
+            running[server] = running.get(server, 0) + 1
+            max_running[server] = max(max_running.get(server, 0), running[server])
+        time.sleep(0.05)
+        with lock:
+            running[server] -= 1
+        return mock.MagicMock(transferred=0)
+
+    dock.docker_client.images.push.side_effect = lambda repository, **kwargs: repository.split("/")[0]
+    dock.process_api_response.side_effect = process_api_response
+    registries = [ContainerRegistry("myregistry.azurecr.io", "user", "password", "2"), ContainerRegistry("localhost:5000", "", "")]
+    push_executor = PushExecutor(dock, registries)
+
+    threads = [threading.Thread(target=push_executor.push, args=("{0}/module{1}:0.0.1".format(server, i), Output()))
+               for server in ["myregistry.azurecr.io", "localhost:5000"] for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max_running == {"myregistry.azurecr.io": 2, "localhost:5000": 4}
+
+
+def test_invalid_max_pushes(dock):
+    push_executor = PushExecutor(dock, [ContainerRegistry("localhost:5000", "", "", "many")])
+    with pytest.raises(ValueError, match="must be a number"):
+        push_executor.push("localhost:5000/filtermodule:0.0.1-amd64", Output())
@@ -0,0 +1,73 @@
+from unittest import mock
+
+import pytest
+
+from iotedgedev.registryclient import RegistryClient, parse_image_name
+
+pytestmark = pytest.mark.unit
+
+digest = "sha256:0b0f6e8c4c3d8e3f0a7b4a3c5d4c6e8f0a1b2c3d4e5f60718293a4b5c6d7e8f9"
+
+
+def mock_response(status_code, headers=None, json_=None):
+    response = mock.MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.json.return_value = json_
+    return response
+
+
+def test_parse_image_name():
+    assert parse_image_name("localhost:5000/filtermodule:0.0.1-amd64") == ("localhost:5000", "filtermodule", "0.0.1-amd64")
+    assert parse_image_name("myregistry.azurecr.io/team/filtermodule:0.0.1") == ("myregistry.azurecr.io", "team/filtermodule", "0.0.1")
+    assert parse_image_name("mcr.microsoft.com/azureiotedge-agent:1.2") == ("mcr.microsoft.com", "azureiotedge-agent", "1.2")
+    assert parse_image_name("user/filtermodule") == ("docker.io", "user/filtermodule", "latest")
+    assert parse_image_name("alpine:3.15") == ("docker.io", "library/alpine", "3.15")
+
+
+def test_base_url():
+    assert RegistryClient("localhost:5000").base_url == "http://localhost:5000"
+    assert RegistryClient("myregistry.azurecr.io").base_url == "https://myregistry.azurecr.io"
+    assert RegistryClient("docker.io").base_url == "https://registry-1.docker.io"
+
+
+def test_get_manifest_digest_anonymous():
+    client = RegistryClient("localhost:5000")
+    with mock.patch.object(client.session, "request", return_value=mock_response(200, {"Docker-Content-Digest": digest})) as request:
+        assert client.get_manifest_digest("filtermodule", "0.0.1-amd64") == digest
+
+    args, kwargs = request.call_args
+    assert args == ("HEAD", "http://localhost:5000/v2/filtermodule/manifests/0.0.1-amd64")
+    assert "application/vnd.docker.distribution.manifest.v2+json" in kwargs["headers"]["Accept"]
+
+
+def test_get_manifest_digest_not_found():
+    client = RegistryClient("localhost:5000")
+    with mock.patch.object(client.session, "request", return_value=mock_response(404)):
+        assert client.get_manifest_digest("filtermodule", "0.0.1-amd64") is None
+
+
+def test_get_manifest_digest_bearer_token():
+    client = RegistryClient("myregistry.azurecr.io", "user", "password")
+    challenge = 'Bearer realm="https://myregistry.azurecr.io/oauth2/token",service="myregistry.azurecr.io"'
+    responses = [mock_response(401, {"WWW-Authenticate": challenge}), mock_response(200, {"Docker-Content-Digest": digest})]
+
+    with mock.patch.object(client.session, "request", side_effect=responses) as request, \
+            mock.patch.object(client.session, "get", return_value=mock_response(200, json_={"access_token": "token"})) as get_token:
+        assert client.get_manifest_digest("filtermodule", "0.0.1-amd64") == digest
+
+    args, kwargs = get_token.call_args
+    assert args == ("https://myregistry.azurecr.io/oauth2/token",)
+    assert kwargs["params"] == {"service": "myregistry.azurecr.io", "scope": "repository:filtermodule:pull"}
+    assert kwargs["auth"] == ("user", "password")
+    assert request.call_args[1]["headers"]["Authorization"] == "Bearer token"
+
+
+def test_get_manifest_digest_basic_auth():
+    client = RegistryClient("localhost:5000", "user", "password")
+    responses = [mock_response(401, {"WWW-Authenticate": 'Basic realm="Registry Realm"'}), mock_response(200, {"Docker-Content-Digest": digest})]
+
+    with mock.patch.object(client.session, "request", side_effect=responses) as request:
+        assert client.get_manifest_digest("filtermodule", "0.0.1-amd64") == digest
+
+    assert request.call_args[1]["auth"] == ("user", "password")
@@ -0,0 +1,147 @@
+import json
+import time
+from unittest import mock
+
+import pytest
+import requests
+
+from iotedgedev.constants import Constants
+from iotedgedev.output import Output
+from iotedgedev.schemacache import SchemaCache
+
+pytestmark = pytest.mark.unit
+
+url = Constants.deployment_manifest_schema_url
+cached_schema = {"type": "object", "required": ["cached"]}
+
+
+bundled_schema = {"type": "object", "required": ["bundled"]}
+
+
+@pytest.fixture
+def bundled_dir(tmp_path):
+    bundled_dir = tmp_path / "bundled"
+    bundled_dir.mkdir()
+    with mock.patch("iotedgedev.schemacache.BUNDLED_SCHEMAS_DIR", str(bundled_dir)):
+        yield bundled_dir
+
+
+@pytest.fixture
+def schema_cache(tmp_path, bundled_dir):
+    yield SchemaCache(str(tmp_path))
+    SchemaCache.mode = "auto"
+
+
+def write_bundled(bundled_dir, name="azure-iot-edge-deployment-2.0"):
+    (bundled_dir / (name + ".json")).write_text(json.dumps(bundled_schema))
+
+
+def write_cache(tmp_path, fetched, etag='"v1"'):
+    (tmp_path / "azure-iot-edge-deployment-2.0.json").write_text(json.dumps(cached_schema))
+    (tmp_path / "azure-iot-edge-deployment-2.0.meta.json").write_text(json.dumps({"url": url, "etag": etag, "fetched": fetched}))
+
+
+def mock_response(status_code, content=None, etag=None):
+    response = mock.MagicMock()
+    response.status_code = status_code
+    response.json.return_value = content
+    response.headers = {"ETag": etag} if etag else {}
+    return response
+
+
+def test_offline_uses_stale_cached_schema(schema_cache, tmp_path):
+    SchemaCache.mode = "offline"
+    write_cache(tmp_path, 0)
+    with mock.patch("iotedgedev.schemacache.requests.get") as get:
+        assert schema_cache.get_schema(url, Output()) == cached_schema
+    get.assert_not_called()
+
+
+def test_offline_without_cached_schema_uses_bundled_schema(schema_cache, bundled_dir):
+    SchemaCache.mode = "offline"
+    write_bundled(bundled_dir)
+    with mock.patch("iotedgedev.schemacache.requests.get") as get:
+        assert schema_cache.get_schema(url, Output()) == bundled_schema
+    get.assert_not_called()
+
+
+def test_offline_without_cached_or_bundled_schema_fails(schema_cache):
+    SchemaCache.mode = "offline"
+    with pytest.raises(ValueError, match="is neither cached nor bundled"):
+        schema_cache.get_schema(url, Output())
+
+
+def test_fresh_cache_is_used_without_network(schema_cache, tmp_path):
+    write_cache(tmp_path, time.time())
+    with mock.patch("iotedgedev.schemacache.requests.get") as get:
+        assert schema_cache.get_schema(url, Output()) == cached_schema
+    get.assert_not_called()
+
+
+def test_stale_cache_is_revalidated_with_etag(schema_cache, tmp_path):
+    write_cache(tmp_path, 0)
+    with mock.patch("iotedgedev.schemacache.requests.get", return_value=mock_response(304)) as get:
+        assert schema_cache.get_schema(url, Output()) == cached_schema
+
+    assert get.call_args[1]["headers"] == {"If-None-Match": '"v1"'}
+    meta = json.loads((tmp_path / "azure-iot-edge-deployment-2.0.meta.json").read_text())
+    assert meta["etag"] == '"v1"'
+    assert meta["fetched"] > 0
+
+
+def test_refresh_downloads_changed_schema(schema_cache, tmp_path):
+    SchemaCache.mode = "refresh"
+    write_cache(tmp_path, time.time())
+    new_schema = {"type": "object"}
+    with mock.patch("iotedgedev.schemacache.requests.get", return_value=mock_response(200, new_schema, '"v2"')):
+        assert schema_cache.get_schema(url, Output()) == new_schema
+
+    assert json.loads((tmp_path / "azure-iot-edge-deployment-2.0.json").read_text()) == new_schema
+    assert json.loads((tmp_path / "azure-iot-edge-deployment-2.0.meta.json").read_text())["etag"] == '"v2"'
+
+
+def test_network_failure_falls_back_to_cached_schema(schema_cache, tmp_path):
+    write_cache(tmp_path, 0)
+    with mock.patch("iotedgedev.schemacache.requests.get", side_effect=requests.exceptions.ConnectionError("no network")):
+        assert schema_cache.get_schema(url, Output()) == cached_schema
+
+
+def test_network_failure_without_cached_schema_uses_bundled_schema(schema_cache, bundled_dir):
+    write_bundled(bundled_dir, "azure-iot-edge-deployment-template-4.0")
+    with mock.patch("iotedgedev.schemacache.requests.get", side_effect=requests.exceptions.ConnectionError("no network")):
+        assert schema_cache.get_schema(Constants.deployment_template_schema_url, Output()) == bundled_schema
+
+
+def test_cached_schema_is_preferred_to_bundled_schema(schema_cache, tmp_path, bundled_dir):
+    write_cache(tmp_path, 0)
+    write_bundled(bundled_dir)
+    with mock.patch("iotedgedev.schemacache.requests.get", side_effect=requests.exceptions.ConnectionError("no network")):
+        assert schema_cache.get_schema(url, Output()) == cached_schema
+
+
+def test_validator_is_compiled_once(schema_cache, tmp_path):
+    SchemaCache.mode = "offline"
+    write_cache(tmp_path, time.time())
+    validator = schema_cache.get_validator(url, Output())
+    assert schema_cache.get_validator(url, Output()) is validator
+    assert not validator.is_valid({})
+
+
+def test_get_shares_cache_per_folder_and_reports_to_caller(tmp_path, bundled_dir):
+    try:
+        schema_cache = SchemaCache.get(str(tmp_path))
+        assert SchemaCache.get(str(tmp_path)) is schema_cache
+        assert SchemaCache.get(str(tmp_path / "other")) is not schema_cache
+    finally:
+        SchemaCache.reset()
+
+    write_cache(tmp_path, 0)
+    write_bundled(bundled_dir, "azure-iot-edge-deployment-template-4.0")
+    first_output = mock.MagicMock()
+    second_output = mock.MagicMock()
+    with mock.patch("iotedgedev.schemacache.requests.get", side_effect=requests.exceptions.ConnectionError("no network")):
+        schema_cache.get_schema(url, first_output)
+        schema_cache.get_schema(Constants.deployment_template_schema_url, second_output)
+
+    assert "using the cached copy" in first_output.info.call_args[0][0]
+    assert "using the bundled copy" in second_output.info.call_args[0][0]